@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Decision latency benchmark. AI decisions are timed on positions from tenhou logs,
+logs can be generated by self-play with --generate option
+"""
+import json
+import logging
+import os
+import tracemalloc
+from optparse import OptionParser
+
+from game.engine.rules import GameRules
+from tenhou.benchmark import DecisionBenchmark, generate_corpus, load_corpus
+from utils.settings_handler import settings
+
+logger = logging.getLogger('tenhou')
+
+
+def parse_args():
+    parser = OptionParser()
+
+    parser.add_option('-a', '--ai',
+                      type='string',
+                      default='first_version',
+                      help='AI package. Default is first_version')
+
+    parser.add_option('-c', '--corpus',
+                      type='string',
+                      default=os.path.join(os.path.dirname(os.path.realpath(__file__)), 'logs', 'benchmark'),
+                      help='Directory with tenhou logs. Default is logs/benchmark')
+
+    parser.add_option('-g', '--generate',
+                      type='int',
+                      default=0,
+                      help='Play this count of self-play games and save them to the corpus before the benchmark')
+
+    parser.add_option('-s', '--seed',
+                      type='string',
+                      default='0',
+                      help='Seed of walls for generated games. Default is 0')
+
+    parser.add_option('-l', '--lookahead',
+                      type='float',
+                      default=0,
+                      help='Time budget for the lookahead of first_version AI. '
+                           'Default is 0, otherwise discard timings depend on the budget')
+
+    parser.add_option('-w', '--warm_up',
+                      action='store_true',
+                      default=False,
+                      help='Replay the corpus once before timings, so shared AI caches are filled '
+                           'like in a long running bot')
+
+    parser.add_option('-m', '--memory',
+                      action='store_true',
+                      default=False,
+                      help='Replay the corpus once more with tracemalloc and add peaks of allocated memory '
+                           'to results. Requires Python 3.9+')
+
+    parser.add_option('-o', '--output',
+                      type='string',
+                      default=None,
+                      help='File for results in JSON format')
+
+    opts, _ = parser.parse_args()
+    return opts
+
+
+def main():
+    opts = parse_args()
+    # messages of AI would be included to timings
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    logging.getLogger('ai').setLevel(logging.WARNING)
+
+    ai_class = settings.copy(
+        AI_PACKAGE=opts.ai,
+        LOOKAHEAD_TIME_BUDGET=opts.lookahead,
+        ESTIMATOR_WORKERS=1,
+    ).AI_CLASS
+
+    if opts.generate:
+        if not os.path.exists(opts.corpus):
+            os.makedirs(opts.corpus)
+        logger.info('Generating {} games to {}'.format(opts.generate, opts.corpus))
+        generate_corpus(ai_class, opts.generate, opts.corpus, opts.seed, GameRules())
+
+    corpus = os.path.exists(opts.corpus) and load_corpus(opts.corpus) or []
+    if not corpus:
+        logger.error('There are no logs in {}, use --generate option to create them'.format(opts.corpus))
+        return
+
+    if opts.warm_up:
+        warm_up = DecisionBenchmark(ai_class)
+        for name, content in corpus:
+            warm_up.add_log(content)
+
+    benchmark = DecisionBenchmark(ai_class)
+    for name, content in corpus:
+        benchmark.add_log(content)
+
+    print(benchmark.format_report())
+    values = benchmark.to_dict()
+
+    # timings with tracemalloc are much slower, so memory is measured in a separate pass
+    if opts.memory:
+        memory_benchmark = DecisionBenchmark(ai_class, trace_memory=True)
+        tracemalloc.start()
+        try:
+            for name, content in corpus:
+                memory_benchmark.add_log(content)
+        finally:
+            tracemalloc.stop()
+
+        print(memory_benchmark.format_report())
+        for call_type, call in memory_benchmark.to_dict()['calls'].items():
+            values['calls'][call_type]['memory'] = call['memory']
+
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            json.dump(values, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,23 @@ class InterfaceAI(object):
         self.player = player
         self.table = player.table
 
+    @classmethod
+    def load_resources(cls, settings):
+        """
+        Method will be called once after AI class loading.
+        You can load here resources that will be shared by all AI instances
+        :param settings: loaded settings
+        :return:
+        """
+
+    @classmethod
+    def release_resources(cls):
+        """
+        Method will be called once before the process exit.
+        You can release here resources that were shared by all AI instances (worker processes and etc.)
+        :return:
+        """
+
     def discard_tile(self, discard_tile):
         """
         AI should decide what tile had to be discarded from the hand on bot turn
@@ -35,6 +52,13 @@ class InterfaceAI(object):
         :return:
         """
 
+    def end_game(self):
+        """
+        Method will be called after the end of the game.
+        You can release here resources of the AI instance
+        :return:
+        """
+
     def draw_tile(self, tile):
         """
         :param tile: 136 tile format
@@ -74,6 +98,23 @@ class InterfaceAI(object):
         """
         return None, None
 
+    def prepare_calls(self):
+        """
+        Will be called after our discard.
+        AI can prepare here answers to other players discards.
+        It should be a generator, client runs it step by step
+        and can stop it after any step (for example when time budget is over)
+        """
+        return iter([])
+
+    def prepare_discards(self):
+        """
+        Will be called after our discard, when we are waiting for the next draw.
+        It should be a generator, client runs it step by step
+        and can stop it after any step (for example after our draw)
+        """
+        return iter([])
+
     def enemy_called_riichi(self, enemy_seat):
         """
         Will be called after other player riichi
@@ -13,6 +13,8 @@ class DiscardOption(object):
     waiting = None
     # how much tiles will improve our hand
     tiles_count = None
+    # count of tiles after the next improving draw (see DiscardLookahead), None if it wasn't calculated
+    second_tiles_count = None
     # number of shanten for that tile
     shanten = None
     # sometimes we had to force tile to be discarded
@@ -36,6 +38,7 @@ class DiscardOption(object):
         self.shanten = shanten
         self.waiting = waiting
         self.tiles_count = tiles_count
+        self.second_tiles_count = None
         self.danger = danger
         self.had_to_be_saved = False
         self.had_to_be_discarded = False
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+
+def pack_hand(tiles_34, open_sets_34=None):
+    """
+    Compact hashable presentation of the hand
+    :param tiles_34: 34 tiles format array
+    :param open_sets_34: array of array of 34 tiles format
+    :return: bytes
+    """
+    key = bytes(tiles_34)
+    if open_sets_34:
+        # tiles array always has 34 items, so open sets will not be mixed with tiles
+        key += bytes([x for meld in open_sets_34 for x in meld])
+    return key
+
+
+class LRUCache(object):
+    """
+    Dictionary with limited size, least recently used items are removed first
+    """
+    size = None
+    hits = 0
+    misses = 0
+
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        """
+        :return: cached value or None
+        """
+        value = self._items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+
+        if len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+
+class ShantenCache(object):
+    """
+    Shanten numbers for already calculated hands.
+    Hand changes only on one or two tiles between calls, so most of shanten queries are repeated
+    """
+    DEFAULT_SIZE = 20000
+
+    shanten = None
+    cache = None
+
+    def __init__(self, shanten, size=DEFAULT_SIZE):
+        """
+        :param shanten: object with calculate_shanten method (Shanten or UkeireCalculator)
+        :param size: max count of cached hands
+        """
+        self.shanten = shanten
+        self.cache = LRUCache(size)
+
+    def calculate_shanten(self, tiles_34, open_sets_34=None):
+        key = pack_hand(tiles_34, open_sets_34)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.shanten.calculate_shanten(tiles_34, open_sets_34)
+            self.cache.set(key, result)
+        return result
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+
+class AgariCache(object):
+    """
+    Agari state for already checked hands
+    """
+    DEFAULT_SIZE = 5000
+
+    agari = None
+    cache = None
+
+    def __init__(self, agari, size=DEFAULT_SIZE):
+        """
+        :param agari: Agari instance
+        :param size: max count of cached hands
+        """
+        self.agari = agari
+        self.cache = LRUCache(size)
+
+    def is_agari(self, tiles_34, open_sets_34=None):
+        key = pack_hand(tiles_34, open_sets_34)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.agari.is_agari(tiles_34, open_sets_34)
+            self.cache.set(key, result)
+        return result
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+
+class WaitingCache(object):
+    """
+    Uke-ire of all discards for already checked hands.
+    Results depend only on the hand, so they can be prepared before the draw
+    """
+    DEFAULT_SIZE = 5000
+
+    ukeire = None
+    cache = None
+
+    def __init__(self, ukeire, size=DEFAULT_SIZE):
+        """
+        :param ukeire: UkeireCalculator instance
+        :param size: max count of cached hands
+        """
+        self.ukeire = ukeire
+        self.cache = LRUCache(size)
+
+    def calculate_waiting(self, tiles_34, closed_tiles_34, open_sets_34=None):
+        key = pack_hand(tiles_34, open_sets_34) + bytes(closed_tiles_34)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.ukeire.calculate_waiting(tiles_34, closed_tiles_34, open_sets_34)
+            self.cache.set(key, result)
+        # callers can modify waiting lists
+        return [(tile, shanten, list(waiting)) for tile, shanten, waiting in result]
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+
+class HandValueCache(object):
+    """
+    Results of HandCalculator for already estimated hands.
+    Waits of the same hand are estimated again on each enemy discard (defence) and for each strategy check,
+    so we are storing results while hand, melds, dora indicators and rules are the same
+    """
+    DEFAULT_SIZE = 2000
+
+    calculator = None
+    cache = None
+
+    def __init__(self, calculator, size=DEFAULT_SIZE):
+        """
+        :param calculator: HandCalculator instance
+        :param size: max count of cached hands
+        """
+        self.calculator = calculator
+        self.cache = LRUCache(size)
+
+    def estimate_hand_value(self, tiles, win_tile, melds=None, dora_indicators=None, config=None):
+        """
+        The same arguments as in HandCalculator.estimate_hand_value.
+        Returned result is shared between calls, so it shouldn't be changed
+        """
+        key = self._build_key(tiles, win_tile, melds, dora_indicators, config)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.calculator.estimate_hand_value(tiles, win_tile, melds, dora_indicators, config)
+            self.cache.set(key, result)
+        return result
+
+    def clear(self):
+        self.cache.clear()
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+    def _build_key(self, tiles, win_tile, melds, dora_indicators, config):
+        melds_key = tuple([(x.type, x.opened, tuple(x.tiles)) for x in melds or []])
+        config_key = None
+        if config:
+            # yaku config is always the same
+            config_key = tuple(sorted([(x, y) for x, y in vars(config).items() if x != 'yaku']))
+
+        return (tuple(sorted(tiles)), win_tile, melds_key, tuple(dora_indicators or []), config_key)
+
+
+class DividerCache(object):
+    """
+    Hand decompositions for already divided hands.
+    Riichi and call decisions are working with hands that are almost the same between calls
+    """
+    DEFAULT_SIZE = 2000
+
+    divider = None
+    cache = None
+
+    def __init__(self, divider, size=DEFAULT_SIZE):
+        """
+        :param divider: HandDivider instance
+        :param size: max count of cached hands
+        """
+        self.divider = divider
+        self.cache = LRUCache(size)
+
+    def divide_hand(self, tiles_34, melds=None):
+        melds_key = tuple([x for meld in melds or [] for x in meld.tiles_34])
+        key = ('divide', bytes(tiles_34), melds_key)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.divider.divide_hand(tiles_34, melds)
+            self.cache.set(key, result)
+        return self._copy(result)
+
+    def find_valid_combinations(self, tiles_34, first_index, second_index, hand_not_completed=False):
+        key = ('combinations', bytes(tiles_34), first_index, second_index, hand_not_completed)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.divider.find_valid_combinations(tiles_34, first_index, second_index, hand_not_completed)
+            self.cache.set(key, result)
+        return self._copy(result)
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+    def _copy(self, result):
+        # callers can modify found sets
+        return [[list(x) for x in item] for item in result]
+
+
+class SharedCaches(object):
+    """
+    Caches that don't depend on the game state, only on hands and rules.
+    One instance is used by all bots of the process, so a host with many sessions keeps one copy of them
+    """
+    agari = None
+    shanten = None
+    outs = None
+    lookahead = None
+    hand_divider = None
+    finished_hand = None
+
+    def __init__(self, ukeire, agari, divider, calculator, lookahead_size):
+        """
+        :param ukeire: UkeireCalculator instance
+        :param agari: Agari instance
+        :param divider: HandDivider instance
+        :param calculator: HandCalculator instance
+        :param lookahead_size: max count of hands cached by discard lookahead
+        """
+        self.agari = AgariCache(agari)
+        self.shanten = ShantenCache(ukeire)
+        self.outs = WaitingCache(ukeire)
+        self.lookahead = LRUCache(lookahead_size)
+        self.hand_divider = DividerCache(divider)
+        self.finished_hand = HandValueCache(calculator)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+from mahjong.constants import AKA_DORA_LIST
+from mahjong.meld import Meld
+
+
+class CallsTable(object):
+    """
+    Prepared answers to other players discards.
+
+    Our hand is the same till our next draw, so right after our discard we can decide
+    what to do with each kind of tile and answer discard prompts without calculations.
+    Answers are valid while our hand, dora indicators, riichi players and AI mode are the same,
+    counts of visible tiles are taken on the moment of preparing.
+
+    Preparation is done step by step, answers for already checked tiles can be used before its end
+    """
+    ai = None
+    player = None
+    table = None
+
+    key = None
+    # (tile 34, is aka dora) -> kan type
+    kans = None
+    # (tile 34, is aka dora, is kamicha discard) -> (meld type, meld tiles from our hand, discard option)
+    melds = None
+    # (tile 34, is aka dora, enemy seat) -> should we call ron
+    wins = None
+
+    def __init__(self, ai):
+        self.ai = ai
+        self.player = ai.player
+        self.table = ai.table
+        self.clear()
+
+    def clear(self):
+        self.key = None
+        self.kans = {}
+        self.melds = {}
+        self.wins = {}
+
+    def prepare(self):
+        """
+        Calculate answers for all tiles that can be discarded by other players.
+        It is a generator, each step checks one kind of tiles
+        """
+        self.clear()
+
+        hand = set(self.player.tiles)
+        tiles_34 = self.player.tiles_34
+        revealed_tiles = self.table.revealed_tiles
+        strategy = self.ai.current_strategy
+        key = self._state_key()
+
+        kans = {}
+        melds = {}
+        wins = {}
+        for tile_34 in range(0, 34):
+            if tiles_34[tile_34] + revealed_tiles[tile_34] >= 4:
+                continue
+
+            for tile in self._find_tiles_to_check(tile_34, hand):
+                tile_key = self._tile_key(tile)
+                kans[tile_key] = self.ai.should_call_kan(tile, True)
+
+                for enemy_seat in range(1, 4):
+                    wins[tile_key + (enemy_seat,)] = self.ai.should_call_win(tile, enemy_seat)
+
+                for is_kamicha_discard in [False, True]:
+                    meld, discard_option = None, None
+                    if strategy:
+                        meld, discard_option = strategy.try_to_call_meld(tile, is_kamicha_discard)
+
+                    answer = None
+                    if meld:
+                        meld_tiles = [x for x in meld.tiles if x != tile]
+                        answer = (meld.type, meld_tiles, discard_option)
+                    melds[tile_key + (is_kamicha_discard,)] = answer
+
+            # answers were calculated for the state on the start,
+            # they will not be used if the state was changed between steps
+            self.kans = kans
+            self.melds = melds
+            self.wins = wins
+            self.key = key
+            yield
+
+    def find_kan(self, tile):
+        """
+        :param tile: 136 tile format
+        :return: was answer found and kan type
+        """
+        if self.key != self._state_key():
+            return False, None
+
+        tile_key = self._tile_key(tile)
+        if tile_key not in self.kans:
+            return False, None
+
+        return True, self.kans[tile_key]
+
+    def find_win(self, tile, enemy_seat):
+        """
+        :param tile: 136 tile format
+        :param enemy_seat: seat of the discarding player
+        :return: was answer found and should we call ron
+        """
+        if self.key != self._state_key():
+            return False, None
+
+        tile_key = self._tile_key(tile) + (enemy_seat,)
+        if tile_key not in self.wins:
+            return False, None
+
+        return True, self.wins[tile_key]
+
+    def find_meld(self, tile, is_kamicha_discard):
+        """
+        :param tile: 136 tile format
+        :param is_kamicha_discard: boolean
+        :return: was answer found, Meld and DiscardOption
+        """
+        if self.key != self._state_key():
+            return False, None, None
+
+        tile_key = self._tile_key(tile) + (is_kamicha_discard,)
+        if tile_key not in self.melds:
+            return False, None, None
+
+        answer = self.melds[tile_key]
+        if not answer:
+            return True, None, None
+
+        meld_type, meld_tiles, discard_option = answer
+        meld = Meld()
+        meld.type = meld_type
+        meld.tiles = sorted(meld_tiles + [tile])
+        return True, meld, discard_option
+
+    def _find_tiles_to_check(self, tile_34, hand):
+        """
+        One tile of each kind is enough, except red five that can change the hand value
+        """
+        tiles = []
+        for tile in range(tile_34 * 4, tile_34 * 4 + 4):
+            if tile in hand:
+                continue
+
+            if self._tile_key(tile) not in [self._tile_key(x) for x in tiles]:
+                tiles.append(tile)
+        return tiles
+
+    def _tile_key(self, tile):
+        return tile // 4, self.table.has_aka_dora and tile in AKA_DORA_LIST
+
+    def _state_key(self):
+        strategy = self.ai.current_strategy
+        return (
+            id(self.player.tiles),
+            self.player.tiles.version,
+            len(self.player.melds),
+            len(self.table.dora_indicators),
+            tuple([x.in_riichi for x in self.table.players]),
+            self.ai.in_defence,
+            strategy and strategy.type,
+        )
@@ -1,4 +1,3 @@
-from mahjong.tile import TilesConverter
 from mahjong.utils import plus_dora, is_honor, is_aka_dora
 
 from game.ai.first_version.defence.defence import DefenceTile
@@ -9,6 +8,13 @@ from game.ai.first_version.defence.suji import Suji
 
 
 class DefenceHandler(object):
+    # Estimated cost of the deal-in to riichi player, it is the same as the limit for cheap open hands below.
+    # Riichi hands have ura dora and often ippatsu, so their cost is close to mangan
+    DEAL_IN_COST = 7000
+    # Estimator counts only wins by our own draws, so this chance is lower than the real win rate.
+    # With 60 tiles in the wall ryanmen waits get 0.6-0.7 and kanchan or penchan waits get 0.25-0.4
+    MIN_WIN_CHANCE = 0.45
+
     table = None
     player = None
 
@@ -93,6 +99,13 @@ class DefenceHandler(object):
             return True
 
         max_cost = max(hands_estimated_cost)
+
+        estimation = self._estimate_discard_against_riichi(discard_candidate, threatening_players)
+        # expected loss from this discard is bigger than expected win,
+        # win by ron is not estimated, so it is a careful choice
+        if estimation and estimation.win * max_cost < estimation.deal_in * self.DEAL_IN_COST:
+            return True
+
         # our open hand in tempai, but it is cheap
         # so we can fold it
         if self.player.is_open_hand and max_cost < 7000:
@@ -101,16 +114,41 @@ class DefenceHandler(object):
         # when we call riichi we can get ura dora,
         # so it is reasonable to riichi 3k+ hands
         if not self.player.is_open_hand:
+            if max_cost < 3000:
+                return True
+
             # there are a lot of chances that we will not win with a bad wait
             # against other threatening players
-            if max_cost < 3000 or len(waiting) < 2:
+            if estimation:
+                if estimation.win < self.MIN_WIN_CHANCE:
+                    return True
+            elif len(waiting) < 2:
                 return True
 
         return False
 
+    def _estimate_discard_against_riichi(self, discard_candidate, threatening_players):
+        """
+        Chances to win and to deal in with the discard can be estimated only against riichi players,
+        other threatening players waits are unknown
+        :return: DiscardEstimation or None
+        """
+        if not discard_candidate or self.table.count_of_remaining_tiles <= 0:
+            return None
+
+        if not [x for x in threatening_players if x.player.in_riichi]:
+            return None
+
+        estimation = self.player.ai.estimator.estimate([discard_candidate.tile_to_discard])[0]
+        # time limit was over before the first sample, all probabilities are zero
+        if not estimation.samples:
+            return None
+
+        return estimation
+
     def try_to_find_safe_tile_to_discard(self, discard_results):
-        self.hand_34 = TilesConverter.to_34_array(self.player.tiles)
-        self.closed_hand_34 = TilesConverter.to_34_array(self.player.closed_hand)
+        self.hand_34 = self.player.tiles_34
+        self.closed_hand_34 = self.player.closed_hand_34
 
         threatening_players = self._get_threatening_players()
 
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game.ai.first_version.cache import pack_hand
+from game.ai.first_version.ukeire import UkeireCalculator
+
+
+class DiscardEstimation(object):
+    # in 34 tile format
+    tile_to_discard = None
+    # probability to get tempai till the end of the round
+    tempai = 0
+    # probability to complete the hand by our own draws
+    win = 0
+    # probability that one of riichi players is waiting on this tile
+    deal_in = 0
+    # count of played samples
+    samples = 0
+
+    def __init__(self, tile_to_discard, tempai, win, deal_in, samples):
+        self.tile_to_discard = tile_to_discard
+        self.tempai = tempai
+        self.win = win
+        self.deal_in = deal_in
+        self.samples = samples
+
+    def __str__(self):
+        return 'tile={}, tempai={:.2f}, win={:.2f}, deal_in={:.2f}, samples={}'.format(
+            self.tile_to_discard, self.tempai, self.win, self.deal_in, self.samples)
+
+
+class WinEstimator(object):
+    """
+    Monte Carlo estimation of our chances and deal-in risk for discard options.
+
+    Not visible tiles are shuffled to opponents hands and to the wall, then for each discard option
+    we play our next draws with the best uke-ire choices and check waits of riichi players
+    (wait is one of pairs or tatsu of the sampled hand, furiten waits are skipped).
+
+    Estimation is blocking the event loop, so its time limit should be much smaller than the min action delay
+    """
+    DEFAULT_SAMPLES = 200
+    DEFAULT_TIME_LIMIT = 0.1
+
+    player = None
+    table = None
+
+    samples = None
+    time_limit = None
+    seed = None
+    workers = None
+
+    # worker processes are shared by all estimators of the process
+    _executor = None
+    _executor_workers = 0
+
+    def __init__(self, player, samples=DEFAULT_SAMPLES, time_limit=DEFAULT_TIME_LIMIT, seed=None, workers=1):
+        """
+        :param player: our player
+        :param samples: count of samples for one estimation
+        :param time_limit: max time for one estimation in seconds
+        :param seed: fixed seed for reproducible estimations
+        :param workers: count of worker processes, 1 to run in the same process
+        """
+        self.player = player
+        self.table = player.table
+        self.samples = samples
+        self.time_limit = time_limit
+        self.seed = seed
+        self.workers = workers
+
+    def estimate(self, discard_tiles):
+        """
+        :param discard_tiles: list of tiles in 34 format, tiles from our closed hand
+        :return: list of DiscardEstimation
+        """
+        state = self._build_state(discard_tiles)
+        deadline = time.monotonic() + self.time_limit
+
+        rng = random.Random(self.seed)
+        workers = self._count_of_workers()
+        if workers > 1:
+            chunk = self.samples // workers
+            sizes = [chunk + (i < self.samples % workers and 1 or 0) for i in range(0, workers)]
+            executor = self.get_executor(workers)
+            futures = [executor.submit(simulate, state, x, rng.getrandbits(32), deadline) for x in sizes if x]
+            results = [x.result() for x in futures]
+        else:
+            results = [simulate(state, self.samples, rng.getrandbits(32), deadline)]
+
+        samples = sum([x[0] for x in results])
+        estimations = []
+        for i, tile in enumerate(discard_tiles):
+            counts = [sum([x[1][i][j] for x in results]) for j in range(0, 3)]
+            probabilities = [samples and x / samples or 0 for x in counts]
+            estimations.append(DiscardEstimation(tile, probabilities[0], probabilities[1], probabilities[2], samples))
+
+        return estimations
+
+    @classmethod
+    def get_executor(cls, workers):
+        """
+        :param workers: required count of worker processes, pool will be recreated if it has less workers
+        :return: process pool of the process
+        """
+        if cls._executor_workers < workers:
+            cls.shutdown_executor()
+            cls._executor = ProcessPoolExecutor(max_workers=workers)
+            cls._executor_workers = workers
+        return cls._executor
+
+    @classmethod
+    def shutdown_executor(cls):
+        if cls._executor:
+            cls._executor.shutdown()
+            cls._executor = None
+            cls._executor_workers = 0
+
+    def _count_of_workers(self):
+        # one core is used by the bot itself
+        spare_cores = (os.cpu_count() or 1) - 1
+        return max(1, min(self.workers, spare_cores))
+
+    def _build_state(self, discard_tiles):
+        """
+        Visible state of the table as plain data, so it can be sent to worker processes
+        """
+        tiles_34 = self.player.tiles_34
+        closed_hand_34 = self.player.closed_hand_34
+        revealed_tiles = self.table.revealed_tiles
+
+        # tiles from our open sets are already in revealed tiles
+        unseen_tiles = []
+        for tile in range(0, 34):
+            unseen_tiles += [tile] * max(0, 4 - closed_hand_34[tile] - revealed_tiles[tile])
+
+        enemies = []
+        for enemy in self.table.players[1:]:
+            enemies.append((13 - len(enemy.melds) * 3, enemy.in_riichi, tuple(enemy.safe_tiles)))
+
+        # after our discard three players will draw tiles before us
+        count_of_draws = self.table.count_of_remaining_tiles // 4
+
+        return (tiles_34, closed_hand_34, self.player.open_hand_34_tiles, tuple(discard_tiles),
+                unseen_tiles, tuple(enemies), count_of_draws)
+
+
+def simulate(state, samples, seed, deadline):
+    """
+    Play samples for the state built by WinEstimator
+    :return: count of played samples and [tempai, win, deal in] counts for each discard
+    """
+    return Simulation(state, seed).run(samples, deadline)
+
+
+class Simulation(object):
+    """
+    One worker part of the estimation. All buffers are allocated once and reused between samples
+    """
+
+    def __init__(self, state, seed):
+        (self.tiles_34, self.closed_hand_34, self.open_sets_34, self.discard_tiles,
+         unseen_tiles, self.enemies, self.count_of_draws) = state
+
+        self.rng = random.Random(seed)
+        self.ukeire = UkeireCalculator()
+
+        self.wall = list(unseen_tiles)
+        self.hand_size = sum([x[0] for x in self.enemies])
+        self.enemy_hand = [0] * 34
+        self.waits = [False] * 34
+        self.counts = [[0, 0, 0] for _ in self.discard_tiles]
+
+        self.live_tiles = [0] * 34
+        for tile in unseen_tiles:
+            self.live_tiles[tile] += 1
+
+        # packed 13 tiles hand -> (shanten, waiting)
+        self.hands = {}
+        # packed 14 tiles hand -> the best discard
+        self.transitions = {}
+
+    def run(self, samples, deadline):
+        played = 0
+        while played < samples and time.monotonic() < deadline:
+            self.rng.shuffle(self.wall)
+            self._play_sample()
+            played += 1
+        return played, self.counts
+
+    def _play_sample(self):
+        waits = self._sample_riichi_waits()
+
+        # our draws are going after opponents hands in the wall
+        draws = self.wall[self.hand_size + 3::4][:self.count_of_draws]
+
+        for i, tile in enumerate(self.discard_tiles):
+            counts = self.counts[i]
+            if waits[tile]:
+                counts[2] += 1
+
+            tiles_34 = self.tiles_34[:]
+            closed_hand_34 = self.closed_hand_34[:]
+            tiles_34[tile] -= 1
+            closed_hand_34[tile] -= 1
+
+            is_tempai, is_win = self._play_draws(tiles_34, closed_hand_34, draws)
+            counts[0] += is_tempai and 1 or 0
+            counts[1] += is_win and 1 or 0
+
+    def _play_draws(self, tiles_34, closed_hand_34, draws):
+        shanten, waiting = self._find_hand_state(tiles_34)
+        is_tempai = shanten == 0
+        for tile in draws:
+            if tile not in waiting:
+                continue
+
+            if shanten == 0:
+                return True, True
+
+            tiles_34, closed_hand_34 = self._improve_hand(tiles_34, closed_hand_34, tile, shanten - 1)
+            shanten, waiting = self._find_hand_state(tiles_34)
+            is_tempai = is_tempai or shanten == 0
+        return is_tempai, False
+
+    def _find_hand_state(self, tiles_34):
+        key = pack_hand(tiles_34, self.open_sets_34)
+        state = self.hands.get(key)
+        if state is None:
+            shanten, waiting = self.ukeire.find_waiting(tiles_34, self.open_sets_34)
+            state = self.hands[key] = (shanten, frozenset(waiting))
+        return state
+
+    def _improve_hand(self, tiles_34, closed_hand_34, tile, shanten):
+        """
+        Add improving tile and discard the tile with the best uke-ire
+        """
+        tiles_34 = tiles_34[:]
+        closed_hand_34 = closed_hand_34[:]
+        tiles_34[tile] += 1
+        closed_hand_34[tile] += 1
+
+        key = pack_hand(tiles_34, self.open_sets_34)
+        discard_tile = self.transitions.get(key)
+        if discard_tile is None:
+            best_count = -1
+            results = self.ukeire.calculate_waiting(tiles_34, closed_hand_34, self.open_sets_34, max_shanten=shanten)
+            for hand_tile, hand_shanten, waiting in results:
+                count = sum([self.live_tiles[x] for x in waiting])
+                if hand_shanten == shanten and count > best_count:
+                    best_count = count
+                    discard_tile = hand_tile
+            self.transitions[key] = discard_tile
+
+        tiles_34[discard_tile] -= 1
+        closed_hand_34[discard_tile] -= 1
+        return tiles_34, closed_hand_34
+
+    def _sample_riichi_waits(self):
+        waits = self.waits
+        for tile in range(0, 34):
+            waits[tile] = False
+
+        position = 0
+        for hand_size, in_riichi, safe_tiles in self.enemies:
+            if in_riichi:
+                hand = self.enemy_hand
+                for tile in range(0, 34):
+                    hand[tile] = 0
+                for tile in self.wall[position:position + hand_size]:
+                    hand[tile] += 1
+
+                candidates = [x for x in self._find_waits(hand) if not any([y in safe_tiles for y in x])]
+                if candidates:
+                    for tile in self.rng.choice(candidates):
+                        waits[tile] = True
+            position += hand_size
+        return waits
+
+    def _find_waits(self, hand):
+        """
+        Waits that can be built from pairs and tatsu of the hand
+        """
+        results = []
+        for tile in range(0, 34):
+            if not hand[tile]:
+                continue
+
+            if hand[tile] >= 2:
+                # shanpon
+                results.append((tile,))
+
+            if tile >= 27:
+                continue
+
+            position = tile % 9
+            if position < 8 and hand[tile + 1]:
+                if position == 0:
+                    results.append((tile + 2,))
+                elif position == 7:
+                    results.append((tile - 1,))
+                else:
+                    results.append((tile - 1, tile + 2))
+
+            if position < 7 and hand[tile + 2]:
+                # kanchan
+                results.append((tile + 1,))
+        return results
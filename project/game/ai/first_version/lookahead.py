@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import time
+
+from game.ai.first_version.cache import LRUCache, pack_hand
+
+
+class DiscardLookahead(object):
+    """
+    Two draws deep evaluation of discard options.
+
+    For each option we check all tiles that will improve the hand,
+    and for each of them we find the best count of tiles after the next discard.
+    So options with the same count of tiles can be compared by the shape of the hand after improvement.
+
+    Options are checked from the most promising one and evaluation stops when time budget is over,
+    not checked options will not have second_tiles_count. Depth is fixed, the third draw would multiply
+    the count of hands by the count of improving tiles and it will not fit the time of one decision.
+
+    The result depends on the machine load when the budget is over, so the lookahead is disabled by default
+    """
+    DEFAULT_TIME_BUDGET = 0
+    DEFAULT_CACHE_SIZE = 5000
+
+    ukeire = None
+    time_budget = None
+    # packed hand -> waiting lists of the best discards
+    cache = None
+
+    def __init__(self, ukeire, time_budget=DEFAULT_TIME_BUDGET, cache_size=DEFAULT_CACHE_SIZE, cache=None):
+        """
+        :param ukeire: UkeireCalculator instance
+        :param time_budget: max time for one decision in seconds, 0 to disable the evaluation
+        :param cache_size: max count of cached hands
+        :param cache: LRUCache shared with other instances, cache_size is not used with it
+        """
+        self.ukeire = ukeire
+        self.time_budget = time_budget
+        self.cache = cache if cache is not None else LRUCache(cache_size)
+
+    def evaluate(self, discard_options, tiles_34, closed_tiles_34, open_sets_34, live_tiles):
+        """
+        Set second_tiles_count for discard options with the best shanten
+        :param discard_options: list of DiscardOption
+        :param tiles_34: hand with drawn tile in 34 tiles format
+        :param closed_tiles_34: closed part of the hand in 34 tiles format
+        :param open_sets_34: array of array of 34 tiles format
+        :param live_tiles: count of not visible tiles in 34 tiles format
+        :return: count of evaluated options
+        """
+        for option in discard_options:
+            option.second_tiles_count = None
+
+        if not discard_options:
+            return 0
+
+        # with tempai the next improving draw is a win,
+        # so the first step is enough
+        shanten = min([x.shanten for x in discard_options])
+        if shanten < 1:
+            return 0
+
+        deadline = time.monotonic() + self.time_budget
+
+        # other options would be never chosen
+        options = [x for x in discard_options if x.shanten == shanten]
+        options = sorted(options, key=lambda x: -x.tiles_count)
+
+        evaluated = 0
+        for option in options:
+            result = self._evaluate_option(option, tiles_34, closed_tiles_34, open_sets_34, live_tiles, deadline)
+            if result is None:
+                break
+
+            option.second_tiles_count = result
+            evaluated += 1
+
+        return evaluated
+
+    def prepare(self, tiles_34, closed_tiles_34, open_sets_34, tile_to_discard, shanten, waiting):
+        """
+        Fill the cache for the discard option, so later evaluation will not need calculations
+        :param tiles_34: hand with drawn tile in 34 tiles format
+        :param closed_tiles_34: closed part of the hand in 34 tiles format
+        :param open_sets_34: array of array of 34 tiles format
+        :param tile_to_discard: 34 tile format
+        :param shanten: shanten after the discard
+        :param waiting: list of tiles in 34 format
+        """
+        # tempai hands are not evaluated
+        if shanten < 1:
+            return
+
+        tiles_34 = tiles_34[:]
+        closed_tiles_34 = closed_tiles_34[:]
+        tiles_34[tile_to_discard] -= 1
+        closed_tiles_34[tile_to_discard] -= 1
+
+        for tile in waiting:
+            tiles_34[tile] += 1
+            closed_tiles_34[tile] += 1
+            self._find_best_waiting(tiles_34, closed_tiles_34, open_sets_34, shanten - 1)
+            tiles_34[tile] -= 1
+            closed_tiles_34[tile] -= 1
+
+    def _evaluate_option(self, option, tiles_34, closed_tiles_34, open_sets_34, live_tiles, deadline):
+        """
+        :return: sum of (count of tiles * count of tiles after the next discard) for improving tiles
+        or None when time budget is over
+        """
+        tiles_34 = tiles_34[:]
+        closed_tiles_34 = closed_tiles_34[:]
+        tiles_34[option.tile_to_discard] -= 1
+        closed_tiles_34[option.tile_to_discard] -= 1
+
+        result = 0
+        for tile in option.waiting:
+            if not live_tiles[tile]:
+                continue
+
+            if time.monotonic() > deadline:
+                return None
+
+            tiles_34[tile] += 1
+            closed_tiles_34[tile] += 1
+
+            waiting = self._find_best_waiting(tiles_34, closed_tiles_34, open_sets_34, option.shanten - 1)
+
+            tiles_34[tile] -= 1
+            closed_tiles_34[tile] -= 1
+
+            # we already drew one of these tiles
+            live_tiles[tile] -= 1
+            tiles_count = max([sum([live_tiles[x] for x in item]) for item in waiting] or [0])
+            live_tiles[tile] += 1
+
+            result += live_tiles[tile] * tiles_count
+
+        return result
+
+    def _find_best_waiting(self, tiles_34, closed_tiles_34, open_sets_34, shanten):
+        """
+        Waiting tiles of discards that keep improved shanten,
+        they don't depend on the visible tiles, so we can cache them between turns
+        """
+        key = pack_hand(tiles_34, open_sets_34)
+        waiting = self.cache.get(key)
+        if waiting is None:
+            # there is no need to calculate waiting for discards that make the hand worse
+            results = self.ukeire.calculate_waiting(tiles_34, closed_tiles_34, open_sets_34, max_shanten=shanten)
+            waiting = [x[2] for x in results if x[1] == shanten and x[2]]
+            self.cache.set(key, waiting)
+        return waiting
@@ -13,11 +13,17 @@ from mahjong.utils import is_pair, is_pon
 
 from game.ai.base.main import InterfaceAI
 from game.ai.discard import DiscardOption
+from game.ai.first_version.cache import SharedCaches
+from game.ai.first_version.calls import CallsTable
 from game.ai.first_version.defence.main import DefenceHandler
+from game.ai.first_version.estimator import WinEstimator
+from game.ai.first_version.lookahead import DiscardLookahead
 from game.ai.first_version.strategies.honitsu import HonitsuStrategy
 from game.ai.first_version.strategies.main import BaseStrategy
 from game.ai.first_version.strategies.tanyao import TanyaoStrategy
 from game.ai.first_version.strategies.yakuhai import YakuhaiStrategy
+from game.ai.first_version.suit_tables import SuitTables
+from game.ai.first_version.ukeire import UkeireCalculator
 
 logger = logging.getLogger('ai')
 
@@ -27,9 +33,14 @@ class ImplementationAI(InterfaceAI):
 
     agari = None
     shanten = None
+    ukeire = None
+    outs = None
+    lookahead = None
     defence = None
+    estimator = None
     hand_divider = None
     finished_hand = None
+    calls = None
     last_discard_option = None
 
     previous_shanten = 7
@@ -38,30 +49,106 @@ class ImplementationAI(InterfaceAI):
 
     current_strategy = None
 
+    lookahead_time_budget = DiscardLookahead.DEFAULT_TIME_BUDGET
+    estimator_options = {}
+
+    # one instance for all bots in the process
+    shared_caches = None
+
     def __init__(self, player):
         super(ImplementationAI, self).__init__(player)
 
-        self.agari = Agari()
-        self.shanten = Shanten()
+        self.ukeire = UkeireCalculator()
+        # hand is changing only on one or two tiles between calls,
+        # so most of shanten and agari queries are repeated.
+        # Cached results don't depend on the game state, so bots of the same process are sharing them
+        caches = self.get_shared_caches()
+        self.agari = caches.agari
+        self.shanten = caches.shanten
+        self.outs = caches.outs
+        self.lookahead = DiscardLookahead(self.ukeire, self.lookahead_time_budget, cache=caches.lookahead)
         self.defence = DefenceHandler(player)
-        self.hand_divider = HandDivider()
-        self.finished_hand = HandCalculator()
+        self.estimator = WinEstimator(player, **self.estimator_options)
+        self.hand_divider = caches.hand_divider
+        self.finished_hand = caches.finished_hand
+        self.calls = CallsTable(self)
         self.previous_shanten = 7
         self.current_strategy = None
         self.waiting = []
         self.in_defence = False
         self.last_discard_option = None
 
+    @classmethod
+    def load_resources(cls, settings):
+        cls.lookahead_time_budget = settings.LOOKAHEAD_TIME_BUDGET
+        cls.estimator_options = {
+            'samples': settings.ESTIMATOR_SAMPLES,
+            'time_limit': settings.ESTIMATOR_TIME_LIMIT,
+            'seed': settings.ESTIMATOR_SEED,
+            'workers': settings.ESTIMATOR_WORKERS,
+        }
+
+        if settings.SUIT_TABLES_FILE and not UkeireCalculator.suit_tables:
+            UkeireCalculator.suit_tables = SuitTables.load(settings.SUIT_TABLES_FILE)
+
+    @classmethod
+    def release_resources(cls):
+        WinEstimator.shutdown_executor()
+
+    @classmethod
+    def get_shared_caches(cls):
+        if not cls.shared_caches:
+            cls.shared_caches = SharedCaches(UkeireCalculator(), Agari(), HandDivider(), HandCalculator(),
+                                             DiscardLookahead.DEFAULT_CACHE_SIZE)
+        return cls.shared_caches
+
     def init_hand(self):
         """
         Let's decide what we will do with our hand (like open for tanyao and etc.)
         """
+        self.calls.clear()
         self.determine_strategy()
 
     def erase_state(self):
         self.current_strategy = None
         self.in_defence = False
         self.last_discard_option = None
+        self.calls.clear()
+
+    def prepare_calls(self):
+        return self.calls.prepare()
+
+    def prepare_discards(self):
+        """
+        Uke-ire and shapes after the next improvement are cached for each tile that we can draw.
+        The discard itself depends on other players discards, so it will be chosen after the draw
+        """
+        if self.player.in_riichi:
+            return
+
+        tiles_34 = self.player.tiles_34
+        closed_tiles_34 = self.player.closed_hand_34
+        open_sets_34 = self.player.open_hand_34_tiles
+        live_tiles = self.count_live_tiles(tiles_34)
+
+        # the most probable draws first
+        draws = sorted([x for x in range(0, 34) if live_tiles[x] > 0], key=lambda x: -live_tiles[x])
+        for tile in draws:
+            tiles_34[tile] += 1
+            closed_tiles_34[tile] += 1
+
+            results = self.outs.calculate_waiting(tiles_34, closed_tiles_34, open_sets_34)
+            yield
+
+            if self.lookahead.time_budget:
+                shanten = min([x[1] for x in results if x[2]] or [0])
+                for hand_tile, hand_shanten, waiting in results:
+                    if waiting and hand_shanten == shanten:
+                        self.lookahead.prepare(tiles_34, closed_tiles_34, open_sets_34, hand_tile, shanten, waiting)
+                        yield
+
+            tiles_34[tile] -= 1
+            closed_tiles_34[tile] -= 1
 
     def draw_tile(self, tile):
         """
@@ -82,6 +169,13 @@ class ImplementationAI(InterfaceAI):
                                                self.player.closed_hand,
                                                self.player.open_hand_34_tiles)
 
+        tiles_34 = self.player.tiles_34
+        self.lookahead.evaluate(results,
+                                tiles_34,
+                                self.player.closed_hand_34,
+                                self.player.open_hand_34_tiles,
+                                self.count_live_tiles(tiles_34))
+
         selected_tile = self.process_discard_options_and_select_tile_to_discard(results, shanten)
 
         # bot think that there is a threat on the table
@@ -101,12 +195,13 @@ class ImplementationAI(InterfaceAI):
         return self.process_discard_option(selected_tile, self.player.closed_hand)
 
     def process_discard_options_and_select_tile_to_discard(self, results, shanten, had_was_open=False):
-        tiles_34 = TilesConverter.to_34_array(self.player.tiles)
+        tiles_34 = self.player.tiles_34
+        live_tiles = self.count_live_tiles(tiles_34)
 
         # we had to update tiles value there
         # because it is related with shanten number
         for result in results:
-            result.tiles_count = self.count_tiles(result.waiting, tiles_34)
+            result.tiles_count = sum([live_tiles[x] for x in result.waiting])
             result.calculate_value(shanten)
 
         # current strategy can affect on our discard options
@@ -132,33 +227,17 @@ class ImplementationAI(InterfaceAI):
         closed_tiles_34 = TilesConverter.to_34_array(closed_hand)
         is_agari = self.agari.is_agari(tiles_34, self.player.open_hand_34_tiles)
 
-        results = []
-        for hand_tile in range(0, 34):
-            if not closed_tiles_34[hand_tile]:
-                continue
-
-            tiles_34[hand_tile] -= 1
-
-            shanten = self.shanten.calculate_shanten(tiles_34, open_sets_34)
-
-            waiting = []
-            for j in range(0, 34):
-                if hand_tile == j or tiles_34[j] == 4:
-                    continue
-
-                tiles_34[j] += 1
-                if self.shanten.calculate_shanten(tiles_34, open_sets_34) == shanten - 1:
-                    waiting.append(j)
-                tiles_34[j] -= 1
-
-            tiles_34[hand_tile] += 1
+        live_tiles = self.count_live_tiles(tiles_34)
 
+        # all discard candidates are evaluated in one batch
+        results = []
+        for hand_tile, shanten, waiting in self.outs.calculate_waiting(tiles_34, closed_tiles_34, open_sets_34):
             if waiting:
                 results.append(DiscardOption(player=self.player,
                                              shanten=shanten,
                                              tile_to_discard=hand_tile,
                                              waiting=waiting,
-                                             tiles_count=self.count_tiles(waiting, tiles_34)))
+                                             tiles_count=sum([live_tiles[x] for x in waiting])))
 
         if is_agari:
             shanten = Shanten.AGARI_STATE
@@ -167,17 +246,24 @@ class ImplementationAI(InterfaceAI):
 
         return results, shanten
 
-    def count_tiles(self, waiting, tiles_34):
-        n = 0
-        for item in waiting:
-            n += 4 - self.player.total_tiles(item, tiles_34)
-        return n
+    def count_live_tiles(self, tiles_34):
+        """
+        Count of not visible tiles for each tile (tiles that we can still draw)
+        :param tiles_34: our hand in 34 tiles format
+        :return: array in 34 tiles format
+        """
+        revealed_tiles = self.table.revealed_tiles
+        return [4 - tiles_34[x] - revealed_tiles[x] for x in range(0, 34)]
 
     def try_to_call_meld(self, tile, is_kamicha_discard):
         if not self.current_strategy:
             return None, None
 
-        meld, discard_option = self.current_strategy.try_to_call_meld(tile, is_kamicha_discard)
+        # answer could be prepared after our discard
+        is_found, meld, discard_option = self.calls.find_meld(tile, is_kamicha_discard)
+        if not is_found:
+            meld, discard_option = self.current_strategy.try_to_call_meld(tile, is_kamicha_discard)
+
         tile_to_discard = None
         if discard_option:
             self.last_discard_option = discard_option
@@ -258,6 +344,13 @@ class ImplementationAI(InterfaceAI):
                 if temp_tile.tiles_count - 2 < discard_option.tiles_count < temp_tile.tiles_count + 2:
                     possible_options.append(discard_option)
 
+            # tiles with almost the same count can give us different hand shape after the next draw,
+            # so let's keep only tiles with good shape (if we had enough time to check all of them)
+            second_counts = [x.second_tiles_count for x in possible_options]
+            if None not in second_counts:
+                best_count = max(second_counts)
+                possible_options = [x for x in possible_options if x.second_tiles_count >= best_count * 0.9]
+
             # let's sort got tiles by value and let's chose less valuable tile to discard
             possible_options = sorted(possible_options, key=lambda x: x.valuation)
             selected_tile = possible_options[0]
@@ -295,7 +388,7 @@ class ImplementationAI(InterfaceAI):
         if not tiles:
             tiles = self.player.tiles
 
-        tiles += [win_tile]
+        tiles = tiles + [win_tile]
 
         config = HandConfig(
             is_riichi=call_riichi,
@@ -361,6 +454,11 @@ class ImplementationAI(InterfaceAI):
             return None
 
         if open_kan:
+            # answer could be prepared after our discard
+            is_found, kan_type = self.calls.find_kan(tile)
+            if is_found:
+                return kan_type
+
             # we don't want to start open our hand from called kan
             if not self.player.is_open_hand:
                 return None
@@ -374,8 +472,8 @@ class ImplementationAI(InterfaceAI):
                 return None
 
         tile_34 = tile // 4
-        tiles_34 = TilesConverter.to_34_array(self.player.tiles)
-        closed_hand_34 = TilesConverter.to_34_array(self.player.closed_hand)
+        tiles_34 = self.player.tiles_34
+        closed_hand_34 = self.player.closed_hand_34
         pon_melds = [x for x in self.player.open_hand_34_tiles if is_pon(x)]
 
         # let's check can we upgrade opened pon to the kan
@@ -399,7 +497,7 @@ class ImplementationAI(InterfaceAI):
                 # we had do subtract drown tile
                 tiles_34[tile_34] -= 1
 
-            melds = self.player.open_hand_34_tiles
+            melds = list(self.player.open_hand_34_tiles)
             previous_shanten = self.shanten.calculate_shanten(tiles_34, melds)
 
             melds += [[tile_34, tile_34, tile_34]]
@@ -412,6 +510,11 @@ class ImplementationAI(InterfaceAI):
         return None
 
     def should_call_win(self, tile, enemy_seat):
+        # answer could be prepared after our discard
+        is_found, answer = self.calls.find_win(tile, enemy_seat)
+        if is_found:
+            return answer
+
         return True
 
     def enemy_called_riichi(self, enemy_seat):
@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-from mahjong.tile import TilesConverter
 from mahjong.utils import count_tiles_by_suits, is_honor, simplify
 
 from game.ai.first_version.strategies.main import BaseStrategy
@@ -21,7 +20,7 @@ class HonitsuStrategy(BaseStrategy):
         if not result:
             return False
 
-        tiles_34 = TilesConverter.to_34_array(self.player.tiles)
+        tiles_34 = self.player.tiles_34
         suits = count_tiles_by_suits(tiles_34)
 
         honor = [x for x in suits if x['name'] == 'honor'][0]
@@ -37,7 +37,7 @@ class BaseStrategy(object):
         if self.player.is_open_hand:
             return True
 
-        tiles_34 = TilesConverter.to_34_array(self.player.tiles)
+        tiles_34 = self.player.tiles_34
         count_of_pairs = len([x for x in range(0, 34) if tiles_34[x] >= 2])
 
         return count_of_pairs < 5
@@ -174,7 +174,7 @@ class BaseStrategy(object):
         if best_meld_34:
             # we need to calculate count of shanten with supposed meld
             # to prevent bad hand openings
-            melds = self.player.open_hand_34_tiles + [best_meld_34]
+            melds = list(self.player.open_hand_34_tiles) + [best_meld_34]
             outs_results, shanten = self.player.ai.calculate_outs(new_tiles, closed_hand, melds)
 
             # each strategy can use their own value to min shanten number
@@ -254,7 +254,7 @@ class BaseStrategy(object):
 
         results = []
         for meld in possible_melds:
-            melds = self.player.open_hand_34_tiles + [meld]
+            melds = list(self.player.open_hand_34_tiles) + [meld]
             shanten = self.player.ai.shanten.calculate_shanten(completed_hand_34, melds)
             results.append({'shanten': shanten, 'meld': meld})
 
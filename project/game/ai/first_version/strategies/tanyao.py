@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 from mahjong.constants import TERMINAL_INDICES, HONOR_INDICES
-from mahjong.tile import TilesConverter
 
 from game.ai.first_version.strategies.main import BaseStrategy
 
@@ -20,7 +19,7 @@ class TanyaoStrategy(BaseStrategy):
         if not result:
             return False
 
-        tiles = TilesConverter.to_34_array(self.player.tiles)
+        tiles = self.player.tiles_34
         count_of_terminal_pon_sets = 0
         count_of_terminal_pairs = 0
         count_of_valued_pairs = 0
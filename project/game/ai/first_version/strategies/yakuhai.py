@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 from mahjong.meld import Meld
-from mahjong.tile import TilesConverter
 
 from game.ai.first_version.strategies.main import BaseStrategy
 
@@ -16,7 +15,7 @@ class YakuhaiStrategy(BaseStrategy):
         if not result:
             return False
 
-        tiles_34 = TilesConverter.to_34_array(self.player.tiles)
+        tiles_34 = self.player.tiles_34
         valued_pairs = [x for x in self.player.valued_honors if tiles_34[x] >= 2]
 
         for pair in valued_pairs:
@@ -40,7 +39,7 @@ class YakuhaiStrategy(BaseStrategy):
         if tile_for_open_hand:
             tile_for_open_hand //= 4
 
-        tiles_34 = TilesConverter.to_34_array(self.player.tiles)
+        tiles_34 = self.player.tiles_34
         valued_pairs = [x for x in self.player.valued_honors if tiles_34[x] == 2]
 
         # when we trying to open hand with tempai state, we need to chose a valued pair waiting
@@ -75,7 +74,7 @@ class YakuhaiStrategy(BaseStrategy):
             return False
 
         tile //= 4
-        tiles_34 = TilesConverter.to_34_array(self.player.tiles)
+        tiles_34 = self.player.tiles_34
         valued_pairs = [x for x in self.player.valued_honors if tiles_34[x] == 2]
 
         for meld in self.player.melds:
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import itertools
+import logging
+import mmap
+import os
+import tempfile
+
+from game.ai.first_version.ukeire import UkeireCalculator
+
+logger = logging.getLogger('ai')
+
+
+class SuitTables(object):
+    """
+    Precalculated decompositions (see UkeireCalculator._decompose_suit) of all suits.
+
+    Tables are stored in the binary file and file is mapped to the memory,
+    so all bot processes on the host are sharing the same pages.
+
+    Each suit is stored as a record of five bytes, one byte for each count of melds.
+    High half of the byte is count of blocks without pair and low half is count of blocks with pair,
+    0xF means that there is no such decomposition
+    """
+    HEADER = b'SUIT\x01'
+    RECORD_SIZE = 5
+    COUNT_OF_SUITS = 5 ** 9
+    NOT_CALCULATED = b'\xff' * RECORD_SIZE
+
+    file_path = None
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+        with open(file_path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        expected_size = len(self.HEADER) + self.COUNT_OF_SUITS * self.RECORD_SIZE
+        if self._data[:len(self.HEADER)] != self.HEADER or len(self._data) != expected_size:
+            self._data.close()
+            raise ValueError('{} is not a suit tables file'.format(file_path))
+
+    @staticmethod
+    def load(file_path):
+        """
+        Map tables file to the memory, file will be generated if it doesn't exist
+        :param file_path: path to the tables file
+        :return: SuitTables
+        """
+        if not os.path.exists(file_path):
+            logger.info('Generating suit tables: {}'.format(file_path))
+            SuitTables.generate(file_path)
+
+        return SuitTables(file_path)
+
+    @staticmethod
+    def generate(file_path, max_tiles=14):
+        """
+        :param file_path: path to the new tables file
+        :param max_tiles: suits with more tiles will be not calculated
+        """
+        ukeire = UkeireCalculator()
+        data = bytearray(SuitTables.NOT_CALCULATED * SuitTables.COUNT_OF_SUITS)
+
+        for suit_tiles in itertools.product(range(0, 5), repeat=9):
+            if sum(suit_tiles) > max_tiles:
+                continue
+
+            offset = SuitTables._suit_index(suit_tiles) * SuitTables.RECORD_SIZE
+            options = ukeire._decompose_suit(list(suit_tiles))
+            data[offset:offset + SuitTables.RECORD_SIZE] = SuitTables._encode(options)
+
+        # other processes can load tables in the same time,
+        # so they should never see a partially written file
+        directory = os.path.dirname(os.path.abspath(file_path))
+        handle, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(handle, 'wb') as f:
+            f.write(SuitTables.HEADER)
+            f.write(data)
+        os.replace(temp_path, file_path)
+
+    def find_options(self, suit_tiles):
+        """
+        :param suit_tiles: list of 9 tiles counts
+        :return: tuple of (melds, has pair, count of pairs and tatsu) or None for not calculated suit
+        """
+        offset = len(self.HEADER) + self._suit_index(suit_tiles) * self.RECORD_SIZE
+        record = self._data[offset:offset + self.RECORD_SIZE]
+        if record == self.NOT_CALCULATED:
+            return None
+
+        return self._decode(record)
+
+    def close(self):
+        self._data.close()
+
+    @staticmethod
+    def _suit_index(suit_tiles):
+        index = 0
+        for count in suit_tiles:
+            index = index * 5 + count
+        return index
+
+    @staticmethod
+    def _encode(options):
+        record = bytearray(SuitTables.NOT_CALCULATED)
+        for melds, has_pair, blocks in options:
+            if has_pair:
+                record[melds] = (record[melds] & 0xF0) | blocks
+            else:
+                record[melds] = (blocks << 4) | (record[melds] & 0x0F)
+        return bytes(record)
+
+    @staticmethod
+    def _decode(record):
+        options = []
+        for melds in range(0, SuitTables.RECORD_SIZE):
+            without_pair = record[melds] >> 4
+            with_pair = record[melds] & 0x0F
+            if without_pair != 0xF:
+                options.append((melds, False, without_pair))
+            if with_pair != 0xF:
+                options.append((melds, True, with_pair))
+        return tuple(sorted(options))
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mahjong.agari import Agari
+from mahjong.hand_calculating.divider import HandDivider
+from mahjong.hand_calculating.hand import HandCalculator
+from mahjong.hand_calculating.hand_config import HandConfig
+from mahjong.shanten import Shanten
+from mahjong.tests_mixin import TestMixin
+
+from game.ai.first_version.cache import LRUCache, ShantenCache, AgariCache, pack_hand, HandValueCache, DividerCache
+from game.table import Table
+
+
+class LRUCacheTestCase(unittest.TestCase):
+
+    def test_remove_least_recently_used_item(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        self.assertEqual(cache.get('a'), 1)
+
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.misses, 1)
+
+
+class ShantenCacheTestCase(unittest.TestCase, TestMixin):
+
+    def test_pack_hand(self):
+        tiles = self._string_to_34_array(sou='111345677', pin='11', man='567')
+
+        self.assertEqual(pack_hand(tiles), pack_hand(tiles[:]))
+        self.assertNotEqual(pack_hand(tiles), pack_hand(tiles, [self._string_to_open_34_set(sou='111')]))
+        self.assertNotEqual(pack_hand(tiles, [self._string_to_open_34_set(sou='345')]),
+                            pack_hand(tiles, [self._string_to_open_34_set(sou='456')]))
+
+    def test_calculate_shanten(self):
+        shanten = ShantenCache(Shanten())
+
+        tiles = self._string_to_34_array(sou='111345677', pin='11', man='567')
+        self.assertEqual(shanten.calculate_shanten(tiles), 0)
+        self.assertEqual(shanten.calculate_shanten(tiles), 0)
+
+        open_sets = [self._string_to_open_34_set(sou='111')]
+        self.assertEqual(shanten.calculate_shanten(tiles, open_sets), 0)
+
+        self.assertEqual(shanten.hits, 1)
+        self.assertEqual(shanten.misses, 2)
+
+    def test_is_agari(self):
+        agari = AgariCache(Agari())
+
+        tiles = self._string_to_34_array(sou='123456789', pin='123', man='33')
+        self.assertTrue(agari.is_agari(tiles))
+
+        tiles = self._string_to_34_array(sou='123456789', pin='123', man='34')
+        self.assertFalse(agari.is_agari(tiles))
+        self.assertFalse(agari.is_agari(tiles))
+
+        self.assertEqual(agari.hits, 1)
+        self.assertEqual(agari.misses, 2)
+
+    def test_ai_uses_cached_results(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(man='13456', pin='2378', sou='4568', honors='5')
+        player.init_hand(tiles)
+
+        player.ai.calculate_outs(player.tiles, player.closed_hand, player.open_hand_34_tiles)
+        # caches are shared in the process, so other tests could fill them
+        shanten_hits = player.ai.shanten.hits
+        agari_hits = player.ai.agari.hits
+
+        # the same hand can be checked for different melds or for kan
+        player.ai.calculate_outs(player.tiles, player.closed_hand, player.open_hand_34_tiles)
+        self.assertEqual(player.ai.shanten.hits, shanten_hits + 1)
+        self.assertEqual(player.ai.agari.hits, agari_hits + 1)
+
+    def test_bots_share_caches(self):
+        first_player = Table().player
+        second_player = Table().player
+
+        self.assertIs(first_player.ai.shanten, second_player.ai.shanten)
+        self.assertIs(first_player.ai.finished_hand, second_player.ai.finished_hand)
+        self.assertIs(first_player.ai.lookahead.cache, second_player.ai.lookahead.cache)
+        self.assertIsNot(first_player.ai.calls, second_player.ai.calls)
+
+
+class HandValueCacheTestCase(unittest.TestCase, TestMixin):
+
+    def test_estimate_hand_value(self):
+        calculator = HandValueCache(HandCalculator())
+
+        tiles = self._string_to_136_array(sou='123444', man='234456', pin='66')
+        win_tile = self._string_to_136_tile(sou='4')
+
+        result = calculator.estimate_hand_value(tiles, win_tile, config=HandConfig(is_riichi=True))
+        self.assertEqual(result.han, 1)
+
+        result = calculator.estimate_hand_value(list(reversed(tiles)), win_tile, config=HandConfig(is_riichi=True))
+        self.assertEqual(result.han, 1)
+        self.assertEqual(calculator.hits, 1)
+
+        # different rules
+        result = calculator.estimate_hand_value(tiles, win_tile, config=HandConfig(is_riichi=False))
+        self.assertNotEqual(result.error, None)
+
+        # new dora indicator
+        dora_indicators = [self._string_to_136_tile(pin='5')]
+        result = calculator.estimate_hand_value(tiles, win_tile, dora_indicators=dora_indicators,
+                                                config=HandConfig(is_riichi=True))
+        self.assertEqual(result.han, 3)
+        self.assertEqual(calculator.misses, 3)
+
+    def test_ai_uses_cached_hand_values(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(sou='123444', man='234456', pin='6')
+        player.init_hand(tiles)
+
+        win_tile = self._string_to_34_tile(pin='6')
+        first = player.ai.estimate_hand_value(win_tile, call_riichi=True)
+        # cache is shared by all bots of the process, so other tests could fill it
+        hits = player.ai.finished_hand.hits
+        second = player.ai.estimate_hand_value(win_tile, call_riichi=True)
+
+        self.assertEqual(first.han, second.han)
+        self.assertEqual(player.ai.finished_hand.hits - hits, 1)
+        # player hand wasn't changed
+        self.assertEqual(len(player.tiles), 13)
+
+
+class DividerCacheTestCase(unittest.TestCase, TestMixin):
+
+    def test_divide_hand(self):
+        divider = DividerCache(HandDivider())
+
+        tiles = self._string_to_34_array(sou='123444', man='234456', pin='66')
+        first = divider.divide_hand(tiles)
+        second = divider.divide_hand(tiles)
+        self.assertEqual(first, HandDivider().divide_hand(tiles))
+        self.assertEqual(first, second)
+
+        # results are not shared
+        first[0][0].remove(1)
+        self.assertEqual(divider.divide_hand(tiles), second)
+
+        self.assertEqual(divider.hits, 2)
+        self.assertEqual(divider.misses, 1)
+
+    def test_find_valid_combinations(self):
+        divider = DividerCache(HandDivider())
+
+        tiles = self._string_to_34_array(sou='123444', man='234456', pin='66')
+        result = divider.find_valid_combinations(tiles, 18, 26, True)
+        self.assertEqual(result, HandDivider().find_valid_combinations(tiles, 18, 26, True))
+
+        divider.find_valid_combinations(tiles, 18, 26, True)
+        divider.find_valid_combinations(tiles, 18, 22, True)
+
+        self.assertEqual(divider.hits, 1)
+        self.assertEqual(divider.misses, 2)
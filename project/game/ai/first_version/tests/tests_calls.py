@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mahjong.meld import Meld
+from mahjong.tests_mixin import TestMixin
+
+from game.table import Table
+
+
+class CallsTableTestCase(unittest.TestCase, TestMixin):
+
+    def test_prepared_answers(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(sou='1689', pin='2358', man='1', honors='4455')
+        player.init_hand(tiles)
+        list(player.prepare_calls())
+
+        tile = self._string_to_136_tile(honors='4')
+        is_found, meld, discard_option = player.ai.calls.find_meld(tile, False)
+        self.assertTrue(is_found)
+        self.assertEqual(meld.type, Meld.PON)
+        self.assertEqual(self._to_string(meld.tiles), '444z')
+        self.assertTrue(tile in meld.tiles)
+
+        # the same answer as without prepared table
+        expected_meld, expected_tile = player.ai.current_strategy.try_to_call_meld(tile, False)
+        self.assertEqual(meld.tiles, sorted(expected_meld.tiles))
+        self.assertEqual(discard_option.tile_to_discard, expected_tile.tile_to_discard)
+
+        meld, tile_to_discard = player.try_to_call_meld(tile, False)
+        self.assertEqual(self._to_string(meld.tiles), '444z')
+        self.assertEqual(tile_to_discard, discard_option.tile_to_discard)
+
+        # we can't call this tile
+        is_found, meld, _ = player.ai.calls.find_meld(self._string_to_136_tile(sou='4'), False)
+        self.assertTrue(is_found)
+        self.assertEqual(meld, None)
+
+    def test_prepared_answers_invalidation(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(sou='1689', pin='2358', man='1', honors='4455')
+        player.init_hand(tiles)
+        list(player.prepare_calls())
+
+        tile = self._string_to_136_tile(honors='4')
+        self.assertTrue(player.ai.calls.find_meld(tile, False)[0])
+
+        table.add_dora_indicator(self._string_to_136_tile(man='9'))
+        self.assertFalse(player.ai.calls.find_meld(tile, False)[0])
+
+        list(player.prepare_calls())
+        self.assertTrue(player.ai.calls.find_meld(tile, False)[0])
+
+        table.add_called_riichi(2)
+        self.assertFalse(player.ai.calls.find_meld(tile, False)[0])
+
+        list(player.prepare_calls())
+        player.draw_tile(self._string_to_136_tile(man='2'))
+        self.assertFalse(player.ai.calls.find_meld(tile, False)[0])
+
+    def test_prepared_win_answers(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(sou='123456', pin='12345', man='11')
+        player.init_hand(tiles)
+        list(player.prepare_calls())
+
+        tile = self._string_to_136_tile(pin='3')
+        self.assertEqual(player.ai.calls.find_win(tile, 2), (True, True))
+        self.assertEqual(player.should_call_win(tile, 2), True)
+
+    def test_partly_prepared_answers(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(sou='1689', pin='2358', man='1', honors='4455')
+        player.init_hand(tiles)
+
+        # preparation was stopped after the first step
+        steps = player.prepare_calls()
+        next(steps)
+
+        self.assertTrue(player.ai.calls.find_meld(self._string_to_136_tile(man='1'), False)[0])
+        self.assertFalse(player.ai.calls.find_meld(self._string_to_136_tile(honors='4'), False)[0])
+
+        # not prepared answer is calculated on the call
+        meld, _ = player.try_to_call_meld(self._string_to_136_tile(honors='4'), False)
+        self.assertEqual(self._to_string(meld.tiles), '444z')
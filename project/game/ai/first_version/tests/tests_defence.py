@@ -159,6 +159,42 @@ class DefenceTestCase(unittest.TestCase, TestMixin):
         result = table.player.discard_tile()
         self.assertEqual(self._to_string([result]), '8m')
 
+    def test_fold_tempai_hand_when_we_will_not_draw_a_win(self):
+        table = self._make_open_tempai_table(count_of_remaining_tiles=3)
+        selected_tile = self._select_discard_option(table)
+
+        # there are no our draws in the wall, so only the deal-in risk is left
+        estimation = table.player.ai.estimator.estimate([selected_tile.tile_to_discard])[0]
+        self.assertEqual(estimation.win, 0)
+        self.assertTrue(estimation.deal_in > 0)
+        self.assertEqual(table.player.ai.defence.should_go_to_defence_mode(selected_tile), True)
+
+        table = self._make_open_tempai_table(count_of_remaining_tiles=60)
+        selected_tile = self._select_discard_option(table)
+        self.assertEqual(table.player.ai.defence.should_go_to_defence_mode(selected_tile), False)
+
+    def test_fold_closed_tempai_hand_with_small_win_chance(self):
+        table = self._make_closed_tempai_table(sou='11223', pin='234678', man='55')
+        selected_tile = self._select_discard_option(table)
+
+        # hand is expensive enough, but penchan wait is bad
+        estimation = table.player.ai.estimator.estimate([selected_tile.tile_to_discard])[0]
+        self.assertTrue(estimation.win < table.player.ai.defence.MIN_WIN_CHANCE)
+        self.assertEqual(table.player.ai.defence.should_go_to_defence_mode(selected_tile), True)
+
+        table = self._make_closed_tempai_table(sou='123789', pin='23467', man='55')
+        selected_tile = self._select_discard_option(table)
+        self.assertEqual(table.player.ai.defence.should_go_to_defence_mode(selected_tile), False)
+
+    def test_use_count_of_waits_when_estimation_has_no_samples(self):
+        table = self._make_closed_tempai_table(sou='123789', pin='23467', man='55')
+        table.player.ai.estimator.time_limit = 0
+        selected_tile = self._select_discard_option(table)
+
+        self.assertIsNone(table.player.ai.defence._estimate_discard_against_riichi(
+            selected_tile, table.player.ai.defence._get_threatening_players()))
+        self.assertEqual(table.player.ai.defence.should_go_to_defence_mode(selected_tile), False)
+
     def test_find_common_safe_tile_to_discard(self):
         table = Table()
 
@@ -445,3 +481,43 @@ class DefenceTestCase(unittest.TestCase, TestMixin):
         result = table.player.discard_tile()
 
         self.assertEqual(self._to_string([result]), '3p')
+
+    def _make_open_tempai_table(self, count_of_remaining_tiles):
+        table = Table()
+        table.has_aka_dora = True
+        table.count_of_remaining_tiles = count_of_remaining_tiles
+
+        tiles = self._string_to_136_array(sou='2223457899', honors='666')
+        table.player.init_hand(tiles)
+        table.player.draw_tile(self._string_to_136_tile(man='8'))
+        table.player.add_called_meld(self._make_meld(Meld.PON, sou='222'))
+        table.player.add_called_meld(self._make_meld(Meld.PON, honors='666'))
+
+        table.add_called_riichi(3)
+        self._fix_estimator(table)
+        return table
+
+    def _make_closed_tempai_table(self, sou, pin, man):
+        table = Table()
+        table.has_aka_dora = True
+        table.count_of_remaining_tiles = 60
+
+        tiles = self._string_to_136_array(sou=sou, pin=pin, man=man)
+        table.player.init_hand(tiles)
+        table.player.draw_tile(self._string_to_136_tile(man='9'))
+
+        table.add_called_riichi(3)
+        self._fix_estimator(table)
+        return table
+
+    def _fix_estimator(self, table):
+        estimator = table.player.ai.estimator
+        estimator.seed = 1
+        # all samples should be played on the slow machine
+        estimator.time_limit = 10
+
+    def _select_discard_option(self, table):
+        results, shanten = table.player.ai.calculate_outs(table.player.tiles,
+                                                          table.player.closed_hand,
+                                                          table.player.open_hand_34_tiles)
+        return table.player.ai.process_discard_options_and_select_tile_to_discard(results, shanten)
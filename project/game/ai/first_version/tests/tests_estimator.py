@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mahjong.tests_mixin import TestMixin
+
+from game.ai.first_version.estimator import WinEstimator
+from game.table import Table
+
+
+class WinEstimatorTestCase(unittest.TestCase, TestMixin):
+
+    def test_estimate_discards(self):
+        table = Table()
+        table.count_of_remaining_tiles = 60
+        player = table.player
+
+        tiles = self._string_to_136_array(man='123456789', sou='167', honors='77')
+        player.init_hand(tiles)
+
+        estimator = WinEstimator(player, samples=50, seed=1)
+        sou_one, honor = self._string_to_34_tile(sou='1'), self._string_to_34_tile(honors='7')
+        results = estimator.estimate([sou_one, honor])
+
+        self.assertEqual(results[0].samples, 50)
+        # we are in tempai after 1s discard
+        self.assertEqual(results[0].tempai, 1)
+        self.assertTrue(results[0].win > results[1].win)
+        # no one is in riichi
+        self.assertEqual(results[0].deal_in, 0)
+
+    def test_estimations_with_fixed_seed_are_the_same(self):
+        table = Table()
+        table.count_of_remaining_tiles = 60
+        table.add_called_riichi(1)
+        player = table.player
+
+        tiles = self._string_to_136_array(man='13456', pin='2378', sou='4568', honors='5')
+        player.init_hand(tiles)
+        discard_tiles = sorted(set([x // 4 for x in tiles]))
+
+        first = WinEstimator(player, samples=20, time_limit=10, seed=5).estimate(discard_tiles)
+        second = WinEstimator(player, samples=20, time_limit=10, seed=5).estimate(discard_tiles)
+
+        self.assertEqual([(x.tempai, x.win, x.deal_in) for x in first],
+                         [(x.tempai, x.win, x.deal_in) for x in second])
+
+    def test_estimation_stops_when_time_is_over(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(man='13456', pin='2378', sou='4568', honors='5')
+        player.init_hand(tiles)
+
+        estimator = WinEstimator(player, samples=1000, time_limit=0)
+        results = estimator.estimate([self._string_to_34_tile(honors='5')])
+
+        self.assertEqual(results[0].samples, 0)
+        self.assertEqual(results[0].win, 0)
+
+    def test_worker_processes_are_shared_by_estimators(self):
+        first = Table().player.ai.estimator
+        second = Table().player.ai.estimator
+
+        executor = first.get_executor(2)
+        self.assertIs(second.get_executor(2), executor)
+        self.assertIs(second.get_executor(1), executor)
+
+        WinEstimator.shutdown_executor()
+
+        self.assertIsNone(WinEstimator._executor)
+        self.assertRaises(RuntimeError, executor.submit, len, [])
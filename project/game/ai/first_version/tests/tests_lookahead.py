@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mahjong.tests_mixin import TestMixin
+
+from game.ai.first_version.lookahead import DiscardLookahead
+from game.ai.first_version.ukeire import UkeireCalculator
+from game.table import Table
+
+
+class DiscardLookaheadTestCase(unittest.TestCase, TestMixin):
+
+    def test_evaluate_discard_options(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(man='13456', pin='2378', sou='4568', honors='5')
+        player.init_hand(tiles)
+
+        results, shanten = player.ai.calculate_outs(tiles, tiles)
+        tiles_34 = self._to_34_array(tiles)
+        live_tiles = player.ai.count_live_tiles(tiles_34)
+
+        lookahead = DiscardLookahead(UkeireCalculator(), time_budget=10)
+        evaluated = lookahead.evaluate(results, tiles_34, tiles_34, [], live_tiles)
+
+        best_shanten = min([x.shanten for x in results])
+        best_results = [x for x in results if x.shanten == best_shanten]
+        self.assertEqual(evaluated, len(best_results))
+
+        for result in results:
+            if result.shanten == best_shanten:
+                self.assertTrue(result.second_tiles_count > 0)
+            else:
+                self.assertEqual(result.second_tiles_count, None)
+
+        # visible tiles were not changed by the evaluation
+        self.assertEqual(live_tiles, player.ai.count_live_tiles(tiles_34))
+
+    def test_evaluation_stops_when_time_is_over(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(man='13456', pin='2378', sou='4568', honors='5')
+        player.init_hand(tiles)
+
+        results, shanten = player.ai.calculate_outs(tiles, tiles)
+        tiles_34 = self._to_34_array(tiles)
+
+        lookahead = DiscardLookahead(UkeireCalculator(), time_budget=0)
+        evaluated = lookahead.evaluate(results, tiles_34, tiles_34, [], player.ai.count_live_tiles(tiles_34))
+
+        self.assertEqual(evaluated, 0)
+        self.assertEqual([x for x in results if x.second_tiles_count is not None], [])
+
+    def test_skip_evaluation_in_tempai(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(man='123456789', sou='167', honors='77')
+        player.init_hand(tiles)
+
+        results, shanten = player.ai.calculate_outs(tiles, tiles)
+        tiles_34 = self._to_34_array(tiles)
+
+        lookahead = DiscardLookahead(UkeireCalculator(), time_budget=10)
+        evaluated = lookahead.evaluate(results, tiles_34, tiles_34, [], player.ai.count_live_tiles(tiles_34))
+
+        self.assertEqual(evaluated, 0)
+
+    def test_lookahead_is_disabled_by_default(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(man='13456', pin='2378', sou='4568', honors='5')
+        player.init_hand(tiles)
+
+        results, shanten = player.ai.calculate_outs(tiles, tiles)
+        tiles_34 = self._to_34_array(tiles)
+
+        lookahead = DiscardLookahead(UkeireCalculator())
+        evaluated = lookahead.evaluate(results, tiles_34, tiles_34, [], player.ai.count_live_tiles(tiles_34))
+
+        self.assertEqual(evaluated, 0)
+
+    def test_prepared_discards(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(man='13456', pin='2378', sou='4568')
+        player.init_hand(tiles)
+        player.ai.lookahead.time_budget = 10
+
+        steps = len(list(player.prepare_discards()))
+        self.assertTrue(steps > 0)
+
+        outs_misses = player.ai.outs.misses
+        lookahead_misses = player.ai.lookahead.cache.misses
+
+        player.draw_tile(self._string_to_136_tile(honors='5'))
+        player.discard_tile()
+
+        # everything was calculated before the draw
+        self.assertEqual(player.ai.outs.misses, outs_misses)
+        self.assertEqual(player.ai.lookahead.cache.misses, lookahead_misses)
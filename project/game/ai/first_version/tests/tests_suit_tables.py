@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+from mahjong.tests_mixin import TestMixin
+
+from game.ai.first_version.cache import LRUCache
+from game.ai.first_version.suit_tables import SuitTables
+from game.ai.first_version.ukeire import UkeireCalculator
+
+
+class SuitTablesTestCase(unittest.TestCase, TestMixin):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.file_path = os.path.join(cls.directory, 'suits.bin')
+        SuitTables.generate(cls.file_path, max_tiles=5)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_find_options(self):
+        ukeire = UkeireCalculator()
+        tables = SuitTables.load(self.file_path)
+
+        suits = [
+            [0, 0, 0, 0, 0, 0, 0, 0, 0],
+            [1, 1, 1, 0, 0, 0, 0, 0, 2],
+            [0, 3, 0, 0, 1, 1, 0, 0, 0],
+            [4, 1, 0, 0, 0, 0, 0, 0, 0],
+        ]
+        for suit_tiles in suits:
+            self.assertEqual(tables.find_options(suit_tiles), ukeire._decompose_suit(suit_tiles))
+
+        # suits with more tiles were not calculated
+        self.assertEqual(tables.find_options([1, 1, 1, 1, 1, 1, 0, 0, 0]), None)
+
+        tables.close()
+
+    def test_load_wrong_file(self):
+        file_path = os.path.join(self.directory, 'wrong.bin')
+        with open(file_path, 'wb') as f:
+            f.write(b'something')
+
+        self.assertRaises(ValueError, SuitTables.load, file_path)
+
+    def test_calculate_shanten_with_tables(self):
+        tables = SuitTables.load(self.file_path)
+        UkeireCalculator.suit_options.clear()
+        UkeireCalculator.suit_tables = tables
+
+        try:
+            ukeire = UkeireCalculator()
+            tiles = self._string_to_34_array(sou='111345677', pin='11', man='567')
+            self.assertEqual(ukeire.calculate_shanten(tiles), 0)
+        finally:
+            UkeireCalculator.suit_options.clear()
+            UkeireCalculator.suit_tables = None
+            tables.close()
+
+    def test_decoded_suits_cache_is_limited(self):
+        tables = SuitTables.load(self.file_path)
+        suit_options = UkeireCalculator.suit_options
+        UkeireCalculator.suit_options = LRUCache(2)
+        UkeireCalculator.suit_tables = tables
+
+        try:
+            ukeire = UkeireCalculator()
+            tiles = self._string_to_34_array(sou='111345677', pin='11', man='567')
+            self.assertEqual(ukeire.calculate_shanten(tiles), 0)
+            self.assertEqual(len(UkeireCalculator.suit_options), 2)
+        finally:
+            UkeireCalculator.suit_options = suit_options
+            UkeireCalculator.suit_tables = None
+            tables.close()
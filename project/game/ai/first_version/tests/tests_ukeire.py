@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mahjong.shanten import Shanten
+from mahjong.tests_mixin import TestMixin
+
+from game.ai.first_version.ukeire import UkeireCalculator
+
+
+class UkeireCalculatorTestCase(unittest.TestCase, TestMixin):
+
+    def test_calculate_shanten(self):
+        ukeire = UkeireCalculator()
+
+        tiles = self._string_to_34_array(sou='111234567', pin='11', man='567')
+        self.assertEqual(ukeire.calculate_shanten(tiles), Shanten.AGARI_STATE)
+
+        tiles = self._string_to_34_array(sou='111345677', pin='11', man='567')
+        self.assertEqual(ukeire.calculate_shanten(tiles), 0)
+
+        tiles = self._string_to_34_array(sou='11', pin='1199', man='1199', honors='115')
+        self.assertEqual(ukeire.calculate_shanten(tiles), 0)
+
+        tiles = self._string_to_34_array(sou='19', pin='19', man='199', honors='1234567')
+        self.assertEqual(ukeire.calculate_shanten(tiles), Shanten.AGARI_STATE)
+
+    def test_calculate_shanten_with_open_sets(self):
+        ukeire = UkeireCalculator()
+
+        tiles = self._string_to_34_array(sou='111345677', pin='11', man='567')
+        open_sets = [self._string_to_open_34_set(sou='111')]
+        self.assertEqual(ukeire.calculate_shanten(tiles, open_sets), 0)
+
+        # all honor tiles are in the hand,
+        # so there are no free slots to replace open sets
+        tiles = self._string_to_34_array(sou='1112', honors='1234567')
+        open_sets = [self._string_to_open_34_set(sou='111')]
+        self.assertEqual(ukeire.calculate_shanten(tiles, open_sets),
+                         Shanten().calculate_shanten(tiles, open_sets))
+
+    def test_calculate_waiting(self):
+        ukeire = UkeireCalculator()
+
+        tiles = self._string_to_34_array(man='123456789', sou='167', honors='77')
+        results = ukeire.calculate_waiting(tiles, tiles)
+        result = [x for x in results if x[0] == self._string_to_34_tile(sou='1')][0]
+        self.assertEqual(result[1], 0)
+        self.assertEqual(result[2], [self._string_to_34_tile(sou='5'), self._string_to_34_tile(sou='8')])
+
+    def test_calculate_waiting_is_the_same_as_shanten_loop(self):
+        ukeire = UkeireCalculator()
+
+        hands = [
+            [self._string_to_34_array(man='2345', pin='3445678', honors='15'), None],
+            [self._string_to_34_array(man='1111', pin='2256', sou='45', honors='555'), None],
+            [self._string_to_34_array(man='1111234', pin='2256', sou='455'), None],
+            [self._string_to_34_array(pin='22', sou='1133', man='1199', honors='6677'), None],
+            [self._string_to_34_array(man='55567', pin='234', sou='111', honors='7777'), None],
+            [self._string_to_34_array(man='33356', pin='2345', sou='666', honors='1'),
+             [self._string_to_open_34_set(sou='666')]],
+        ]
+
+        for tiles, open_sets in hands:
+            self.assertEqual(ukeire.calculate_waiting(tiles, tiles, open_sets),
+                             self._calculate_waiting_with_shanten(tiles, open_sets))
+
+    def _calculate_waiting_with_shanten(self, tiles_34, open_sets_34):
+        shanten = Shanten()
+        tiles_34 = tiles_34[:]
+
+        results = []
+        for hand_tile in range(0, 34):
+            if not tiles_34[hand_tile]:
+                continue
+
+            tiles_34[hand_tile] -= 1
+            hand_shanten = shanten.calculate_shanten(tiles_34, open_sets_34)
+
+            waiting = []
+            for j in range(0, 34):
+                if hand_tile == j or tiles_34[j] == 4:
+                    continue
+
+                tiles_34[j] += 1
+                if shanten.calculate_shanten(tiles_34, open_sets_34) == hand_shanten - 1:
+                    waiting.append(j)
+                tiles_34[j] -= 1
+
+            tiles_34[hand_tile] += 1
+            results.append((hand_tile, hand_shanten, waiting))
+
+        return results
@@ -0,0 +1,516 @@
+# -*- coding: utf-8 -*-
+from mahjong.constants import HONOR_INDICES, TERMINAL_INDICES
+from mahjong.shanten import Shanten
+
+from game.ai.first_version.cache import LRUCache
+
+TERMINAL_AND_HONOR_INDICES = TERMINAL_INDICES + HONOR_INDICES
+# options of the suit without tiles
+EMPTY_SUIT = ((0, False, 0),)
+
+
+class UkeireCalculator(object):
+    """
+    Shanten and uke-ire (tiles that will improve the hand) calculation.
+
+    It returns the same numbers as mahjong.shanten.Shanten, but the hand is split to three suits
+    and honors. All possible (melds, pair, blocks) combinations of one suit are calculated once
+    and cached, so for each discard or draw candidate we need to rebuild only one suit.
+
+    Shanten has special rules for honor kans and for hands without pair,
+    when there is no way to be sure about the result we are using it directly
+    """
+    # hands of one game are using a few thousands of suits
+    SUIT_OPTIONS_CACHE_SIZE = 20000
+
+    # suit counts tuple -> tuple of (melds, has pair, count of pairs and tatsu)
+    # decompositions don't depend on the player, so we can share them between instances.
+    # With suit tables it keeps decoded records of the recently used suits
+    suit_options = LRUCache(SUIT_OPTIONS_CACHE_SIZE)
+    # optional precalculated decompositions (SuitTables)
+    suit_tables = None
+
+    shanten = None
+
+    def __init__(self):
+        self.shanten = Shanten()
+
+    def calculate_shanten(self, tiles_34, open_sets_34=None):
+        """
+        Return the count of tiles before tempai
+        :param tiles_34: 34 tiles format array
+        :param open_sets_34: array of array of 34 tiles format
+        :return: int
+        """
+        count_of_tiles = sum(tiles_34)
+        if count_of_tiles > 14:
+            return -2
+
+        closed_tiles_34 = self._remove_open_sets(tiles_34, open_sets_34)
+        if closed_tiles_34 is None:
+            return self.shanten.calculate_shanten(tiles_34, open_sets_34)
+
+        suits = [self._find_suit_options(closed_tiles_34[x:x + 9]) for x in (0, 9, 18)]
+        honors_melds, honors_pairs = self._count_honors(closed_tiles_34)
+        count_of_melds = (14 - count_of_tiles) // 3 + honors_melds + (open_sets_34 and len(open_sets_34) or 0)
+
+        min_shanten = 8
+        if not open_sets_34:
+            min_shanten = self._calculate_chitoitsu_and_kokushi(closed_tiles_34)
+
+        shanten = self._calculate_regular(self._merge(suits[0], suits[1]), suits[2],
+                                          count_of_melds, honors_pairs, min_shanten, 4 in closed_tiles_34)
+        if shanten is None:
+            return self.shanten.calculate_shanten(tiles_34, open_sets_34)
+
+        return shanten
+
+    def calculate_waiting(self, tiles_34, closed_tiles_34, open_sets_34=None, max_shanten=None):
+        """
+        For each tile in the closed hand calculate shanten after its discard
+        and tiles that will decrease this shanten
+
+        :param tiles_34: 34 tiles format array, hand with drawn tile
+        :param closed_tiles_34: 34 tiles format array, tiles that can be discarded
+        :param open_sets_34: array of array of 34 tiles format
+        :param max_shanten: waiting will be not calculated for discards with bigger shanten
+        :return: list of (tile to discard, shanten, waiting) tuples
+        """
+        tiles_34 = tiles_34[:]
+
+        # all candidates differ from the hand only in one or two suits,
+        # so merged suits and shanten tables for them are shared between candidates
+        merges = {}
+        tables = {}
+
+        results = []
+        for hand_tile in range(0, 34):
+            if not closed_tiles_34[hand_tile]:
+                continue
+
+            tiles_34[hand_tile] -= 1
+            shanten = self.calculate_shanten(tiles_34, open_sets_34)
+            if max_shanten is not None and shanten > max_shanten:
+                waiting = []
+            else:
+                waiting = self._find_waiting(tiles_34, hand_tile, shanten, open_sets_34, merges, tables)
+            tiles_34[hand_tile] += 1
+
+            results.append((hand_tile, shanten, waiting))
+
+        return results
+
+    def find_waiting(self, tiles_34, open_sets_34=None):
+        """
+        Shanten of the hand without drawn tile and tiles that will decrease it
+        :param tiles_34: 34 tiles format array
+        :param open_sets_34: array of array of 34 tiles format
+        :return: shanten and list of waiting tiles
+        """
+        shanten = self.calculate_shanten(tiles_34, open_sets_34)
+        return shanten, self._find_waiting(tiles_34, None, shanten, open_sets_34)
+
+    def _find_waiting(self, tiles_34, discarded_tile, shanten, open_sets_34, merges=None, tables=None):
+        """
+        All tiles that will decrease shanten number of the hand
+        """
+        merges = merges if merges is not None else {}
+        tables = tables if tables is not None else {}
+
+        count_of_tiles = sum(tiles_34) + 1
+        closed_tiles_34 = self._remove_open_sets(tiles_34, open_sets_34)
+
+        # we can't use suits cache for this hand
+        if closed_tiles_34 is None or count_of_tiles > 14:
+            waiting = []
+            for tile in range(0, 34):
+                if tile == discarded_tile or tiles_34[tile] == 4:
+                    continue
+
+                tiles_34[tile] += 1
+                if self.calculate_shanten(tiles_34, open_sets_34) == shanten - 1:
+                    waiting.append(tile)
+                tiles_34[tile] -= 1
+            return waiting
+
+        count_of_open_sets = open_sets_34 and len(open_sets_34) or 0
+        count_of_melds = (14 - count_of_tiles) // 3 + count_of_open_sets
+        free_honors = len([x for x in HONOR_INDICES if not tiles_34[x]])
+        has_kan_tiles = 4 in closed_tiles_34
+
+        suits = [self._find_suit_options(closed_tiles_34[x:x + 9]) for x in (0, 9, 18)]
+        honors_melds, honors_pairs = self._count_honors(closed_tiles_34)
+
+        # other suits combinations for the suit where new tile will be
+        rest_by_suit = [
+            self._merge_with_cache(suits[1], suits[2], merges),
+            self._merge_with_cache(suits[0], suits[2], merges),
+            self._merge_with_cache(suits[0], suits[1], merges),
+        ]
+        all_suits = self._merge_with_cache(rest_by_suit[0], suits[0], merges)
+
+        chitoitsu_state = None
+        if not count_of_open_sets:
+            chitoitsu_state = self._chitoitsu_and_kokushi_state(closed_tiles_34)
+
+        waiting = []
+        for tile in range(0, 34):
+            if tile == discarded_tile or tiles_34[tile] == 4:
+                continue
+
+            new_shanten = None
+            is_honor_tile = tile >= 27
+
+            # open sets are replaced with honor pon sets (see Shanten.calculate_shanten)
+            # and new honor tile can take one of free slots for them
+            free_slots = free_honors - (is_honor_tile and not tiles_34[tile] and 1 or 0)
+            is_honor_kan = is_honor_tile and closed_tiles_34[tile] == 3
+
+            if free_slots >= count_of_open_sets and not is_honor_kan:
+                min_shanten = 8
+                if chitoitsu_state:
+                    min_shanten = self._chitoitsu_and_kokushi_with_tile(chitoitsu_state, closed_tiles_34, tile)
+
+                if is_honor_tile:
+                    new_count = closed_tiles_34[tile] + 1
+                    melds = honors_melds + (new_count == 3 and 1 or 0)
+                    pairs = honors_pairs + (new_count == 2 and 1 or 0) - (new_count == 3 and 1 or 0)
+                    new_shanten = self._calculate_regular_with_table(all_suits, EMPTY_SUIT, count_of_melds + melds,
+                                                                     pairs, min_shanten, has_kan_tiles, tables)
+                else:
+                    suit = tile // 9
+                    first_index = suit * 9
+                    suit_tiles = closed_tiles_34[first_index:first_index + 9]
+                    suit_tiles[tile - first_index] += 1
+                    is_kan = has_kan_tiles or closed_tiles_34[tile] == 3
+                    new_shanten = self._calculate_regular_with_table(self._find_suit_options(suit_tiles),
+                                                                     rest_by_suit[suit],
+                                                                     count_of_melds + honors_melds, honors_pairs,
+                                                                     min_shanten, is_kan, tables)
+
+            if new_shanten is None:
+                tiles_34[tile] += 1
+                new_shanten = self.calculate_shanten(tiles_34, open_sets_34)
+                tiles_34[tile] -= 1
+
+            if new_shanten == shanten - 1:
+                waiting.append(tile)
+
+        return waiting
+
+    def _remove_open_sets(self, tiles_34, open_sets_34):
+        """
+        Return closed part of the hand or None if the hand should be calculated by Shanten
+        """
+        closed_tiles_34 = tiles_34[:]
+        if open_sets_34:
+            # Shanten replaces open sets with pon sets of not used tiles,
+            # we are doing the same when there are enough free honor tiles
+            free_honors = len([x for x in HONOR_INDICES if not tiles_34[x]])
+            if free_honors < len(open_sets_34):
+                return None
+
+            for meld in open_sets_34:
+                closed_tiles_34[meld[0]] -= 1
+                closed_tiles_34[meld[1]] -= 1
+                closed_tiles_34[meld[2]] -= 1
+
+        if min(closed_tiles_34) < 0 or max(closed_tiles_34[27:]) > 3:
+            return None
+
+        return closed_tiles_34
+
+    def _calculate_regular(self, first, second, count_of_melds, count_of_pairs, min_shanten, has_kan_tiles):
+        """
+        Shanten for combinations of suits options.
+
+        With four same tiles in the suit, Shanten can add one more shanten for a hand without pair,
+        in that case we return None and hand should be calculated by Shanten
+        """
+        with_pair, without_pair = self._find_regular_shanten(first, second, count_of_melds, count_of_pairs)
+        return self._choose_regular_shanten(with_pair, without_pair, min_shanten, has_kan_tiles)
+
+    def _calculate_regular_with_table(self, first, second, count_of_melds, count_of_pairs, min_shanten,
+                                      has_kan_tiles, tables):
+        """
+        The same as _calculate_regular, but results for each option of the first suit are stored in tables,
+        so the second suit options are checked only once for all candidates
+        """
+        key = (second, count_of_melds, count_of_pairs)
+        table = tables.get(key)
+        if table is None:
+            table = tables[key] = {}
+
+        with_pair = 8
+        without_pair = 8
+        for option in first:
+            result = table.get(option)
+            if result is None:
+                result = table[option] = self._find_regular_shanten((option,), second, count_of_melds,
+                                                                    count_of_pairs)
+
+            if result[0] < with_pair:
+                with_pair = result[0]
+            if result[1] < without_pair:
+                without_pair = result[1]
+
+        return self._choose_regular_shanten(with_pair, without_pair, min_shanten, has_kan_tiles)
+
+    def _find_regular_shanten(self, first, second, count_of_melds, count_of_pairs):
+        """
+        :return: best shanten with pair and best shanten without pair
+        """
+        with_pair = 8
+        without_pair = 8
+        for first_melds, first_pair, first_blocks in first:
+            for second_melds, second_pair, second_blocks in second:
+                melds = count_of_melds + first_melds + second_melds
+                blocks = count_of_pairs + first_blocks + second_blocks
+
+                # only one pair can be used as a pair, other pairs are tatsu
+                if count_of_pairs or first_pair or second_pair:
+                    shanten = 7 - 2 * melds - min(blocks - 1, 4 - melds)
+                    if shanten < with_pair:
+                        with_pair = shanten
+                else:
+                    shanten = 8 - 2 * melds - min(blocks, 4 - melds)
+                    if shanten < without_pair:
+                        without_pair = shanten
+
+        return with_pair, without_pair
+
+    def _choose_regular_shanten(self, with_pair, without_pair, min_shanten, has_kan_tiles):
+        regular = min(with_pair, without_pair)
+        if has_kan_tiles and min_shanten > regular and without_pair < with_pair:
+            return None
+
+        return min(min_shanten, regular)
+
+    def _count_honors(self, tiles_34):
+        melds = 0
+        pairs = 0
+        for x in HONOR_INDICES:
+            if tiles_34[x] == 3:
+                melds += 1
+            elif tiles_34[x] == 2:
+                pairs += 1
+        return melds, pairs
+
+    def _merge_with_cache(self, first, second, merges):
+        key = (first, second)
+        options = merges.get(key)
+        if options is None:
+            options = merges[key] = self._merge(first, second)
+        return options
+
+    def _merge(self, first, second):
+        """
+        All combinations of two suits options without options that are worse than others
+        """
+        if first == EMPTY_SUIT:
+            return second
+
+        if second == EMPTY_SUIT:
+            return first
+
+        options = set()
+        for first_melds, first_pair, first_blocks in first:
+            for second_melds, second_pair, second_blocks in second:
+                options.add((first_melds + second_melds,
+                             first_pair or second_pair,
+                             first_blocks + second_blocks))
+        return self._remove_worse_options(options)
+
+    def _remove_worse_options(self, options):
+        results = []
+        for option in options:
+            is_worse = False
+            for other in options:
+                if other == option:
+                    continue
+
+                if other[0] >= option[0] and other[1] >= option[1] and other[2] >= option[2]:
+                    is_worse = True
+                    break
+
+            if not is_worse:
+                results.append(option)
+        return tuple(sorted(results))
+
+    def _find_suit_options(self, suit_tiles):
+        """
+        :param suit_tiles: list of 9 tiles counts
+        :return: tuple of (melds, has pair, count of pairs and tatsu)
+        """
+        key = tuple(suit_tiles)
+        options = UkeireCalculator.suit_options.get(key)
+        if options is None:
+            if UkeireCalculator.suit_tables:
+                options = UkeireCalculator.suit_tables.find_options(key)
+
+            if options is None:
+                options = self._decompose_suit(list(key))
+
+            UkeireCalculator.suit_options.set(key, options)
+        return options
+
+    def _decompose_suit(self, tiles):
+        """
+        The same search as in Shanten._run, but for one suit only
+        """
+        options = set()
+        # melds, tatsu, pairs
+        state = [0, 0, 0]
+
+        def change(indices, value, state_index):
+            for index in indices:
+                tiles[index] -= value
+            state[state_index] += value
+
+        def run(depth):
+            while depth < 9 and not tiles[depth]:
+                depth += 1
+
+            if depth >= 9:
+                options.add((state[0], state[2] > 0, state[1] + state[2]))
+                return
+
+            pon = [depth] * 3
+            pair = [depth] * 2
+            chi = [depth, depth + 1, depth + 2]
+            kanchan = [depth, depth + 2]
+            penchan = [depth, depth + 1]
+
+            if tiles[depth] == 4:
+                change(pon, 1, 0)
+                if depth < 7 and tiles[depth + 2]:
+                    if tiles[depth + 1]:
+                        change(chi, 1, 0)
+                        run(depth + 1)
+                        change(chi, -1, 0)
+                    change(kanchan, 1, 1)
+                    run(depth + 1)
+                    change(kanchan, -1, 1)
+
+                if depth < 8 and tiles[depth + 1]:
+                    change(penchan, 1, 1)
+                    run(depth + 1)
+                    change(penchan, -1, 1)
+
+                # isolated tile
+                tiles[depth] -= 1
+                run(depth + 1)
+                tiles[depth] += 1
+                change(pon, -1, 0)
+
+                change(pair, 1, 2)
+                if depth < 7 and tiles[depth + 2]:
+                    if tiles[depth + 1]:
+                        change(chi, 1, 0)
+                        run(depth)
+                        change(chi, -1, 0)
+                    change(kanchan, 1, 1)
+                    run(depth + 1)
+                    change(kanchan, -1, 1)
+
+                if depth < 8 and tiles[depth + 1]:
+                    change(penchan, 1, 1)
+                    run(depth + 1)
+                    change(penchan, -1, 1)
+                change(pair, -1, 2)
+
+            if tiles[depth] == 3:
+                change(pon, 1, 0)
+                run(depth + 1)
+                change(pon, -1, 0)
+
+                change(pair, 1, 2)
+                if depth < 7 and tiles[depth + 1] and tiles[depth + 2]:
+                    change(chi, 1, 0)
+                    run(depth + 1)
+                    change(chi, -1, 0)
+                else:
+                    if depth < 7 and tiles[depth + 2]:
+                        change(kanchan, 1, 1)
+                        run(depth + 1)
+                        change(kanchan, -1, 1)
+
+                    if depth < 8 and tiles[depth + 1]:
+                        change(penchan, 1, 1)
+                        run(depth + 1)
+                        change(penchan, -1, 1)
+                change(pair, -1, 2)
+
+                if depth < 7 and tiles[depth + 2] >= 2 and tiles[depth + 1] >= 2:
+                    change(chi, 1, 0)
+                    change(chi, 1, 0)
+                    run(depth)
+                    change(chi, -1, 0)
+                    change(chi, -1, 0)
+
+            if tiles[depth] == 2:
+                change(pair, 1, 2)
+                run(depth + 1)
+                change(pair, -1, 2)
+
+                if depth < 7 and tiles[depth + 2] and tiles[depth + 1]:
+                    change(chi, 1, 0)
+                    run(depth)
+                    change(chi, -1, 0)
+
+            if tiles[depth] == 1:
+                if depth < 6 and tiles[depth + 1] == 1 and tiles[depth + 2] and tiles[depth + 3] != 4:
+                    change(chi, 1, 0)
+                    run(depth + 2)
+                    change(chi, -1, 0)
+                else:
+                    # isolated tile
+                    tiles[depth] -= 1
+                    run(depth + 1)
+                    tiles[depth] += 1
+
+                    if depth < 7 and tiles[depth + 2]:
+                        if tiles[depth + 1]:
+                            change(chi, 1, 0)
+                            run(depth + 1)
+                            change(chi, -1, 0)
+
+                        change(kanchan, 1, 1)
+                        run(depth + 1)
+                        change(kanchan, -1, 1)
+
+                    if depth < 8 and tiles[depth + 1]:
+                        change(penchan, 1, 1)
+                        run(depth + 1)
+                        change(penchan, -1, 1)
+
+        run(0)
+
+        return self._remove_worse_options(options)
+
+    def _calculate_chitoitsu_and_kokushi(self, tiles_34):
+        state = self._chitoitsu_and_kokushi_state(tiles_34)
+        return self._chitoitsu_and_kokushi_shanten(*state)
+
+    def _chitoitsu_and_kokushi_state(self, tiles_34):
+        pairs = len([x for x in tiles_34 if x >= 2])
+        kinds = len([x for x in tiles_34 if x])
+        terminals = len([x for x in TERMINAL_AND_HONOR_INDICES if tiles_34[x]])
+        terminal_pairs = len([x for x in TERMINAL_AND_HONOR_INDICES if tiles_34[x] >= 2])
+        return pairs, kinds, terminals, terminal_pairs
+
+    def _chitoitsu_and_kokushi_with_tile(self, state, tiles_34, tile):
+        pairs, kinds, terminals, terminal_pairs = state
+        is_terminal = tile in TERMINAL_AND_HONOR_INDICES
+        if tiles_34[tile] == 0:
+            kinds += 1
+            terminals += is_terminal and 1 or 0
+        elif tiles_34[tile] == 1:
+            pairs += 1
+            terminal_pairs += is_terminal and 1 or 0
+        return self._chitoitsu_and_kokushi_shanten(pairs, kinds, terminals, terminal_pairs)
+
+    def _chitoitsu_and_kokushi_shanten(self, pairs, kinds, terminals, terminal_pairs):
+        chitoitsu = 6 - pairs + (kinds < 7 and 7 - kinds or 0)
+        kokushi = 13 - terminals - (terminal_pairs and 1 or 0)
+        return min(8, chitoitsu, kokushi)
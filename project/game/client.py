@@ -5,8 +5,8 @@ from game.table import Table
 class Client(object):
     table = None
 
-    def __init__(self):
-        self.table = Table()
+    def __init__(self, ai_class=None):
+        self.table = Table(ai_class)
 
     def connect(self):
         raise NotImplemented()
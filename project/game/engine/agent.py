@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+
+class Action(object):
+    """
+    Answer of the agent to the engine prompt
+    """
+    DISCARD = 'discard'
+    RIICHI = 'riichi'
+    TSUMO = 'tsumo'
+    CLOSED_KAN = 'closed_kan'
+    ADDED_KAN = 'added_kan'
+
+    RON = 'ron'
+    PON = 'pon'
+    CHI = 'chi'
+    OPEN_KAN = 'open_kan'
+    PASS = 'pass'
+
+    type = None
+    # 136 tiles format, discarded tile or tile of the kan
+    tile = None
+    # two tiles from the hand for pon or chi
+    tiles = None
+
+    def __init__(self, action_type, tile=None, tiles=None):
+        self.type = action_type
+        self.tile = tile
+        self.tiles = tiles
+
+    def __str__(self):
+        return '{} {} {}'.format(self.type, self.tile, self.tiles or '')
+
+
+class DrawOptions(object):
+    can_tsumo = False
+    can_riichi = False
+
+    def __init__(self, can_tsumo, can_riichi):
+        self.can_tsumo = can_tsumo
+        self.can_riichi = can_riichi
+
+
+class CallOptions(object):
+    can_ron = False
+    can_pon = False
+    can_open_kan = False
+    can_chi = False
+
+    def __init__(self, can_ron, can_pon, can_open_kan, can_chi):
+        self.can_ron = can_ron
+        self.can_pon = can_pon
+        self.can_open_kan = can_open_kan
+        self.can_chi = can_chi
+
+    def __bool__(self):
+        return self.can_ron or self.can_pon or self.can_open_kan or self.can_chi
+
+
+class GameObserver(object):
+    """
+    Receives all game events. Seats are absolute, seat 0 is the dealer of the first round.
+    Observers see all tiles, so they can be used for logs and statistics
+    """
+
+    def game_started(self, game):
+        """
+        :param game: MahjongGame
+        """
+
+    def round_started(self, round_info):
+        """
+        :param round_info: RoundInfo with hands of all players
+        """
+
+    def tile_drawn(self, seat, tile):
+        """
+        :param tile: 136 tiles format
+        """
+
+    def tile_discarded(self, seat, tile, is_tsumogiri):
+        """
+        :param tile: 136 tiles format
+        """
+
+    def meld_called(self, seat, meld):
+        """
+        :param meld: Meld with absolute who and from_who
+        """
+
+    def riichi_called(self, seat, step):
+        """
+        :param step: 1 after the declaration, 2 after the riichi stick was paid
+        """
+
+    def dora_revealed(self, tile):
+        """
+        :param tile: new dora indicator in 136 tiles format
+        """
+
+    def round_ended(self, result):
+        """
+        :param result: RoundResult, result.game_result is set for the last round
+        """
+
+    def game_ended(self, result):
+        """
+        :param result: GameResult
+        """
+
+
+class GameAgent(GameObserver):
+    """
+    Player of the engine game.
+
+    Prompts replace notifications: an agent that was asked about its draw doesn't receive tile_drawn for it,
+    an agent that was asked about a call doesn't receive tile_discarded for this discard.
+    Agent shouldn't look at other players tiles from notifications
+    """
+    seat = None
+
+    async def ready(self):
+        """
+        Will be called before each round, engine waits for all players
+        """
+
+    async def choose_draw_action(self, tile, options):
+        """
+        :param tile: drawn tile in 136 tiles format
+        :param options: DrawOptions
+        :return: Action with DISCARD, RIICHI, TSUMO, CLOSED_KAN or ADDED_KAN type
+        """
+        return Action(Action.DISCARD, tile)
+
+    async def choose_call(self, seat, tile, is_tsumogiri, options):
+        """
+        :param seat: who discarded the tile
+        :param tile: 136 tiles format
+        :param options: CallOptions
+        :return: Action with RON, PON, CHI, OPEN_KAN or PASS type
+        """
+        return Action(Action.PASS)
+
+    async def choose_discard_after_call(self):
+        """
+        :return: tile to discard in 136 tiles format
+        """
+        raise NotImplementedError()
@@ -0,0 +1,642 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+
+from mahjong.meld import Meld
+
+from game.engine.agent import Action, CallOptions, DrawOptions
+from game.engine.rules import GameRules, HandJudge
+from game.engine.wall import Wall
+
+logger = logging.getLogger('engine')
+
+
+class SeatState(object):
+    """
+    Real state of the player in the engine
+    """
+    seat = 0
+    scores = 0
+
+    # closed part of the hand in 136 tiles format
+    tiles = None
+    melds = None
+    discards = None
+    # 34 tiles format, all tiles that player discarded in the round (even called ones)
+    discarded_kinds = None
+    # tiles in 34 format that complete the closed part of the hand
+    waiting = None
+
+    in_riichi = False
+    is_ippatsu = False
+    is_temporary_furiten = False
+    is_riichi_furiten = False
+
+    def __init__(self, seat, scores):
+        self.seat = seat
+        self.scores = scores
+        self.start_round([])
+
+    def start_round(self, tiles):
+        self.tiles = list(tiles)
+        self.melds = []
+        self.discards = []
+        self.discarded_kinds = set()
+        self.waiting = []
+        self.in_riichi = False
+        self.is_ippatsu = False
+        self.is_temporary_furiten = False
+        self.is_riichi_furiten = False
+
+    def tiles_of_kind(self, tile_34):
+        return [x for x in self.tiles if x // 4 == tile_34]
+
+    @property
+    def is_open_hand(self):
+        return any([x.opened for x in self.melds])
+
+    @property
+    def is_furiten(self):
+        if self.is_temporary_furiten or self.is_riichi_furiten:
+            return True
+        return any([x in self.discarded_kinds for x in self.waiting])
+
+
+class RoundInfo(object):
+    round_number = 0
+    count_of_honba_sticks = 0
+    count_of_riichi_sticks = 0
+    dealer = 0
+    scores = None
+    dora_indicator = None
+    # hands of all players, by absolute seats
+    hands = None
+    dice = None
+
+    def __init__(self, round_number, count_of_honba_sticks, count_of_riichi_sticks, dealer, scores, dora_indicator,
+                 hands, dice):
+        self.round_number = round_number
+        self.count_of_honba_sticks = count_of_honba_sticks
+        self.count_of_riichi_sticks = count_of_riichi_sticks
+        self.dealer = dealer
+        self.scores = scores
+        self.dora_indicator = dora_indicator
+        self.hands = hands
+        self.dice = dice
+
+
+class WinResult(object):
+    who = None
+    from_who = None
+    win_tile = None
+    is_tsumo = False
+    # closed part of the hand with the win tile
+    tiles = None
+    melds = None
+    # WinEstimation
+    estimation = None
+    dora_indicators = None
+    ura_dora_indicators = None
+    player_wind = None
+    round_wind = None
+
+    def __init__(self, who, from_who, win_tile, is_tsumo, tiles, melds, estimation, dora_indicators,
+                 ura_dora_indicators, player_wind, round_wind):
+        self.who = who
+        self.from_who = from_who
+        self.win_tile = win_tile
+        self.is_tsumo = is_tsumo
+        self.tiles = tiles
+        self.melds = melds
+        self.estimation = estimation
+        self.dora_indicators = dora_indicators
+        self.ura_dora_indicators = ura_dora_indicators
+        self.player_wind = player_wind
+        self.round_wind = round_wind
+
+
+class RoundResult(object):
+    wins = None
+    # seats of players in tempai after exhaustive draw
+    tempai = None
+    # closed hands of tempai players
+    hands = None
+    # honba and riichi sticks on the table before the result
+    count_of_honba_sticks = 0
+    count_of_riichi_sticks = 0
+    score_changes = None
+    scores = None
+    # it is set for the last round
+    game_result = None
+
+    def __init__(self, wins, tempai, hands, score_changes):
+        self.wins = wins
+        self.tempai = tempai
+        self.hands = hands
+        self.score_changes = score_changes
+
+    @property
+    def is_draw(self):
+        return not self.wins
+
+
+class GameResult(object):
+    scores = None
+    # final points with uma, by seats
+    uma = None
+    # 1 - 4, by seats
+    places = None
+    count_of_rounds = 0
+
+    def __init__(self, scores, uma, places, count_of_rounds):
+        self.scores = scores
+        self.uma = uma
+        self.places = places
+        self.count_of_rounds = count_of_rounds
+
+
+class MahjongGame(object):
+    """
+    Four players game engine. Agents are asked about their decisions and observers receive all events.
+
+    Supported rules: riichi, ippatsu, tsumo/ron, haitei/houtei, rinshan, all calls, kan dora,
+    furiten, noten payments, dealer repeats and automatic end of the last round for the top dealer.
+    Not supported: double ron (the closest player wins), chankan, abortive draws, nagashi mangan,
+    kuikae restrictions, double riichi, tenhou/chiihou and west rounds
+    """
+    agents = None
+    observers = None
+    rules = None
+    judge = None
+    seed = None
+
+    seats = None
+    wall = None
+    round_number = 0
+    count_of_honba_sticks = 0
+    count_of_riichi_sticks = 0
+    dealer = 0
+    count_of_played_rounds = 0
+
+    _walls = None
+
+    def __init__(self, agents, rules=None, seed=None, observers=None, walls=None):
+        """
+        :param agents: list of four GameAgent, by seats
+        :param rules: GameRules
+        :param seed: walls of the game depend only on the seed and the count of played rounds
+        :param observers: list of GameObserver
+        :param walls: list of prepared walls in 136 tiles format, they are used before seeded walls
+        """
+        self.agents = agents
+        self.observers = list(agents) + list(observers or [])
+        self.rules = rules or GameRules()
+        self.judge = HandJudge(self.rules)
+        self.seed = seed
+
+        for seat, agent in enumerate(agents):
+            agent.seat = seat
+
+        self.seats = [SeatState(x, self.rules.start_scores) for x in range(0, 4)]
+        self.round_number = 0
+        self.count_of_honba_sticks = 0
+        self.count_of_riichi_sticks = 0
+        self.dealer = 0
+        self.count_of_played_rounds = 0
+        self._walls = list(walls or [])
+
+    async def play(self):
+        """
+        :return: GameResult
+        """
+        for observer in self.observers:
+            observer.game_started(self)
+
+        while True:
+            result = await self.play_round()
+            if result.game_result:
+                return result.game_result
+
+    async def play_round(self):
+        """
+        :return: RoundResult
+        """
+        self.wall = self._build_wall()
+        hands = self.wall.deal()
+        for seat in self.seats:
+            seat.start_round(hands[(seat.seat - self.dealer) % 4])
+            seat.waiting = self.judge.find_waiting(seat.tiles)
+
+        round_info = RoundInfo(
+            self.round_number,
+            self.count_of_honba_sticks,
+            self.count_of_riichi_sticks,
+            self.dealer,
+            [x.scores for x in self.seats],
+            self.wall.dora_indicators[0],
+            [list(x.tiles) for x in self.seats],
+            self.wall.dice,
+        )
+
+        await asyncio.gather(*[x.ready() for x in self.agents])
+        self.count_of_played_rounds += 1
+        for observer in self.observers:
+            observer.round_started(round_info)
+
+        who, is_replacement = self.dealer, False
+        while True:
+            if not self.wall.remaining:
+                return self._end_round_by_draw()
+
+            result, who, is_replacement = await self._take_turn(self.seats[who], is_replacement)
+            if result:
+                return result
+
+    async def _take_turn(self, seat, is_replacement):
+        """
+        :return: RoundResult or None, who will draw the next tile and is it a kan replacement draw
+        """
+        if is_replacement:
+            tile = self.wall.draw_replacement()
+        else:
+            tile = self.wall.draw()
+        seat.tiles.append(tile)
+        self._notify('tile_drawn', seat.seat, tile, exclude=self.agents[seat.seat])
+
+        options = DrawOptions(self._can_tsumo(seat, tile, is_replacement), self._can_riichi(seat))
+        action = await self.agents[seat.seat].choose_draw_action(tile, options)
+
+        if action.type == Action.TSUMO and options.can_tsumo:
+            return self._win(seat, seat, tile, is_rinshan=is_replacement), None, False
+
+        if action.type in (Action.CLOSED_KAN, Action.ADDED_KAN) and self._call_kan(seat, action, tile):
+            return None, seat.seat, True
+
+        is_riichi = action.type == Action.RIICHI and options.can_riichi and self._is_riichi_discard(seat, action.tile)
+
+        discard_tile = action.tile
+        if seat.in_riichi or discard_tile not in seat.tiles:
+            if not seat.in_riichi:
+                logger.warning('Seat {}: wrong action {}, drawn tile was discarded'.format(seat.seat, action))
+            discard_tile = tile
+
+        return await self._discard(seat, discard_tile, discard_tile == tile, is_riichi)
+
+    async def _discard(self, seat, tile, is_tsumogiri, is_riichi):
+        if is_riichi:
+            self._notify('riichi_called', seat.seat, 1)
+
+        seat.tiles.remove(tile)
+        seat.discards.append(tile)
+        seat.discarded_kinds.add(tile // 4)
+        seat.is_temporary_furiten = False
+        seat.is_ippatsu = False
+        seat.waiting = self.judge.find_waiting(seat.tiles)
+
+        prompts = {}
+        for other in self.seats:
+            if other is seat:
+                continue
+
+            options = self._call_options(other, seat, tile)
+            if options:
+                prompts[other.seat] = options
+
+        prompted_agents = [self.agents[x] for x in prompts]
+        for observer in self.observers:
+            if observer not in prompted_agents:
+                observer.tile_discarded(seat.seat, tile, is_tsumogiri)
+
+        answers = await asyncio.gather(
+            *[self.agents[x].choose_call(seat.seat, tile, is_tsumogiri, y) for x, y in prompts.items()]
+        )
+        answers = dict(zip(prompts.keys(), answers))
+
+        winner = None
+        callers = []
+        for i in range(1, 4):
+            other = self.seats[(seat.seat + i) % 4]
+            if other.seat not in answers:
+                continue
+
+            options, answer = prompts[other.seat], answers[other.seat]
+            if options.can_ron:
+                if answer.type == Action.RON and not winner:
+                    winner = other
+                    continue
+
+                # player didn't win on the waiting tile
+                other.is_temporary_furiten = True
+                if other.in_riichi:
+                    other.is_riichi_furiten = True
+
+            if answer.type in (Action.PON, Action.OPEN_KAN):
+                callers.insert(0, (other, answer))
+            elif answer.type == Action.CHI:
+                callers.append((other, answer))
+
+        if winner:
+            return self._win(winner, seat, tile), None, False
+
+        if is_riichi:
+            seat.in_riichi = True
+            seat.is_ippatsu = True
+            seat.scores -= 1000
+            self.count_of_riichi_sticks += 1
+            self._notify('riichi_called', seat.seat, 2)
+
+        for caller, answer in callers:
+            meld = self._build_meld(caller, seat, tile, answer, prompts[caller.seat])
+            if not meld:
+                continue
+
+            self._add_meld(caller, meld)
+            if meld.type == Meld.KAN:
+                self._reveal_dora()
+                return None, caller.seat, True
+
+            discard_tile = await self.agents[caller.seat].choose_discard_after_call()
+            if discard_tile not in caller.tiles:
+                logger.warning('Seat {}: wrong discard after call {}'.format(caller.seat, discard_tile))
+                discard_tile = caller.tiles[-1]
+
+            return await self._discard(caller, discard_tile, False, False)
+
+        return None, (seat.seat + 1) % 4, False
+
+    def _call_options(self, seat, discarder, tile):
+        tile_34 = tile // 4
+        can_ron = tile_34 in seat.waiting and not seat.is_furiten and self._estimate_win(seat, discarder, tile)[0]
+
+        can_call = not seat.in_riichi and self.wall.remaining > 0
+        count = len(seat.tiles_of_kind(tile_34))
+        can_chi = can_call and seat.seat == (discarder.seat + 1) % 4 and bool(self._chi_variants(seat, tile))
+
+        return CallOptions(
+            bool(can_ron),
+            can_call and count >= 2,
+            can_call and count >= 3 and self.wall.count_of_kans < Wall.MAX_KANS,
+            can_chi,
+        )
+
+    def _chi_variants(self, seat, tile):
+        """
+        :return: list of pairs of tiles from the hand that make a chi with the tile
+        """
+        tile_34 = tile // 4
+        if tile_34 >= 27:
+            return []
+
+        position = tile_34 % 9
+        variants = []
+        for first, second in ((-2, -1), (-1, 1), (1, 2)):
+            if position + first < 0 or position + second > 8:
+                continue
+
+            first_tiles = seat.tiles_of_kind(tile_34 + first)
+            second_tiles = seat.tiles_of_kind(tile_34 + second)
+            if first_tiles and second_tiles:
+                variants.append([first_tiles[0], second_tiles[0]])
+        return variants
+
+    def _build_meld(self, caller, discarder, tile, answer, options):
+        """
+        :return: Meld or None if answer is not valid
+        """
+        tile_34 = tile // 4
+        hand_tiles = answer.tiles or []
+        if any([x not in caller.tiles for x in hand_tiles]) or len(set(hand_tiles)) != len(hand_tiles):
+            hand_tiles = []
+
+        if answer.type == Action.OPEN_KAN and options.can_open_kan:
+            meld_type, hand_tiles = Meld.KAN, caller.tiles_of_kind(tile_34)[:3]
+        elif answer.type == Action.PON and options.can_pon:
+            meld_type = Meld.PON
+            if len(hand_tiles) != 2 or any([x // 4 != tile_34 for x in hand_tiles]):
+                hand_tiles = caller.tiles_of_kind(tile_34)[:2]
+        elif answer.type == Action.CHI and options.can_chi:
+            meld_type = Meld.CHI
+            variants = [sorted(x) for x in self._chi_variants(caller, tile)]
+            kinds = sorted([x // 4 for x in hand_tiles])
+            if len(hand_tiles) != 2 or kinds not in [sorted([y // 4 for y in x]) for x in variants]:
+                hand_tiles = variants[0]
+        else:
+            return None
+
+        tiles = sorted(hand_tiles + [tile])
+        return Meld(meld_type, tiles, True, tile, caller.seat, discarder.seat)
+
+    def _call_kan(self, seat, action, drawn_tile):
+        """
+        Closed kan or upgrade of pon to kan after the draw
+        :return: was kan called
+        """
+        tile_34 = (action.tile if action.tile is not None else drawn_tile) // 4
+        if not self.wall.remaining or self.wall.count_of_kans >= Wall.MAX_KANS:
+            return False
+
+        tiles = seat.tiles_of_kind(tile_34)
+        if action.type == Action.CLOSED_KAN:
+            if len(tiles) != 4:
+                return False
+
+            # in riichi kan can't change waits
+            if seat.in_riichi:
+                rest = [x for x in seat.tiles if x // 4 != tile_34]
+                if drawn_tile // 4 != tile_34 or self.judge.find_waiting(rest + tiles[:3]) != seat.waiting:
+                    return False
+
+            meld = Meld(Meld.KAN, sorted(tiles), False, tiles[0], seat.seat, seat.seat)
+            self._add_meld(seat, meld)
+        else:
+            pon = [x for x in seat.melds if x.type == Meld.PON and x.tiles[0] // 4 == tile_34]
+            if not pon or not tiles:
+                return False
+
+            pon = pon[0]
+            meld = Meld(Meld.CHANKAN, pon.tiles + [tiles[0]], True, tiles[0], seat.seat, pon.from_who)
+            seat.melds.remove(pon)
+            self._add_meld(seat, meld)
+
+        self._reveal_dora()
+        return True
+
+    def _add_meld(self, seat, meld):
+        for tile in meld.tiles:
+            if tile in seat.tiles:
+                seat.tiles.remove(tile)
+        seat.melds.append(meld)
+        seat.waiting = self.judge.find_waiting(seat.tiles)
+
+        for other in self.seats:
+            other.is_ippatsu = False
+
+        self._notify('meld_called', seat.seat, meld)
+
+    def _reveal_dora(self):
+        tile = self.wall.reveal_dora()
+        self._notify('dora_revealed', tile)
+
+    def _can_tsumo(self, seat, tile, is_replacement):
+        if tile // 4 not in seat.waiting:
+            return False
+        return bool(self._estimate_win(seat, seat, tile, is_replacement)[0])
+
+    def _can_riichi(self, seat):
+        """
+        Formal conditions, tempai after the discard is checked on the declaration
+        """
+        return not seat.in_riichi and not seat.is_open_hand and seat.scores >= 1000 and self.wall.remaining >= 4
+
+    def _is_riichi_discard(self, seat, tile):
+        if tile not in seat.tiles:
+            return False
+        return bool(self.judge.find_waiting([x for x in seat.tiles if x != tile]))
+
+    def _estimate_win(self, winner, from_seat, tile, is_rinshan=False):
+        is_tsumo = winner is from_seat
+        tiles = is_tsumo and list(winner.tiles) or winner.tiles + [tile]
+        is_last_tile = not self.wall.remaining
+
+        config = self.judge.build_config(
+            self.judge.player_wind(winner.seat, self.dealer),
+            self.judge.round_wind(self.round_number),
+            is_tsumo=is_tsumo,
+            is_riichi=winner.in_riichi,
+            is_ippatsu=winner.is_ippatsu,
+            is_rinshan=is_rinshan,
+            is_haitei=is_tsumo and is_last_tile and not is_rinshan,
+            is_houtei=not is_tsumo and is_last_tile,
+        )
+        ura_dora_indicators = winner.in_riichi and self.wall.ura_dora_indicators or []
+        estimation = self.judge.estimate_win(tiles, winner.melds, tile, self.wall.dora_indicators,
+                                             ura_dora_indicators, config)
+        return estimation, tiles, ura_dora_indicators
+
+    def _win(self, winner, from_seat, tile, is_rinshan=False):
+        estimation, tiles, ura_dora_indicators = self._estimate_win(winner, from_seat, tile, is_rinshan)
+
+        score_changes = [0, 0, 0, 0]
+        honba = self.count_of_honba_sticks
+        if winner is from_seat:
+            for other in self.seats:
+                if other is winner:
+                    continue
+
+                if winner.seat == self.dealer or other.seat == self.dealer:
+                    payment = estimation.cost['main']
+                else:
+                    payment = estimation.cost['additional']
+                payment += honba * 100
+                score_changes[other.seat] -= payment
+                score_changes[winner.seat] += payment
+        else:
+            payment = estimation.cost['main'] + honba * 300
+            score_changes[from_seat.seat] -= payment
+            score_changes[winner.seat] += payment
+
+        score_changes[winner.seat] += self.count_of_riichi_sticks * 1000
+
+        win = WinResult(
+            winner.seat,
+            from_seat.seat,
+            tile,
+            winner is from_seat,
+            tiles,
+            list(winner.melds),
+            estimation,
+            self.wall.dora_indicators,
+            ura_dora_indicators,
+            self.judge.player_wind(winner.seat, self.dealer),
+            self.judge.round_wind(self.round_number),
+        )
+        result = RoundResult([win], [], {}, score_changes)
+        return self._finish_round(result, winner.seat == self.dealer)
+
+    def _end_round_by_draw(self):
+        tempai = [x.seat for x in self.seats if x.waiting]
+
+        score_changes = [0, 0, 0, 0]
+        if 0 < len(tempai) < 4:
+            for seat in self.seats:
+                if seat.seat in tempai:
+                    score_changes[seat.seat] = 3000 // len(tempai)
+                else:
+                    score_changes[seat.seat] = -3000 // (4 - len(tempai))
+
+        hands = dict([(x, list(self.seats[x].tiles)) for x in tempai])
+        result = RoundResult([], tempai, hands, score_changes)
+        return self._finish_round(result, self.dealer in tempai)
+
+    def _finish_round(self, result, is_dealer_repeat):
+        result.count_of_honba_sticks = self.count_of_honba_sticks
+        result.count_of_riichi_sticks = self.count_of_riichi_sticks
+
+        for seat in self.seats:
+            seat.scores += result.score_changes[seat.seat]
+        result.scores = [x.scores for x in self.seats]
+
+        is_last_round = self.round_number >= self.rules.count_of_rounds - 1
+        if result.wins:
+            self.count_of_riichi_sticks = 0
+
+        if is_dealer_repeat or result.is_draw:
+            self.count_of_honba_sticks += 1
+        else:
+            self.count_of_honba_sticks = 0
+
+        is_game_end = any([x.scores < 0 for x in self.seats])
+        if is_last_round:
+            # dealer can't repeat the last round if he is on the first place
+            is_game_end = is_game_end or not is_dealer_repeat or self._ranked_seats()[0] == self.dealer
+
+        if not is_dealer_repeat:
+            self.dealer = (self.dealer + 1) % 4
+            self.round_number += 1
+
+        if is_game_end:
+            result.game_result = self._build_game_result()
+
+        self._notify('round_ended', result)
+        if result.game_result:
+            self._notify('game_ended', result.game_result)
+
+        return result
+
+    def _build_game_result(self):
+        ranked_seats = self._ranked_seats()
+
+        # riichi sticks that are left on the table go to the first player
+        self.seats[ranked_seats[0]].scores += self.count_of_riichi_sticks * 1000
+        self.count_of_riichi_sticks = 0
+
+        scores = [x.scores for x in self.seats]
+        uma = [0, 0, 0, 0]
+        places = [0, 0, 0, 0]
+        oka = (self.rules.return_scores - self.rules.start_scores) * 4 / 1000
+        for place, seat in enumerate(ranked_seats):
+            points = (scores[seat] - self.rules.return_scores) / 1000 + self.rules.uma[place]
+            if place == 0:
+                points += oka
+            uma[seat] = round(points, 1)
+            places[seat] = place + 1
+
+        return GameResult(scores, uma, places, self.count_of_played_rounds)
+
+    def _ranked_seats(self):
+        # seat 0 was the first dealer, so it has priority with the same scores
+        return sorted(range(0, 4), key=lambda x: (-self.seats[x].scores, x))
+
+    def _build_wall(self):
+        if self._walls:
+            return Wall(self.count_of_played_rounds, self._walls.pop(0))
+
+        seed = None
+        if self.seed is not None:
+            seed = '{}-{}'.format(self.seed, self.count_of_played_rounds)
+        return Wall(seed)
+
+    def _notify(self, method, *args, exclude=None):
+        for observer in self.observers:
+            if observer is not exclude:
+                getattr(observer, method)(*args)
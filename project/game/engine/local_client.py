@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from mahjong.meld import Meld
+
+from game.client import Client
+from game.engine.agent import Action, GameAgent
+from game.engine.game import MahjongGame
+
+
+class LocalClient(Client, GameAgent):
+    """
+    Engine player with our AI, without sockets.
+    Table is updated in the same way as in TenhouClient, seats of the table are relative to the player.
+    Calls are not prepared after our discard: there is no waiting for the server here,
+    so AI answers only to discards that can be called
+    """
+    # the called tile and the discard that AI selected for the meld
+    _meld_tile = None
+    _tile_to_discard = None
+    # own discard that was already added to the table
+    _added_discard = None
+
+    def relative_seat(self, seat):
+        return (seat - self.seat) % 4
+
+    def game_started(self, game):
+        self.table.has_aka_dora = game.rules.has_aka_dora
+        self.table.has_open_tanyao = game.rules.has_open_tanyao
+
+    def round_started(self, round_info):
+        self.table.init_round(
+            round_info.round_number,
+            round_info.count_of_honba_sticks,
+            round_info.count_of_riichi_sticks,
+            round_info.dora_indicator,
+            self.relative_seat(round_info.dealer),
+            self._rotate([x // 100 for x in round_info.scores]),
+        )
+        self.player.init_hand(list(round_info.hands[self.seat]))
+
+    async def choose_draw_action(self, tile, options):
+        if options.can_tsumo:
+            return Action(Action.TSUMO, tile)
+
+        if self.player.in_riichi:
+            self._add_own_discard(tile, True)
+            return Action(Action.DISCARD, tile)
+
+        self.player.draw_tile(tile)
+
+        kan_type = self.player.should_call_kan(tile, False)
+        if kan_type and self.table.count_of_remaining_tiles > 1:
+            return Action(kan_type == Meld.CHANKAN and Action.ADDED_KAN or Action.CLOSED_KAN, tile)
+
+        discarded_tile = self.player.discard_tile()
+        self._added_discard = discarded_tile
+
+        action_type = Action.DISCARD
+        if self.player.can_call_riichi():
+            action_type = Action.RIICHI
+
+        return Action(action_type, discarded_tile)
+
+    async def choose_call(self, seat, tile, is_tsumogiri, options):
+        enemy_seat = self.relative_seat(seat)
+        if options.can_ron and self.player.should_call_win(tile, enemy_seat):
+            return Action(Action.RON, tile)
+
+        self.table.add_discarded_tile(enemy_seat, tile, is_tsumogiri)
+
+        if options.can_open_kan and self.player.should_call_kan(tile, True):
+            return Action(Action.OPEN_KAN, tile)
+
+        if not options.can_pon and not options.can_chi:
+            return Action(Action.PASS)
+
+        meld, self._tile_to_discard = self.player.try_to_call_meld(tile, enemy_seat == 3)
+        if not meld:
+            return Action(Action.PASS)
+
+        self._meld_tile = tile
+        tiles = [x for x in meld.tiles if x != tile]
+        return Action(meld.type == Meld.CHI and Action.CHI or Action.PON, tile, tiles)
+
+    async def choose_discard_after_call(self):
+        discarded_tile = self.player.discard_tile(self._tile_to_discard)
+        self._added_discard = discarded_tile
+
+        self.player.tiles.append(self._meld_tile)
+        return discarded_tile
+
+    def tile_discarded(self, seat, tile, is_tsumogiri):
+        if seat != self.seat:
+            self.table.add_discarded_tile(self.relative_seat(seat), tile, is_tsumogiri)
+            return
+
+        # engine replaced the discard that our AI selected
+        if tile != self._added_discard:
+            if tile in self.player.tiles:
+                self.player.tiles.remove(tile)
+            self._add_own_discard(tile, is_tsumogiri)
+        self._added_discard = None
+
+    def meld_called(self, seat, meld):
+        who = self.relative_seat(seat)
+        meld = Meld(meld.type, list(meld.tiles), meld.opened, meld.called_tile, who,
+                    self.relative_seat(meld.from_who))
+        self.table.add_called_meld(who, meld)
+
+    def riichi_called(self, seat, step):
+        if step == 1:
+            self.table.add_called_riichi(self.relative_seat(seat))
+
+    def dora_revealed(self, tile):
+        self.table.add_dora_indicator(tile)
+
+    def round_ended(self, result):
+        if result.game_result:
+            self.table.set_players_scores(self._rotate([x // 100 for x in result.game_result.scores]),
+                                          self._rotate(result.game_result.uma))
+
+    def game_ended(self, result):
+        self.player.ai.end_game()
+
+    def _add_own_discard(self, tile, is_tsumogiri):
+        self.table.add_discarded_tile(0, tile, is_tsumogiri)
+        self._added_discard = tile
+
+    def _rotate(self, values):
+        return [values[(x + self.seat) % 4] for x in range(0, 4)]
+
+
+def play_local_game(ai_classes, rules=None, seed=None, observers=None):
+    """
+    Play one game between AI implementations in the current thread
+    :param ai_classes: list of four AI classes, by seats
+    :param rules: GameRules
+    :param seed: seed of walls
+    :param observers: list of GameObserver
+    :return: GameResult
+    """
+    clients = [LocalClient(x) for x in ai_classes]
+    game = MahjongGame(clients, rules, seed, observers)
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(game.play())
+    finally:
+        loop.close()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+from mahjong.agari import Agari
+from mahjong.constants import EAST
+from mahjong.hand_calculating.hand import HandCalculator
+from mahjong.hand_calculating.hand_config import HandConfig
+from mahjong.hand_calculating.scores import ScoresCalculator
+from mahjong.tile import TilesConverter
+from mahjong.utils import is_aka_dora, plus_dora
+
+
+class GameRules(object):
+    """
+    Rules of the game, by default they are the same as in tenhou.net ranked lobbies
+    """
+    is_hanchan = False
+    has_aka_dora = True
+    has_open_tanyao = True
+
+    start_scores = 25000
+    return_scores = 30000
+    uma = (20, 10, -10, -20)
+
+    def __init__(self, is_hanchan=False, has_aka_dora=True, has_open_tanyao=True):
+        self.is_hanchan = is_hanchan
+        self.has_aka_dora = has_aka_dora
+        self.has_open_tanyao = has_open_tanyao
+
+    @property
+    def count_of_rounds(self):
+        return self.is_hanchan and 8 or 4
+
+
+class WinEstimation(object):
+    """
+    Value of the winning hand. Dora, ura dora and aka dora are counted separately from other yaku
+    """
+    han = 0
+    fu = 0
+    yaku = None
+    # 0 - usual hand, 1 - mangan, 2 - haneman, 3 - baiman, 4 - sanbaiman, 5 - yakuman
+    limit = 0
+    dora = 0
+    ura_dora = 0
+    aka_dora = 0
+    # {'main': x, 'additional': y} like in mahjong ScoresCalculator
+    cost = None
+
+    def __init__(self, han, fu, yaku, dora, ura_dora, aka_dora, cost):
+        self.han = han
+        self.fu = fu
+        self.yaku = yaku
+        self.dora = dora
+        self.ura_dora = ura_dora
+        self.aka_dora = aka_dora
+        self.cost = cost
+        self.limit = HandJudge.find_limit(han, fu)
+
+
+class HandJudge(object):
+    """
+    Winning hands, waits and scores for the game engine
+    """
+    rules = None
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.agari = Agari()
+        self.calculator = HandCalculator()
+        self.scores = ScoresCalculator()
+
+    def find_waiting(self, closed_tiles):
+        """
+        :param closed_tiles: closed part of the hand in 136 tiles format, without the drawn tile
+        :return: list of tiles in 34 format that complete the hand
+        """
+        tiles_34 = TilesConverter.to_34_array(closed_tiles)
+
+        waiting = []
+        for tile in range(0, 34):
+            # we can't wait for the fifth tile
+            if tiles_34[tile] == 4:
+                continue
+
+            tiles_34[tile] += 1
+            if self.agari.is_agari(tiles_34):
+                waiting.append(tile)
+            tiles_34[tile] -= 1
+
+        return waiting
+
+    def estimate_win(self, closed_tiles, melds, win_tile, dora_indicators, ura_dora_indicators, config):
+        """
+        :param closed_tiles: closed part of the hand in 136 tiles format with the win tile
+        :param melds: list of Meld
+        :param win_tile: 136 tiles format
+        :param dora_indicators: list of tiles in 136 format
+        :param ura_dora_indicators: list of tiles in 136 format, empty without riichi
+        :param config: HandConfig
+        :return: WinEstimation or None if hand has no yaku
+        """
+        # hand calculator expects three tiles for each kan
+        tiles = list(closed_tiles)
+        kan_tiles = []
+        for meld in melds:
+            tiles += meld.tiles[:3]
+            kan_tiles += meld.tiles[3:]
+
+        result = self.calculator.estimate_hand_value(tiles, win_tile, melds, None, config)
+        if result.error:
+            return None
+
+        all_tiles = tiles + kan_tiles
+
+        han = result.han
+        dora, ura_dora, aka_dora = 0, 0, 0
+        # dora are not counted for yakuman
+        if han < 13:
+            for tile in all_tiles:
+                dora += plus_dora(tile, dora_indicators)
+                ura_dora += plus_dora(tile, ura_dora_indicators)
+                aka_dora += is_aka_dora(tile, self.rules.has_aka_dora) and 1 or 0
+            han += dora + ura_dora + aka_dora
+
+        cost = self.scores.calculate_scores(han, result.fu, config.is_tsumo, config.is_dealer)
+        return WinEstimation(han, result.fu, result.yaku, dora, ura_dora, aka_dora, cost)
+
+    def build_config(self, player_wind, round_wind, is_tsumo=False, is_riichi=False, is_ippatsu=False,
+                     is_rinshan=False, is_haitei=False, is_houtei=False):
+        """
+        :param player_wind: 34 tiles format
+        :param round_wind: 34 tiles format
+        :return: HandConfig
+        """
+        # all dora are counted by the judge, so tiles of the fourth kan tile will not be lost
+        return HandConfig(
+            is_tsumo=is_tsumo,
+            is_riichi=is_riichi,
+            is_ippatsu=is_ippatsu,
+            is_rinshan=is_rinshan,
+            is_haitei=is_haitei,
+            is_houtei=is_houtei,
+            player_wind=player_wind,
+            round_wind=round_wind,
+            has_open_tanyao=self.rules.has_open_tanyao,
+        )
+
+    @staticmethod
+    def find_limit(han, fu):
+        if han >= 13:
+            return 5
+        if han >= 11:
+            return 4
+        if han >= 8:
+            return 3
+        if han >= 6:
+            return 2
+        if han >= 5 or (han == 4 and fu >= 40) or (han == 3 and fu >= 70):
+            return 1
+        return 0
+
+    @staticmethod
+    def player_wind(seat, dealer_seat):
+        return EAST + (seat - dealer_seat) % 4
+
+    @staticmethod
+    def round_wind(round_number):
+        return EAST + round_number // 4
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from mahjong.constants import EAST, FIVE_RED_PIN, FIVE_RED_SOU
+from mahjong.tests_mixin import TestMixin
+
+from game.engine.agent import Action, GameAgent, GameObserver
+from game.engine.game import MahjongGame
+from game.engine.rules import GameRules, HandJudge
+from game.engine.wall import Wall
+
+
+class WinningAgent(GameAgent):
+    """
+    Discards drawn tiles and wins when it is possible
+    """
+
+    async def choose_draw_action(self, tile, options):
+        if options.can_tsumo:
+            return Action(Action.TSUMO, tile)
+        return Action(Action.DISCARD, tile)
+
+    async def choose_call(self, seat, tile, is_tsumogiri, options):
+        if options.can_ron:
+            return Action(Action.RON, tile)
+        return Action(Action.PASS)
+
+
+class RoundsObserver(GameObserver):
+
+    def __init__(self):
+        self.results = []
+
+    def round_ended(self, result):
+        self.results.append(result)
+
+
+class WallTestCase(unittest.TestCase):
+
+    def test_same_seed_gives_same_wall(self):
+        self.assertEqual(Wall('1-0').tiles, Wall('1-0').tiles)
+        self.assertNotEqual(Wall('1-0').tiles, Wall('1-1').tiles)
+
+    def test_draw_after_kan(self):
+        wall = Wall(seed=1)
+        wall.deal()
+        self.assertEqual(wall.remaining, 70)
+
+        tile = wall.draw_replacement()
+        wall.reveal_dora()
+
+        self.assertEqual(tile, wall.tiles[-1])
+        self.assertEqual(wall.remaining, 69)
+        self.assertEqual(wall.dora_indicators, [wall.tiles[-5], wall.tiles[-7]])
+
+
+class HandJudgeTestCase(unittest.TestCase, TestMixin):
+
+    def test_find_waiting(self):
+        judge = HandJudge(GameRules())
+        tiles = self._string_to_136_array(man='123456789', pin='2355')
+
+        self.assertEqual(judge.find_waiting(tiles), [self._string_to_34_tile(pin='1'),
+                                                     self._string_to_34_tile(pin='4')])
+
+    def test_estimate_win_counts_dora(self):
+        judge = HandJudge(GameRules())
+        tiles = self._string_to_136_array(man='234', pin='234567', sou='23455')
+        win_tile = self._string_to_136_tile(sou='2')
+        # first copies of fives are red
+        self.assertIn(FIVE_RED_PIN, tiles)
+        self.assertIn(FIVE_RED_SOU, tiles)
+        dora_indicator = self._string_to_136_tile(man='1')
+        config = judge.build_config(EAST + 1, EAST, is_tsumo=True)
+
+        estimation = judge.estimate_win(tiles, [], win_tile, [dora_indicator], [], config)
+
+        self.assertEqual(estimation.dora, 1)
+        self.assertEqual(estimation.aka_dora, 2)
+        # tsumo, pinfu, tanyao, sanshoku and three dora
+        self.assertEqual(estimation.han, 8)
+        self.assertEqual(estimation.limit, 3)
+
+
+class MahjongGameTestCase(unittest.TestCase, TestMixin):
+
+    def test_dealer_tsumo(self):
+        dealer_hand = self._string_to_136_array(man='123456789', pin='1235')
+        win_tile = self._string_to_136_tile(pin='5') + 1
+        other_tiles = [x for x in range(0, 136) if x not in dealer_hand and x != win_tile]
+        wall = dealer_hand + other_tiles[:39] + [win_tile] + other_tiles[39:]
+
+        observer = RoundsObserver()
+        game = MahjongGame([WinningAgent() for _ in range(0, 4)], walls=[wall], observers=[observer])
+        result = self._run(game.play_round())
+
+        self.assertEqual(len(result.wins), 1)
+        win = result.wins[0]
+        self.assertEqual(win.who, 0)
+        self.assertTrue(win.is_tsumo)
+        self.assertIn('Ittsu', [str(x) for x in win.estimation.yaku])
+        self.assertEqual(sum(result.score_changes), 0)
+        self.assertEqual(result.score_changes[1], -win.estimation.cost['main'])
+        self.assertEqual(observer.results, [result])
+        # dealer repeats the round
+        self.assertEqual(game.dealer, 0)
+        self.assertEqual(game.count_of_honba_sticks, 1)
+
+    def test_game_is_finished(self):
+        observer = RoundsObserver()
+        game = MahjongGame([WinningAgent() for _ in range(0, 4)], seed=1, observers=[observer])
+        result = self._run(game.play())
+
+        self.assertEqual(sum(result.scores), 100000)
+        self.assertEqual(sorted(result.places), [1, 2, 3, 4])
+        self.assertEqual(round(sum(result.uma), 1), 0)
+        self.assertEqual(len(observer.results), result.count_of_rounds)
+        self.assertEqual(observer.results[-1].game_result, result)
+
+    def test_walls_depend_on_seed(self):
+        first_game = MahjongGame([WinningAgent() for _ in range(0, 4)], seed=1)
+        second_game = MahjongGame([WinningAgent() for _ in range(0, 4)], seed=1)
+
+        self.assertEqual(self._run(first_game.play()).scores, self._run(second_game.play()).scores)
+
+    def _run(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from game.engine.agent import GameObserver
+from game.engine.game import MahjongGame
+from game.engine.local_client import LocalClient, play_local_game
+from utils.settings_handler import settings
+
+
+class HandsObserver(GameObserver):
+    """
+    Compare hands of clients with the engine after each discard
+    """
+
+    def __init__(self, clients):
+        self.clients = clients
+        self.game = None
+        self.count_of_checks = 0
+        self.count_of_errors = 0
+
+    def game_started(self, game):
+        self.game = game
+
+    def tile_discarded(self, seat, tile, is_tsumogiri):
+        self.count_of_checks += 1
+        player = self.clients[seat].player
+        if sorted(player.closed_hand) != sorted(self.game.seats[seat].tiles):
+            self.count_of_errors += 1
+
+
+class LocalClientTestCase(unittest.TestCase):
+
+    def test_random_ai_game(self):
+        ai_class = settings.copy(AI_PACKAGE='random').AI_CLASS
+        result = play_local_game([ai_class] * 4, seed=1)
+
+        self.assertEqual(sum(result.scores), 100000)
+        self.assertEqual(sorted(result.places), [1, 2, 3, 4])
+
+    def test_clients_hands_are_the_same_as_in_engine(self):
+        first_version = settings.copy(LOOKAHEAD_TIME_BUDGET=0).AI_CLASS
+        random_ai = settings.copy(AI_PACKAGE='random').AI_CLASS
+
+        clients = [LocalClient(x) for x in [first_version, random_ai, first_version, random_ai]]
+        observer = HandsObserver(clients)
+        game = MahjongGame(clients, seed=1, observers=[observer])
+
+        loop = asyncio.new_event_loop()
+        result = loop.run_until_complete(game.play())
+        loop.close()
+
+        self.assertTrue(observer.count_of_checks > 0)
+        self.assertEqual(observer.count_of_errors, 0)
+        # final scores are set in the same way as in tenhou client
+        for client in clients:
+            self.assertEqual(client.player.scores, result.scores[client.seat])
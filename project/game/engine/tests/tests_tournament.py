@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import math
+import unittest
+
+from game.engine.rules import GameRules
+from game.engine.tournament import (DuplicateStatistics, DuplicateTournament, Tournament, TournamentStatistics,
+                                    mean_interval, ratio_interval)
+
+
+class TournamentTestCase(unittest.TestCase):
+
+    def test_seats_are_rotated(self):
+        tournament = Tournament(['a', 'b', 'c', 'd'], 5, seed=3)
+        games = tournament.build_games()
+
+        self.assertEqual(games[0], (0, '3-0', ['a', 'b', 'c', 'd']))
+        self.assertEqual(games[1], (1, '3-1', ['b', 'c', 'd', 'a']))
+        self.assertEqual(games[3], (3, '3-3', ['d', 'a', 'b', 'c']))
+        self.assertEqual(games[4], (4, '3-4', ['a', 'b', 'c', 'd']))
+
+    def test_random_ai_tournament(self):
+        tournament = Tournament(['random', 'random', 'random', 'random'], 2, rules=GameRules(is_hanchan=False))
+        records = list(tournament.play())
+
+        self.assertEqual([x['game'] for x in records], [0, 1])
+        for record in records:
+            self.assertEqual(sum(record['scores']), 100000)
+            self.assertEqual(sorted(record['places']), [1, 2, 3, 4])
+            self.assertTrue(record['rounds'] >= 4)
+
+        # the same seed gives the same games
+        self.assertEqual(list(tournament.play()), records)
+
+        statistics = TournamentStatistics()
+        for record in records:
+            statistics.add_game(record)
+        values = statistics.to_dict()['random']
+
+        self.assertEqual(values['games'], 8)
+        self.assertEqual(values['rounds'], sum([x['rounds'] for x in records]) * 4)
+        # all seats of games were played by the same package
+        self.assertEqual(values['average_place'], (2.5, 0))
+        self.assertEqual(values['average_score'], (25000, 0))
+
+    def test_duplicate_games(self):
+        tournament = DuplicateTournament('a', 'b', 2, seed=3)
+        games = tournament.build_games()
+
+        self.assertEqual(len(games), 10)
+        self.assertEqual(games[0], (0, '3-0', ['b', 'b', 'b', 'b']))
+        self.assertEqual(games[1], (1, '3-0', ['a', 'b', 'b', 'b']))
+        self.assertEqual(games[4], (4, '3-0', ['b', 'b', 'b', 'a']))
+        self.assertEqual(games[5], (5, '3-1', ['b', 'b', 'b', 'b']))
+
+        self.assertRaises(ValueError, DuplicateTournament, 'a', 'a', 2)
+
+    def test_duplicate_statistics(self):
+        statistics = DuplicateStatistics('a', 'b')
+        # the candidate is 1000 points better than the opponent in each seat
+        self._add_wall(statistics, 0, [40000, 30000, 20000, 10000], 1000)
+
+        values = statistics.to_dict()
+        self.assertEqual(values['score_difference'], (1000, 0))
+        self.assertEqual(values['place_difference'], (0, 0))
+        self.assertEqual(values['unpaired_score_difference'], (1000, 0))
+
+    def test_unpaired_difference_is_calculated_by_walls(self):
+        statistics = DuplicateStatistics('a', 'b')
+        self._add_wall(statistics, 0, [40000, 30000, 20000, 10000], 1000)
+        self._add_wall(statistics, 1, [25000, 25000, 25000, 25000], 3000)
+        self._add_wall(statistics, 2, [10000, 20000, 30000, 40000], 2000)
+
+        values = statistics.to_dict()
+        self.assertEqual(values['walls'], 3)
+        self.assertEqual(values['score_difference'][0], 2000)
+
+        # seats of one wall are not independent samples
+        candidate_score = mean_interval([26000, 28000, 27000])
+        opponent_score = mean_interval([25000, 25000, 25000])
+        self.assertEqual(values['unpaired_score_difference'][0], 2000)
+        self.assertAlmostEqual(values['unpaired_score_difference'][1],
+                               math.sqrt(candidate_score[1] ** 2 + opponent_score[1] ** 2))
+
+    def test_intervals(self):
+        self.assertEqual(mean_interval([]), (0, 0))
+        self.assertEqual(mean_interval([3]), (3, 0))
+
+        mean, half_width = mean_interval([1, 2, 3, 4])
+        self.assertEqual(mean, 2.5)
+        self.assertAlmostEqual(half_width, 1.265, places=3)
+
+        self.assertEqual(ratio_interval([], []), (0, 0))
+        # with one seat in each game it is the usual mean
+        ratio, half_width = ratio_interval([1, 2, 3, 4], [1, 1, 1, 1])
+        self.assertEqual(ratio, 2.5)
+        self.assertAlmostEqual(half_width, 1.265, places=3)
+
+        ratio, half_width = ratio_interval([2, 1, 3, 0], [10, 10, 10, 10])
+        self.assertEqual(ratio, 0.15)
+        self.assertAlmostEqual(half_width, 0.1265, places=4)
+
+    def test_package_intervals_are_calculated_by_games(self):
+        statistics = TournamentStatistics()
+        for game in range(0, 10):
+            places = game % 2 and [1, 2, 3, 4] or [4, 3, 2, 1]
+            statistics.add_game({
+                'game': game,
+                'packages': ['a', 'b', 'b', 'b'],
+                'places': places,
+                'scores': [[40000, 30000, 20000, 10000][x - 1] for x in places],
+                'uma': [[30, 10, -10, -30][x - 1] for x in places],
+                'rounds': 5,
+                'wins': [game % 2, 0, 0, 1],
+                'deal_ins': [0, 0, 0, 0],
+                'riichi': [0, 0, 0, 0],
+                'calls': [0, 0, 0, 0],
+            })
+        values = statistics.to_dict()
+
+        self.assertEqual(values['b']['games'], 30)
+        self.assertEqual(values['b']['rounds'], 150)
+        # places of b seats depend on the place of a in the same game
+        self.assertEqual(values['a']['average_place'][0], 2.5)
+        self.assertAlmostEqual(values['b']['average_place'][0], 2.5)
+        self.assertAlmostEqual(values['b']['average_place'][1], values['a']['average_place'][1] / 3)
+        self.assertEqual(values['a']['win_rate'][0], 0.1)
+        self.assertAlmostEqual(values['b']['win_rate'][0], 1 / 15)
+
+    def _add_wall(self, statistics, seed, baseline_scores, advantage):
+        """
+        The candidate is better than the opponent by the same advantage in each seat of the wall
+        """
+        count_of_walls = statistics.count_of_walls
+        baseline = self._record(['b', 'b', 'b', 'b'], baseline_scores, seed)
+        statistics.add_game(baseline)
+        for seat in range(0, 4):
+            packages = ['b', 'b', 'b', 'b']
+            packages[seat] = 'a'
+            scores = [x - advantage // 3 for x in baseline['scores']]
+            scores[seat] = baseline['scores'][seat] + advantage
+            statistics.add_game(self._record(packages, scores, seed))
+
+            # wall is counted only after all games
+            self.assertEqual(statistics.count_of_walls, count_of_walls + (seat == 3 and 1 or 0))
+
+    def _record(self, packages, scores, seed=0):
+        places = [sorted(scores, reverse=True).index(x) + 1 for x in scores]
+        return {
+            'seed': '{}-0'.format(seed),
+            'packages': packages,
+            'scores': scores,
+            'places': places,
+            'uma': [(x - 30000) / 1000 + [20, 10, -10, -20][y - 1] for x, y in zip(scores, places)],
+        }
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+import math
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from game.engine.agent import GameObserver
+from game.engine.local_client import play_local_game
+from utils.settings_handler import settings
+
+# AI classes of the worker process, by package and settings
+_ai_classes = {}
+
+
+class GameStatistics(GameObserver):
+    """
+    Counts of wins, deal-ins, riichi and calls by seats for one game
+    """
+    count_of_rounds = 0
+    wins = None
+    deal_ins = None
+    riichi = None
+    # rounds with opened hand
+    calls = None
+
+    _opened_seats = None
+
+    def __init__(self):
+        self.count_of_rounds = 0
+        self.wins = [0, 0, 0, 0]
+        self.deal_ins = [0, 0, 0, 0]
+        self.riichi = [0, 0, 0, 0]
+        self.calls = [0, 0, 0, 0]
+        self._opened_seats = set()
+
+    def round_started(self, round_info):
+        self._opened_seats = set()
+
+    def meld_called(self, seat, meld):
+        if meld.opened:
+            self._opened_seats.add(seat)
+
+    def riichi_called(self, seat, step):
+        if step == 1:
+            self.riichi[seat] += 1
+
+    def round_ended(self, result):
+        self.count_of_rounds += 1
+        for seat in self._opened_seats:
+            self.calls[seat] += 1
+
+        for win in result.wins:
+            self.wins[win.who] += 1
+            if not win.is_tsumo:
+                self.deal_ins[win.from_who] += 1
+
+
+def load_ai_class(package, settings_overrides):
+    """
+    AI classes are loaded once for each worker process, like SettingsSingleton.load_ai_class does
+    """
+    key = (package, tuple(sorted(settings_overrides.items())))
+    if key not in _ai_classes:
+        _ai_classes[key] = settings.copy(AI_PACKAGE=package, **settings_overrides).AI_CLASS
+    return _ai_classes[key]
+
+
+def play_tournament_game(game_index, seed, packages, rules, settings_overrides):
+    """
+    Worker function, it takes and returns only plain data, so it can be run in other process
+    :param seed: seed of walls and of the random module (for AI that use it)
+    :param packages: AI packages by seats
+    :return: dictionary with the game results by seats
+    """
+    random.seed(seed)
+    ai_classes = [load_ai_class(x, settings_overrides) for x in packages]
+
+    statistics = GameStatistics()
+    result = play_local_game(ai_classes, rules, seed, [statistics])
+
+    return {
+        'game': game_index,
+        'seed': seed,
+        'packages': list(packages),
+        'scores': result.scores,
+        'uma': result.uma,
+        'places': result.places,
+        'rounds': statistics.count_of_rounds,
+        'wins': statistics.wins,
+        'deal_ins': statistics.deal_ins,
+        'riichi': statistics.riichi,
+        'calls': statistics.calls,
+    }
+
+
+class Tournament(object):
+    """
+    Self-play games between AI packages on seeded walls.
+
+    Games are played in worker processes and results are returned as soon as games are finished.
+    Seats are rotated from game to game, so each package plays from each seat.
+    Walls depend only on the tournament seed and the game index, but AI decisions with time budgets
+    (lookahead, estimator) depend on the machine load, so they should be disabled for reproducible runs
+    """
+    # in worker processes AI shouldn't start own process pools,
+    # lookahead time budget and not seeded estimations make games different on the same walls
+    DEFAULT_SETTINGS = {'ESTIMATOR_WORKERS': 1, 'ESTIMATOR_SEED': 0, 'LOOKAHEAD_TIME_BUDGET': 0}
+
+    packages = None
+    count_of_games = 0
+    seed = None
+    workers = 1
+    rules = None
+    settings_overrides = None
+
+    def __init__(self, packages, count_of_games, seed=0, workers=1, rules=None, settings_overrides=None):
+        """
+        :param packages: list of four AI packages, by seats of the first game
+        :param workers: count of worker processes, 1 to play in the current process
+        :param rules: GameRules
+        :param settings_overrides: dictionary with settings for all AI
+        """
+        self.packages = packages
+        self.count_of_games = count_of_games
+        self.seed = seed
+        self.workers = workers
+        self.rules = rules
+        self.settings_overrides = dict(Tournament.DEFAULT_SETTINGS)
+        self.settings_overrides.update(settings_overrides or {})
+
+    def build_games(self):
+        """
+        :return: list of (game index, seed, packages by seats)
+        """
+        games = []
+        for game_index in range(0, self.count_of_games):
+            shift = game_index % 4
+            packages = self.packages[shift:] + self.packages[:shift]
+            games.append((game_index, '{}-{}'.format(self.seed, game_index), packages))
+        return games
+
+    def play(self):
+        """
+        Generator of game results in the order of finishing
+        """
+        games = self.build_games()
+        if self.workers <= 1:
+            for game_index, seed, packages in games:
+                yield play_tournament_game(game_index, seed, packages, self.rules, self.settings_overrides)
+            return
+
+        # the count of waiting games is limited, so long tournaments will not take all memory
+        max_futures = self.workers * 2
+        games.reverse()
+        futures = set()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while games or futures:
+                while games and len(futures) < max_futures:
+                    game_index, seed, packages = games.pop()
+                    futures.add(executor.submit(play_tournament_game, game_index, seed, packages, self.rules,
+                                                self.settings_overrides))
+
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+class DuplicateTournament(Tournament):
+    """
+    Duplicate games between the candidate and the opponent AI packages.
+
+    Each wall is played by four opponents and then four more times with the candidate in each seat.
+    Results of the candidate are compared with results of the opponent from the same seat on the same wall,
+    so the luck of walls is mostly cancelled out and fewer games are needed to see the difference
+    """
+    GAMES_PER_WALL = 5
+
+    candidate = None
+    opponent = None
+    count_of_walls = 0
+
+    def __init__(self, candidate, opponent, count_of_walls, seed=0, workers=1, rules=None, settings_overrides=None):
+        """
+        :param candidate: AI package to evaluate
+        :param opponent: AI package for other seats and for the baseline games
+        :param count_of_walls: count of walls, each wall is played GAMES_PER_WALL times
+        """
+        if candidate == opponent:
+            raise ValueError('Candidate and opponent should be different AI packages')
+
+        super(DuplicateTournament, self).__init__([opponent] * 4,
+                                                  count_of_walls * DuplicateTournament.GAMES_PER_WALL,
+                                                  seed, workers, rules, settings_overrides)
+        self.candidate = candidate
+        self.opponent = opponent
+        self.count_of_walls = count_of_walls
+
+    def build_games(self):
+        games = []
+        for wall_index in range(0, self.count_of_walls):
+            game_index = wall_index * DuplicateTournament.GAMES_PER_WALL
+            seed = '{}-{}'.format(self.seed, wall_index)
+
+            games.append((game_index, seed, [self.opponent] * 4))
+            for seat in range(0, 4):
+                packages = [self.opponent] * 4
+                packages[seat] = self.candidate
+                games.append((game_index + seat + 1, seed, packages))
+        return games
+
+
+class PackageStatistics(object):
+    """
+    Results of one AI package in all seats it played.
+    Seats of one game are playing the same wall against each other, so they are not independent:
+    results are summed by games and confidence intervals are calculated with games as samples
+    """
+    package = None
+    # count of played seats
+    count_of_games = 0
+    count_of_rounds = 0
+    # game index -> list of results by seats of the package
+    games = None
+
+    def __init__(self, package):
+        self.package = package
+        self.count_of_games = 0
+        self.count_of_rounds = 0
+        self.games = {}
+
+    def add_game(self, record, seat):
+        self.count_of_games += 1
+        self.count_of_rounds += record['rounds']
+        self.games.setdefault(record['game'], []).append({
+            'place': record['places'][seat],
+            'score': record['scores'][seat],
+            'uma': record['uma'][seat],
+            'rounds': record['rounds'],
+            'wins': record['wins'][seat],
+            'deal_ins': record['deal_ins'][seat],
+            'riichi': record['riichi'][seat],
+            'calls': record['calls'][seat],
+        })
+
+    def place_rate(self, place):
+        places = [len([x for x in y if x['place'] == place]) for y in self.games.values()]
+        return ratio_interval(places, self._count_seats_by_games())
+
+    def to_dict(self):
+        """
+        :return: means and rates with 95% confidence intervals as (value, half width) pairs
+        """
+        seats = self._count_seats_by_games()
+        rounds = self._sums_by_games('rounds')
+        return {
+            'package': self.package,
+            'games': self.count_of_games,
+            'rounds': self.count_of_rounds,
+            'average_place': ratio_interval(self._sums_by_games('place'), seats),
+            'average_score': ratio_interval(self._sums_by_games('score'), seats),
+            'average_uma': ratio_interval(self._sums_by_games('uma'), seats),
+            'place_rates': [self.place_rate(x) for x in range(1, 5)],
+            'win_rate': ratio_interval(self._sums_by_games('wins'), rounds),
+            'deal_in_rate': ratio_interval(self._sums_by_games('deal_ins'), rounds),
+            'riichi_rate': ratio_interval(self._sums_by_games('riichi'), rounds),
+            'call_rate': ratio_interval(self._sums_by_games('calls'), rounds),
+        }
+
+    def _count_seats_by_games(self):
+        return [len(x) for x in self.games.values()]
+
+    def _sums_by_games(self, key):
+        """
+        :param key: name of the seat result
+        """
+        return [sum([x[key] for x in y]) for y in self.games.values()]
+
+
+class TournamentStatistics(object):
+    """
+    Aggregated results by AI packages
+    """
+    packages = None
+
+    def __init__(self):
+        self.packages = {}
+
+    def add_game(self, record):
+        for seat, package in enumerate(record['packages']):
+            if package not in self.packages:
+                self.packages[package] = PackageStatistics(package)
+            self.packages[package].add_game(record, seat)
+
+    def to_dict(self):
+        return dict([(x, y.to_dict()) for x, y in self.packages.items()])
+
+    def format_report(self):
+        lines = []
+        for package, values in sorted(self.to_dict().items()):
+            lines.append('{}: {} games, {} rounds'.format(package, values['games'], values['rounds']))
+            lines.append('  average place: {}, score: {}, uma: {}'.format(
+                format_interval(values['average_place'], 3),
+                format_interval(values['average_score'], 0),
+                format_interval(values['average_uma'], 1),
+            ))
+            lines.append('  places: {}'.format(', '.join([format_rate(x) for x in values['place_rates']])))
+            lines.append('  win: {}, deal-in: {}, riichi: {}, call: {}'.format(
+                format_rate(values['win_rate']),
+                format_rate(values['deal_in_rate']),
+                format_rate(values['riichi_rate']),
+                format_rate(values['call_rate']),
+            ))
+        return '\n'.join(lines)
+
+
+class DuplicateStatistics(object):
+    """
+    Paired differences between the candidate and the opponent, by walls.
+    For each seat the candidate result is compared with the opponent result from the baseline game,
+    differences of four seats are averaged and walls are used as independent samples
+    """
+    candidate = None
+    opponent = None
+    count_of_walls = 0
+    score_differences = None
+    place_differences = None
+    uma_differences = None
+    # mean scores by walls without pairing, to compare the width of intervals
+    candidate_scores = None
+    opponent_scores = None
+
+    # games of not finished walls by seeds, baseline game is stored with None seat
+    _walls = None
+
+    def __init__(self, candidate, opponent):
+        self.candidate = candidate
+        self.opponent = opponent
+        self.count_of_walls = 0
+        self.score_differences = []
+        self.place_differences = []
+        self.uma_differences = []
+        self.candidate_scores = []
+        self.opponent_scores = []
+        self._walls = {}
+
+    def add_game(self, record):
+        packages = record['packages']
+        seat = None
+        if self.candidate in packages:
+            seat = packages.index(self.candidate)
+
+        wall = self._walls.setdefault(record['seed'], {})
+        wall[seat] = record
+
+        if len(wall) == DuplicateTournament.GAMES_PER_WALL:
+            del self._walls[record['seed']]
+            self._add_wall(wall)
+
+    def to_dict(self):
+        """
+        :return: mean differences with 95% confidence intervals as (value, half width) pairs
+        """
+        candidate_score = mean_interval(self.candidate_scores)
+        opponent_score = mean_interval(self.opponent_scores)
+        return {
+            'candidate': self.candidate,
+            'opponent': self.opponent,
+            'walls': self.count_of_walls,
+            'score_difference': mean_interval(self.score_differences),
+            'place_difference': mean_interval(self.place_differences),
+            'uma_difference': mean_interval(self.uma_differences),
+            'unpaired_score_difference': (
+                candidate_score[0] - opponent_score[0],
+                math.sqrt(candidate_score[1] ** 2 + opponent_score[1] ** 2)
+            ),
+        }
+
+    def format_report(self):
+        values = self.to_dict()
+        lines = [
+            '{} vs {}: {} walls'.format(values['candidate'], values['opponent'], values['walls']),
+            '  score difference: {} (without pairing ± {:.0f})'.format(
+                format_interval(values['score_difference'], 0),
+                values['unpaired_score_difference'][1],
+            ),
+            '  place difference: {}, uma difference: {}'.format(
+                format_interval(values['place_difference'], 3),
+                format_interval(values['uma_difference'], 1),
+            ),
+        ]
+        return '\n'.join(lines)
+
+    def _add_wall(self, wall):
+        baseline = wall.pop(None)
+
+        candidate_scores = []
+        opponent_scores = []
+        score_differences = []
+        place_differences = []
+        uma_differences = []
+        for seat, record in wall.items():
+            candidate_scores.append(record['scores'][seat])
+            opponent_scores.append(baseline['scores'][seat])
+            score_differences.append(record['scores'][seat] - baseline['scores'][seat])
+            place_differences.append(record['places'][seat] - baseline['places'][seat])
+            uma_differences.append(record['uma'][seat] - baseline['uma'][seat])
+
+        # games of one wall are not independent, so unpaired results are also averaged by walls
+        self.count_of_walls += 1
+        self.candidate_scores.append(sum(candidate_scores) / len(candidate_scores))
+        self.opponent_scores.append(sum(opponent_scores) / len(opponent_scores))
+        self.score_differences.append(sum(score_differences) / len(score_differences))
+        self.place_differences.append(sum(place_differences) / len(place_differences))
+        self.uma_differences.append(sum(uma_differences) / len(uma_differences))
+
+
+def mean_interval(values, z=1.96):
+    """
+    :return: mean and half width of the confidence interval
+    """
+    count = len(values)
+    if not count:
+        return 0, 0
+
+    mean = sum(values) / count
+    if count == 1:
+        return mean, 0
+
+    variance = sum([(x - mean) ** 2 for x in values]) / (count - 1)
+    return mean, z * math.sqrt(variance / count)
+
+
+def ratio_interval(numerators, denominators, z=1.96):
+    """
+    Ratio of sums for clustered samples, like wins and rounds of the package summed by games.
+    Variance is estimated from differences between clusters (linearization of the ratio)
+    :return: ratio and half width of the confidence interval
+    """
+    total = sum(denominators)
+    if not total:
+        return 0, 0
+
+    ratio = sum(numerators) / total
+    count = len(numerators)
+    if count == 1:
+        return ratio, 0
+
+    residuals = sum([(x - ratio * y) ** 2 for x, y in zip(numerators, denominators)])
+    return ratio, z * math.sqrt(residuals * count / (count - 1)) / total
+
+
+def format_interval(interval, digits):
+    return '{:.{digits}f} ± {:.{digits}f}'.format(interval[0], interval[1], digits=digits)
+
+
+def format_rate(interval):
+    return '{:.1f}% ± {:.1f}%'.format(interval[0] * 100, interval[1] * 100)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import random
+
+
+class Wall(object):
+    """
+    Shuffled 136 tiles. Players are drawing from the live wall,
+    the last 14 tiles are the dead wall with kan replacement tiles and dora indicators
+    """
+    DEAD_WALL_SIZE = 14
+    MAX_KANS = 4
+
+    tiles = None
+    dice = None
+    count_of_kans = 0
+    count_of_revealed_dora = 0
+
+    _position = 0
+
+    def __init__(self, seed=None, tiles=None):
+        """
+        :param seed: the same seed gives the same wall
+        :param tiles: ready wall in 136 tiles format, seed is used only for dice with it
+        """
+        rng = random.Random(seed)
+        if tiles is None:
+            tiles = list(range(0, 136))
+            rng.shuffle(tiles)
+
+        self.tiles = tiles
+        self.dice = [rng.randrange(0, 6), rng.randrange(0, 6)]
+        self.count_of_kans = 0
+        self.count_of_revealed_dora = 1
+        self._position = 0
+
+    def deal(self, count_of_players=4):
+        """
+        :return: list of 13 tiles hands
+        """
+        hands = []
+        for _ in range(0, count_of_players):
+            hands.append(self.tiles[self._position:self._position + 13])
+            self._position += 13
+        return hands
+
+    def draw(self):
+        tile = self.tiles[self._position]
+        self._position += 1
+        return tile
+
+    def draw_replacement(self):
+        """
+        Draw after kan, live wall becomes shorter by one tile
+        """
+        tile = self.tiles[-1 - self.count_of_kans]
+        self.count_of_kans += 1
+        return tile
+
+    def reveal_dora(self):
+        """
+        :return: new dora indicator
+        """
+        self.count_of_revealed_dora += 1
+        return self.dora_indicators[-1]
+
+    @property
+    def remaining(self):
+        return len(self.tiles) - Wall.DEAD_WALL_SIZE - self._position - self.count_of_kans
+
+    @property
+    def dora_indicators(self):
+        # indicators are going after four kan replacement tiles
+        return [self.tiles[-5 - i * 2] for i in range(0, self.count_of_revealed_dora)]
+
+    @property
+    def ura_dora_indicators(self):
+        return [self.tiles[-6 - i * 2] for i in range(0, self.count_of_revealed_dora)]
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+
+class HandTiles(list):
+    """
+    List of tiles in 136 format that keeps count of tiles in 34 format in sync.
+    All list changes are supported, so it can be used as a usual list.
+
+    Listener is notified about each change with hand_changed(operation, tile) call,
+    operation is one of append, remove, sort, reverse or reset (any other change)
+    """
+    __slots__ = ('tiles_34', 'version', 'listener')
+
+    def __init__(self, tiles=None):
+        super().__init__(tiles or [])
+        self.listener = None
+        self._rebuild()
+
+    def append(self, tile):
+        super().append(tile)
+        self._add(tile)
+        self._notify('append', tile)
+
+    def insert(self, index, tile):
+        super().insert(index, tile)
+        self._add(tile)
+        self._notify('reset')
+
+    def extend(self, tiles):
+        tiles = list(tiles)
+        super().extend(tiles)
+        for tile in tiles:
+            self._add(tile)
+            self._notify('append', tile)
+
+    def __iadd__(self, tiles):
+        self.extend(tiles)
+        return self
+
+    def __imul__(self, count):
+        super().__imul__(count)
+        self._rebuild()
+        return self
+
+    def remove(self, tile):
+        super().remove(tile)
+        self._remove(tile)
+        self._notify('remove', tile)
+
+    def pop(self, index=-1):
+        tile = super().pop(index)
+        self._remove(tile)
+        self._notify('remove', tile)
+        return tile
+
+    def clear(self):
+        super().clear()
+        self._rebuild()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        # counts are the same, but order of tiles was changed
+        self.version += 1
+        self._notify(not args and not kwargs and 'sort' or 'reset')
+
+    def reverse(self):
+        super().reverse()
+        self.version += 1
+        self._notify('reverse')
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._rebuild()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._rebuild()
+
+    def __copy__(self):
+        return HandTiles(self)
+
+    def __deepcopy__(self, memo):
+        # tiles are integers, so they are not copied
+        return HandTiles(self)
+
+    def __reduce__(self):
+        # counts in 34 format are restored from tiles, they are not a part of the pickled state
+        return HandTiles, (list(self),)
+
+    def _add(self, tile):
+        self.tiles_34[tile // 4] += 1
+        self.version += 1
+
+    def _remove(self, tile):
+        self.tiles_34[tile // 4] -= 1
+        self.version += 1
+
+    def _rebuild(self):
+        self.tiles_34 = [0] * 34
+        for tile in self:
+            self.tiles_34[tile // 4] += 1
+        self.version = getattr(self, 'version', 0) + 1
+        self._notify('reset')
+
+    def _notify(self, operation, tile=None):
+        if self.listener:
+            self.listener.hand_changed(operation, tile)
+
+
+class HandState(object):
+    """
+    Tiles of our hand with cached 34 format views,
+    so we don't need to convert the hand for each check during the decision.
+
+    Closed hand is updated on each draw and discard, it is rebuilt only after meld changes
+    or changes of the tiles list that can't be repeated on the closed hand
+    """
+    __slots__ = ('tiles', '_meld_tiles', '_meld_tiles_set', '_closed_hand', '_closed_hand_34')
+
+    def __init__(self, tiles=None):
+        self.set_tiles(tiles)
+
+    def set_tiles(self, tiles):
+        self.tiles = HandTiles(tiles)
+        self.tiles.listener = self
+        self._meld_tiles = None
+        self._meld_tiles_set = frozenset()
+        self._closed_hand = None
+        self._closed_hand_34 = None
+
+    def add_tile(self, tile):
+        """
+        Add tile and keep the hand sorted
+        :param tile: 136 tile format
+        """
+        self.tiles.append(tile)
+        self.tiles.sort()
+
+    @property
+    def tiles_34(self):
+        """
+        :return: copy of the hand in 34 tiles format
+        """
+        return self.tiles.tiles_34[:]
+
+    def closed_hand(self, meld_tiles):
+        """
+        :param meld_tiles: tiles of all melds in 136 format
+        :return: copy of the closed part of the hand in 136 tiles format
+        """
+        self._update_closed_hand(meld_tiles)
+        return self._closed_hand[:]
+
+    def closed_hand_34(self, meld_tiles):
+        """
+        :param meld_tiles: tiles of all melds in 136 format
+        :return: copy of the closed part of the hand in 34 tiles format
+        """
+        self._update_closed_hand(meld_tiles)
+        return self._closed_hand_34[:]
+
+    def hand_changed(self, operation, tile):
+        """
+        Repeat the change of the tiles list on the closed hand
+        """
+        if self._closed_hand is None:
+            return
+
+        if operation == 'sort':
+            self._closed_hand.sort()
+        elif operation == 'reverse':
+            self._closed_hand.reverse()
+        elif operation == 'reset':
+            self._closed_hand = None
+        elif tile not in self._meld_tiles_set:
+            if operation == 'append':
+                self._closed_hand.append(tile)
+                self._closed_hand_34[tile // 4] += 1
+            else:
+                self._closed_hand.remove(tile)
+                self._closed_hand_34[tile // 4] -= 1
+
+    def _update_closed_hand(self, meld_tiles):
+        meld_tiles = tuple(meld_tiles)
+        if self._closed_hand is not None and meld_tiles == self._meld_tiles:
+            return
+
+        self._meld_tiles = meld_tiles
+        self._meld_tiles_set = frozenset(meld_tiles)
+        self._closed_hand = [x for x in self.tiles if x not in self._meld_tiles_set]
+        self._closed_hand_34 = [0] * 34
+        for tile in self._closed_hand:
+            self._closed_hand_34[tile // 4] += 1
@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 import logging
-import copy
 
 from mahjong.constants import EAST, SOUTH, WEST, NORTH, CHUN, HAKU, HATSU
 from mahjong.meld import Meld
 from mahjong.tile import TilesConverter, Tile
 
+from game.hand import HandState
 from utils.settings_handler import settings
 
 logger = logging.getLogger('tenhou')
@@ -14,7 +14,6 @@ logger = logging.getLogger('tenhou')
 class PlayerInterface(object):
     table = None
     discards = None
-    melds = None
     in_riichi = None
 
     # current player seat
@@ -32,6 +31,13 @@ class PlayerInterface(object):
     name = ''
     rank = ''
 
+    # melds and their views are tuples, so callers can't change them.
+    # Views are updated on each meld change, opened flag of the meld can be changed in place
+    _melds = ()
+    _meld_tiles = ()
+    _opened_flags = ()
+    _open_hand_34_tiles = None
+
     def __init__(self, table, seat, dealer_seat):
         self.table = table
         self.seat = seat
@@ -65,9 +71,10 @@ class PlayerInterface(object):
         if meld.type == Meld.CHANKAN:
             tile_34 = meld.tiles[0] // 4
             pon_set = [x for x in self.melds if x.type == Meld.PON and (x.tiles[0] // 4) == tile_34]
-            self.melds.remove(pon_set[0])
+            self.melds = [x for x in self._melds if x is not pon_set[0]]
 
-        self.melds.append(meld)
+        self._melds += (meld,)
+        self._meld_tiles += tuple(meld.tiles)
 
     def add_discarded_tile(self, tile: Tile):
         self.discards.append(tile)
@@ -95,39 +102,53 @@ class PlayerInterface(object):
     def is_dealer(self):
         return self.seat == self.dealer_seat
 
+    @property
+    def melds(self):
+        """
+        Tuple of melds, use add_called_meld or assign a new list to change them
+        :return: tuple
+        """
+        return self._melds
+
+    @melds.setter
+    def melds(self, melds):
+        self._melds = tuple(melds)
+        self._meld_tiles = ()
+        for meld in self._melds:
+            self._meld_tiles += tuple(meld.tiles)
+
     @property
     def is_open_hand(self):
-        opened_melds = [x for x in self.melds if x.opened]
-        return len(opened_melds) > 0
+        return any([x.opened for x in self._melds])
 
     @property
     def meld_tiles(self):
         """
-        Array of 136 tiles format
+        Tuple of 136 tiles format
         :return:
         """
-        result = []
-        for meld in self.melds:
-            result.extend(meld.tiles)
-        return result
+        return self._meld_tiles
 
 
 class Player(PlayerInterface):
     ai = None
-    tiles = None
+    hand = None
     last_draw = None
     in_tempai = False
     in_defence_mode = False
 
-    def __init__(self, table, seat, dealer_seat):
+    def __init__(self, table, seat, dealer_seat, ai_class=None):
+        """
+        :param ai_class: AI implementation, by default AI from the global settings is used
+        """
         super().__init__(table, seat, dealer_seat)
 
-        self.ai = settings.AI_CLASS(self)
+        self.ai = (ai_class or settings.AI_CLASS)(self)
 
     def erase_state(self):
         super().erase_state()
 
-        self.tiles = []
+        self.hand = HandState()
         self.last_draw = None
         self.in_tempai = False
         self.in_defence_mode = False
@@ -142,10 +163,9 @@ class Player(PlayerInterface):
 
     def draw_tile(self, tile):
         self.last_draw = tile
-        self.tiles.append(tile)
 
         # we need sort it to have a better string presentation
-        self.tiles = sorted(self.tiles)
+        self.hand.add_tile(tile)
 
         self.ai.draw_tile(tile)
 
@@ -195,6 +215,12 @@ class Player(PlayerInterface):
     def try_to_call_meld(self, tile, is_kamicha_discard):
         return self.ai.try_to_call_meld(tile, is_kamicha_discard)
 
+    def prepare_calls(self):
+        return self.ai.prepare_calls()
+
+    def prepare_discards(self):
+        return self.ai.prepare_discards()
+
     def enemy_called_riichi(self, player_seat):
         self.ai.enemy_called_riichi(player_seat)
 
@@ -226,23 +252,42 @@ class Player(PlayerInterface):
             hand_string += ' [{}]'.format(', '.join(melds))
         return hand_string
 
+    @property
+    def tiles(self):
+        """
+        Array of 136 tiles format, it keeps tiles_34 in sync
+        """
+        return self.hand.tiles
+
+    @tiles.setter
+    def tiles(self, tiles):
+        self.hand.set_tiles(tiles)
+
+    @property
+    def tiles_34(self):
+        return self.hand.tiles_34
+
     @property
     def closed_hand(self):
-        tiles = self.tiles[:]
-        return [item for item in tiles if item not in self.meld_tiles]
+        return self.hand.closed_hand(self.meld_tiles)
+
+    @property
+    def closed_hand_34(self):
+        return self.hand.closed_hand_34(self.meld_tiles)
 
     @property
     def open_hand_34_tiles(self):
         """
-        Array of array with 34 tiles indices
-        :return: array
+        Tuple of tuples with 34 tiles indices
+        :return: tuple
         """
-        melds = [x.tiles for x in self.melds if x.opened]
-        melds = copy.deepcopy(melds)
-        results = []
-        for meld in melds:
-            results.append([meld[0] // 4, meld[1] // 4, meld[2] // 4])
-        return results
+        # the view is built again after a meld change
+        opened_flags = tuple([(x, x.opened) for x in self.melds])
+        if self._open_hand_34_tiles is None or opened_flags != self._opened_flags:
+            melds = [x.tiles for x in self.melds if x.opened]
+            self._open_hand_34_tiles = tuple([(x[0] // 4, x[1] // 4, x[2] // 4) for x in melds])
+            self._opened_flags = opened_flags
+        return self._open_hand_34_tiles
 
     @property
     def valued_honors(self):
@@ -29,8 +29,11 @@ class Table(object):
     has_open_tanyao = False
     has_aka_dora = False
 
-    def __init__(self):
-        self._init_players()
+    def __init__(self, ai_class=None):
+        """
+        :param ai_class: AI implementation for our player, by default AI from the global settings is used
+        """
+        self._init_players(ai_class)
         self.dora_indicators = []
         self.revealed_tiles = [0] * 34
 
@@ -164,8 +167,8 @@ class Table(object):
         tile //= 4
         self.revealed_tiles[tile] += 1
 
-    def _init_players(self,):
-        self.player = Player(self, 0, self.dealer_seat)
+    def _init_players(self, ai_class):
+        self.player = Player(self, 0, self.dealer_seat, ai_class)
 
         self.players = [self.player]
         for seat in range(1, self.count_of_players):
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import copy
+import pickle
+import unittest
+
+from mahjong.tests_mixin import TestMixin
+
+from game.hand import HandState, HandTiles
+from game.table import Table
+
+
+class HandStateTestCase(unittest.TestCase, TestMixin):
+
+    def test_hand_tiles_are_in_sync(self):
+        tiles = HandTiles(self._string_to_136_array(man='123', pin='55'))
+        self.assertEqual(tiles.tiles_34, self._to_34_array(tiles))
+
+        tiles.append(self._string_to_136_tile(sou='1'))
+        tiles.remove(tiles[0])
+        tiles.extend(self._string_to_136_array(honors='77'))
+        tiles.pop()
+        tiles[0] = self._string_to_136_tile(sou='9')
+        self.assertEqual(tiles.tiles_34, self._to_34_array(tiles))
+
+        tiles *= 2
+        self.assertEqual(tiles.tiles_34, self._to_34_array(tiles))
+
+        tiles.clear()
+        self.assertEqual(tiles.tiles_34, [0] * 34)
+
+    def test_hand_tiles_copies(self):
+        tiles = HandTiles(self._string_to_136_array(man='123', pin='55'))
+
+        for result in [copy.copy(tiles), copy.deepcopy(tiles), pickle.loads(pickle.dumps(tiles))]:
+            self.assertIsInstance(result, HandTiles)
+            self.assertEqual(result, tiles)
+            self.assertEqual(result.tiles_34, self._to_34_array(tiles))
+
+            # copy has own counts
+            result.append(self._string_to_136_tile(sou='1'))
+            self.assertEqual(tiles.tiles_34, self._to_34_array(tiles))
+
+    def test_closed_hand(self):
+        hand = HandState(self._string_to_136_array(man='123', pin='555'))
+        meld_tiles = self._string_to_136_array(man='123')
+
+        self.assertEqual(hand.closed_hand(meld_tiles), self._string_to_136_array(pin='555'))
+        self.assertEqual(hand.closed_hand_34(meld_tiles), self._string_to_34_array(pin='555'))
+
+        hand.add_tile(self._string_to_136_tile(pin='1'))
+        self.assertEqual(hand.closed_hand_34(meld_tiles), self._string_to_34_array(pin='1555'))
+        self.assertEqual(hand.closed_hand_34([]), self._string_to_34_array(man='123', pin='1555'))
+
+    def test_closed_hand_is_updated_without_rebuilding(self):
+        hand = HandState(self._string_to_136_array(man='123', pin='555', sou='89'))
+        meld_tiles = tuple(self._string_to_136_array(man='123'))
+        closed_hand = hand.closed_hand(meld_tiles)
+
+        hand.add_tile(self._string_to_136_tile(sou='1'))
+        hand.tiles.remove(self._string_to_136_tile(sou='9'))
+        hand.tiles.append(self._string_to_136_tile(honors='7'))
+        hand.tiles.reverse()
+        hand.tiles.pop()
+
+        expected = [x for x in hand.tiles if x not in meld_tiles]
+        built_hand = hand._closed_hand
+        self.assertNotEqual(closed_hand, expected)
+        self.assertEqual(hand.closed_hand(meld_tiles), expected)
+        self.assertEqual(hand.closed_hand_34(meld_tiles), self._to_34_array(expected))
+        self.assertIs(hand._closed_hand, built_hand)
+
+        # other changes and new melds are rebuilding it
+        hand.tiles.insert(0, self._string_to_136_tile(honors='1'))
+        self.assertEqual(hand.closed_hand(meld_tiles), [x for x in hand.tiles if x not in meld_tiles])
+        self.assertEqual(hand.closed_hand([]), hand.tiles)
+
+        # listener is not copied
+        self.assertIsNone(copy.copy(hand.tiles).listener)
+
+    def test_player_views_are_updated(self):
+        table = Table()
+        player = table.player
+
+        player.init_hand(self._string_to_136_array(man='123456789', sou='167', honors='7'))
+        player.draw_tile(self._string_to_136_tile(honors='7'))
+        self.assertEqual(player.tiles_34, self._to_34_array(player.tiles))
+        self.assertEqual(player.tiles, sorted(player.tiles))
+
+        # client can change the list directly
+        player.tiles.append(self._string_to_136_tile(honors='1'))
+        self.assertEqual(player.closed_hand_34, self._to_34_array(player.tiles))
+
+        # views are copies
+        player.tiles_34[0] = 4
+        self.assertEqual(player.tiles_34, self._to_34_array(player.tiles))
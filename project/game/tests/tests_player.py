@@ -115,3 +115,36 @@ class PlayerTestCase(unittest.TestCase, TestMixin):
         player.add_called_meld(self._make_meld(Meld.PON, honors='555'))
 
         self.assertEqual(len(player.closed_hand), 10)
+
+    def test_player_called_meld_and_meld_views(self):
+        table = Table()
+        player = table.player
+
+        tiles = self._string_to_136_array(sou='123678', pin='3599', honors='555')
+        player.init_hand(tiles)
+
+        self.assertFalse(player.is_open_hand)
+        self.assertEqual(player.open_hand_34_tiles, ())
+
+        player.add_called_meld(self._make_meld(Meld.KAN, is_open=False, pin='9999'))
+        self.assertFalse(player.is_open_hand)
+        self.assertEqual(player.open_hand_34_tiles, ())
+
+        player.add_called_meld(self._make_meld(Meld.PON, honors='555'))
+        self.assertTrue(player.is_open_hand)
+        self.assertEqual(player.open_hand_34_tiles, ((31, 31, 31),))
+        self.assertEqual(len(player.meld_tiles), 7)
+
+        # the same view is returned until melds are changed
+        self.assertIs(player.open_hand_34_tiles, player.open_hand_34_tiles)
+
+        # melds can be changed only by player methods
+        self.assertIsInstance(player.melds, tuple)
+
+        player.melds[0].opened = True
+        self.assertEqual(player.open_hand_34_tiles, ((17, 17, 17), (31, 31, 31)))
+
+        player.melds = []
+        self.assertFalse(player.is_open_hand)
+        self.assertEqual(player.open_hand_34_tiles, ())
+        self.assertEqual(player.meld_tiles, ())
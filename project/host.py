@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Endpoint to run many bots in one process. Sessions are configured with HOST_SESSIONS setting
+"""
+import asyncio
+import logging
+from optparse import OptionParser
+
+from tenhou.host import BotHost
+from utils.logger import set_up_logging
+from utils.settings_handler import settings
+
+logger = logging.getLogger('tenhou')
+
+
+def parse_args_and_set_up_settings():
+    parser = OptionParser()
+
+    parser.add_option('-n', '--sessions',
+                      type='int',
+                      default=1,
+                      help='Count of sessions with default settings, it is used when HOST_SESSIONS is empty. '
+                           'Sessions require different user ids, so only one session can be started '
+                           'with default settings. Default is 1')
+
+    parser.add_option('-t', '--hang_timeout',
+                      type='int',
+                      default=settings.SESSION_HANG_TIMEOUT_MINUTES,
+                      help='Session will be restarted if there were no messages from the server for this time. '
+                           'Default is {0} minutes'.format(settings.SESSION_HANG_TIMEOUT_MINUTES))
+
+    opts, _ = parser.parse_args()
+
+    settings.SESSION_HANG_TIMEOUT_MINUTES = opts.hang_timeout
+
+    sessions = settings.HOST_SESSIONS or [{}] * opts.sessions
+    opts.sessions_settings = [settings.copy(**x) for x in sessions]
+
+    # tenhou doesn't allow two connections with the same user id
+    user_ids = [x.USER_ID for x in opts.sessions_settings]
+    if len(set(user_ids)) != len(user_ids):
+        parser.error('Each session requires own USER_ID, configure sessions with HOST_SESSIONS setting')
+    opts.user_ids = user_ids
+
+    return opts
+
+
+def main():
+    opts = parse_args_and_set_up_settings()
+    set_up_logging(opts.user_ids)
+
+    host = BotHost(opts.sessions_settings, 60 * settings.SESSION_HANG_TIMEOUT_MINUTES)
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(host.run())
+    except KeyboardInterrupt:
+        logger.info('Stopping the host...')
+        host.stop()
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        settings.AI_CLASS.release_resources()
+
+
+if __name__ == '__main__':
+    main()
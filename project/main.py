@@ -15,7 +15,8 @@ def parse_args_and_set_up_settings():
     parser.add_option('-u', '--user_id',
                       type='string',
                       default=settings.USER_ID,
-                      help='Tenhou\'s user id. Example: IDXXXXXXXX-XXXXXXXX. Default is {0}'.format(settings.USER_ID))
+                      help='Tenhou\'s user id. Example: IDXXXXXXXX-XXXXXXXX. '
+                           'Use comma separated ids for many sessions. Default is {0}'.format(settings.USER_ID))
 
     parser.add_option('-g', '--game_type',
                       type='string',
@@ -43,9 +44,22 @@ def parse_args_and_set_up_settings():
                       default=settings.AI_PACKAGE,
                       help='AI package')
 
+    parser.add_option('-s', '--sessions',
+                      type='int',
+                      default=0,
+                      help='Count of bots that will play at the same time in one process, '
+                           'each bot requires own user id. Default is count of user ids')
+
     opts, _ = parser.parse_args()
 
-    settings.USER_ID = opts.user_id
+    # tenhou doesn't allow two connections with the same user id
+    user_ids = opts.user_id.split(',')
+    opts.sessions = opts.sessions or len(user_ids)
+    if len(set(user_ids)) != len(user_ids) or len(user_ids) != opts.sessions:
+        parser.error('{} sessions require {} different user ids'.format(opts.sessions, opts.sessions))
+    opts.user_ids = user_ids
+
+    settings.USER_ID = user_ids[0]
     settings.GAME_TYPE = opts.game_type
     settings.LOBBY = opts.lobby
     settings.WAITING_GAME_TIMEOUT_MINUTES = opts.timeout
@@ -58,12 +72,15 @@ def parse_args_and_set_up_settings():
         settings.IS_TOURNAMENT = True
         settings.LOBBY = opts.championship
 
+    return opts
+
 
 def main():
-    parse_args_and_set_up_settings()
-    set_up_logging()
+    opts = parse_args_and_set_up_settings()
+    # many sessions have own log files
+    set_up_logging(len(opts.user_ids) > 1 and opts.user_ids or None)
 
-    connect_and_play()
+    connect_and_play(opts.user_ids)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Performance regression gate. Decision benchmark is run for two git revisions or two AI packages on the same corpus,
+the command fails if any hot path became slower (or allocates more memory) than the threshold allows.
+Benchmarks of two sides are run alternately several times and compared by pairs of runs
+"""
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from optparse import OptionParser
+
+from tenhou.benchmark import DecisionBenchmark, compare_benchmarks, load_corpus, min_repeats, run_alternately
+
+logger = logging.getLogger('tenhou')
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+
+
+def parse_args():
+    parser = OptionParser()
+
+    parser.add_option('-r', '--revisions',
+                      type='string',
+                      default='HEAD',
+                      help='Baseline and candidate git revisions separated by comma. '
+                           'Without candidate the working tree is used. Default is HEAD')
+
+    parser.add_option('-a', '--ai',
+                      type='string',
+                      default='first_version',
+                      help='AI package, or baseline and candidate packages separated by comma. '
+                           'Two packages are compared in the working tree. Default is first_version')
+
+    parser.add_option('-c', '--corpus',
+                      type='string',
+                      default=os.path.join(PROJECT_DIRECTORY, 'logs', 'benchmark'),
+                      help='Directory with tenhou logs. Default is logs/benchmark')
+
+    parser.add_option('-t', '--threshold',
+                      type='float',
+                      default=0.1,
+                      help='Allowed slowdown or memory growth of hot paths, 0.1 is 10%. Default is 0.1')
+
+    parser.add_option('-p', '--paths',
+                      type='string',
+                      default=','.join(DecisionBenchmark.HOT_PATHS),
+                      help='Compared call types separated by comma. Default is {}'.format(
+                          ','.join(DecisionBenchmark.HOT_PATHS)))
+
+    parser.add_option('-s', '--significance',
+                      type='float',
+                      default=0.05,
+                      help='Slowdown or memory growth should be confirmed by the sign test of run pairs '
+                           'with this p value. Default is 0.05')
+
+    parser.add_option('--repeats',
+                      type='int',
+                      default=7,
+                      help='Count of benchmark runs for each side, with 0.05 significance at least 5 runs '
+                           'are needed. Default is 7')
+
+    parser.add_option('-n', '--no_memory',
+                      action='store_true',
+                      default=False,
+                      help='Compare only latencies. Memory tracing requires Python 3.9+')
+
+    parser.add_option('-l', '--lookahead',
+                      type='float',
+                      default=0,
+                      help='Time budget for the lookahead of first_version AI. Default is 0')
+
+    opts, _ = parser.parse_args()
+
+    repeats = min_repeats(opts.significance)
+    if opts.repeats < repeats:
+        parser.error('With {} significance at least {} repeats are needed'.format(opts.significance, repeats))
+
+    return opts
+
+
+def git(*args):
+    return subprocess.check_output(('git',) + args, cwd=PROJECT_DIRECTORY).decode('utf-8').strip()
+
+
+def run_benchmark(project_directory, ai_package, opts, output, with_memory):
+    """
+    Benchmark is started in a new process from the tested tree, so it uses the code of this tree only
+    """
+    if not os.path.exists(os.path.join(project_directory, 'benchmark.py')):
+        raise ValueError('There is no decision benchmark in {}'.format(project_directory))
+
+    command = [
+        sys.executable, 'benchmark.py',
+        '--ai', ai_package,
+        '--corpus', os.path.abspath(opts.corpus),
+        '--lookahead', str(opts.lookahead),
+        '--warm_up',
+        '--output', output,
+    ]
+    if with_memory:
+        command.append('--memory')
+
+    subprocess.check_call(command, cwd=project_directory)
+    with open(output, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    opts = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    if not os.path.exists(opts.corpus) or not load_corpus(opts.corpus):
+        logger.error('There are no logs in {}, use benchmark.py --generate to create them'.format(opts.corpus))
+        sys.exit(2)
+
+    packages = opts.ai.split(',')
+    revisions = opts.revisions.split(',')
+
+    temp_directory = tempfile.mkdtemp()
+    worktrees = []
+    try:
+        # (label, project directory, AI package) for baseline and candidate
+        runs = []
+        if len(packages) == 2:
+            runs.append((packages[0], PROJECT_DIRECTORY, packages[0]))
+            runs.append((packages[1], PROJECT_DIRECTORY, packages[1]))
+        else:
+            # project can be in the subdirectory of the repository
+            top_level = git('rev-parse', '--show-toplevel')
+            prefix = git('rev-parse', '--show-prefix')
+            for revision in revisions[:2]:
+                worktree = os.path.join(temp_directory, 'tree-{}'.format(len(worktrees)))
+                git('worktree', 'add', '--detach', worktree, revision)
+                worktrees.append(worktree)
+                runs.append((revision, os.path.join(worktree, prefix), packages[0]))
+
+            if len(revisions) == 1:
+                runs.append(('working tree', os.path.join(top_level, prefix), packages[0]))
+
+        def benchmark(side):
+            label, project_directory, ai_package = runs[side]
+
+            def run(repetition):
+                logger.info('Benchmark of {} ({}), run {} of {}'.format(
+                    label, ai_package, repetition + 1, opts.repeats))
+                output = os.path.join(temp_directory, 'results-{}-{}.json'.format(side, repetition))
+                return run_benchmark(project_directory, ai_package, opts, output, not opts.no_memory)
+            return run
+
+        baseline_runs, candidate_runs = run_alternately(benchmark(0), benchmark(1), opts.repeats)
+    finally:
+        for worktree in worktrees:
+            git('worktree', 'remove', '--force', worktree)
+        shutil.rmtree(temp_directory)
+
+    comparison = compare_benchmarks(baseline_runs, candidate_runs, opts.paths.split(','), opts.threshold,
+                                    opts.significance)
+
+    print('{} -> {}'.format(runs[0][0], runs[1][0]))
+    for item in comparison:
+        if item['metric'] == 'memory':
+            values = '{:.1f} KiB -> {:.1f} KiB'.format(item['baseline'] / 1024, item['candidate'] / 1024)
+        else:
+            values = '{:.4f} ms -> {:.4f} ms'.format(item['baseline'], item['candidate'])
+        values += ', p={:.4f}'.format(item['p_value'])
+        print('  {} {}: {} ({:+.1f}%){}'.format(item['call_type'], item['metric'], values,
+                                                (item['ratio'] - 1) * 100,
+                                                item['is_regression'] and ' REGRESSION' or ''))
+
+    if [x for x in comparison if x['is_regression']]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
+import asyncio
 import logging
 import os
-import re
 from optparse import OptionParser
 
 import requests
@@ -36,18 +36,17 @@ class TenhouLogReproducer(object):
 
         player_draw = draw_tags[self.player_position]
 
-        player_draw_regex = re.compile('^<[{}]+\d*'.format(''.join(player_draw)))
-        discard_regex = re.compile('^<[{}]+\d*'.format(''.join(discard_tags)))
-
         table = Table()
-        for tag in self.round_content:
+        for message in self.round_content:
             if dry_run:
-                print(tag)
+                print(message)
 
-            if not dry_run and tag == self.stop_tag:
+            if not dry_run and message == self.stop_tag:
                 break
 
-            if 'INIT' in tag:
+            tag = self.decoder.parse_tag(message)
+
+            if tag.name == 'INIT':
                 values = self.decoder.parse_initial_values(tag)
 
                 shifted_scores = []
@@ -72,13 +71,12 @@ class TenhouLogReproducer(object):
 
                 table.player.init_hand(hands[self.player_position])
 
-            if player_draw_regex.match(tag) and 'UN' not in tag:
-                tile = self.decoder.parse_tile(tag)
-                table.player.draw_tile(tile)
+            if tag.name.upper() == player_draw and tag.tile is not None:
+                table.player.draw_tile(tag.tile)
 
-            if discard_regex.match(tag) and 'DORA' not in tag:
-                tile = self.decoder.parse_tile(tag)
-                player_sign = tag.upper()[1]
+            if tag.name.upper() in discard_tags and tag.tile is not None:
+                tile = tag.tile
+                player_sign = tag.name.upper()
                 player_seat = self._normalize_position(self.player_position, discard_tags.index(player_sign))
 
                 if player_seat == 0:
@@ -86,7 +84,7 @@ class TenhouLogReproducer(object):
                 else:
                     table.add_discarded_tile(player_seat, tile, False)
 
-            if '<N who=' in tag:
+            if tag.name == 'N' and 'who' in tag.attributes:
                 meld = self.decoder.parse_meld(tag)
                 player_seat = self._normalize_position(self.player_position, meld.who)
                 table.add_called_meld(player_seat, meld)
@@ -97,7 +95,7 @@ class TenhouLogReproducer(object):
                     if meld.type != Meld.KAN and meld.type != Meld.CHANKAN:
                         table.player.draw_tile(meld.called_tile)
 
-            if '<REACH' in tag and 'step="1"' in tag:
+            if tag.name == 'REACH' and tag.attributes.get('step') == '1':
                 who_called_riichi = self._normalize_position(self.player_position,
                                                              self.decoder.parse_who_called_riichi(tag))
                 table.add_called_riichi(who_called_riichi)
@@ -162,46 +160,13 @@ class TenhouLogReproducer(object):
         :param log_content:
         :return:
         """
-        rounds = []
-
-        game_round = []
-        tag_start = 0
-        tag = None
-        for x in range(0, len(log_content)):
-            if log_content[x] == '>':
-                tag = log_content[tag_start:x + 1]
-                tag_start = x + 1
-
-            # not useful tags
-            if tag and ('mjloggm' in tag or 'TAIKYOKU' in tag):
-                tag = None
-
-            # new round was started
-            if tag and 'INIT' in tag:
-                rounds.append(game_round)
-                game_round = []
-
-            # the end of the game
-            if tag and 'owari' in tag:
-                rounds.append(game_round)
-
-            if tag:
-                # to save some memory we can remove not needed information from logs
-                if 'INIT' in tag:
-                    # we dont need seed information
-                    find = re.compile(r'shuffle="[^"]*"')
-                    tag = find.sub('', tag)
-
-                # add processed tag to the round
-                game_round.append(tag)
-                tag = None
-
-        return rounds[1:]
+        return TenhouDecoder().parse_log_rounds(log_content)
 
 
 class SocketMock(object):
     """
-    Reproduce tenhou <-> bot communication
+    Reproduce tenhou <-> bot communication.
+    Log lines are returned as raw bytes, so they are framed by the same reader as the socket data
     """
 
     def __init__(self, log_path, log_content=''):
@@ -213,23 +178,17 @@ class SocketMock(object):
             self.text = log_content
         self._parse_text()
 
-    def connect(self, _):
-        pass
-
-    def shutdown(self, _):
-        pass
-
     def close(self):
         pass
 
-    def sendall(self, message):
+    def write(self, message):
         pass
 
-    def recv(self, _):
+    async def read(self, _):
         if not self.commands:
             raise KeyboardInterrupt('End of commands')
 
-        return self.commands.pop(0).encode('utf-8')
+        return self.commands.pop(0)
 
     def _load_text(self):
         log_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), self.log_path)
@@ -249,7 +208,7 @@ class SocketMock(object):
             item = item.replace('> <', '>\x00<')
             item += '\x00'
 
-            self.commands.append(item)
+            self.commands.append(item.encode('utf-8'))
 
 
 def parse_args_and_start_reproducer():
@@ -295,10 +254,11 @@ def parse_args_and_start_reproducer():
         set_up_logging()
 
         client = TenhouClient(SocketMock(opts.local_log))
+        loop = asyncio.get_event_loop()
         try:
-            client.connect()
-            client.authenticate()
-            client.start_game()
+            loop.run_until_complete(client.connect())
+            loop.run_until_complete(client.authenticate())
+            loop.run_until_complete(client.start_game())
         except (Exception, KeyboardInterrupt) as e:
             logger.exception('', exc_info=e)
             client.end_game()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Local tenhou server for load and latency tests. Bots can be connected to it with TENHOU_HOST and TENHOU_PORT
+settings or started in the same process with --bots option
+"""
+import asyncio
+import logging
+from optparse import OptionParser
+
+from tenhou.host import BotHost
+from tenhou.server import TenhouServer
+from utils.logger import set_up_logging
+from utils.settings_handler import settings
+
+logger = logging.getLogger('tenhou')
+
+
+def parse_args():
+    parser = OptionParser()
+
+    parser.add_option('-H', '--host',
+                      type='string',
+                      default='127.0.0.1',
+                      help='Default is 127.0.0.1')
+
+    parser.add_option('-p', '--port',
+                      type='int',
+                      default=10080,
+                      help='Default is 10080')
+
+    parser.add_option('-t', '--action_timeout',
+                      type='float',
+                      default=TenhouServer.ACTION_TIMEOUT,
+                      help='Time in seconds for one action, after it the default action will be used. '
+                           'Default is {0}'.format(TenhouServer.ACTION_TIMEOUT))
+
+    parser.add_option('-l', '--logs_directory',
+                      type='string',
+                      default=None,
+                      help='Directory for game logs. Default is the project logs directory')
+
+    parser.add_option('-b', '--bots',
+                      type='int',
+                      default=0,
+                      help='Count of bots that will play on the server from this process, '
+                           'they are playing hanchans without pauses between actions. Default is 0')
+
+    opts, _ = parser.parse_args()
+    return opts
+
+
+def main():
+    opts = parse_args()
+    set_up_logging()
+
+    server = TenhouServer(opts.host, opts.port, opts.action_timeout, opts.logs_directory)
+
+    host = None
+    if opts.bots:
+        sessions = [settings.copy(
+            TENHOU_HOST=opts.host,
+            TENHOU_PORT=opts.port,
+            USER_ID='bot{}'.format(x + 1),
+            LOBBY='0',
+            GAME_TYPE='9',
+            ACTION_MIN_DELAY=0,
+            STAT_SERVER_URL='',
+        ) for x in range(0, opts.bots)]
+        host = BotHost(sessions, 60 * settings.SESSION_HANG_TIMEOUT_MINUTES)
+        host.restart_delay = 0
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(server.start())
+        if host:
+            loop.run_until_complete(host.run())
+        else:
+            loop.run_forever()
+    except KeyboardInterrupt:
+        logger.info('Stopping the server...')
+        if host:
+            host.stop()
+        loop.run_until_complete(server.stop())
+    finally:
+        if host:
+            settings.AI_CLASS.release_resources()
+
+
+if __name__ == '__main__':
+    main()
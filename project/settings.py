@@ -12,6 +12,32 @@ WAITING_GAME_TIMEOUT_MINUTES = 10
 # it just sitting in the lobby and waiting for the game start
 IS_TOURNAMENT = False
 
+# min time in seconds between the server prompt and our answer
+# answer is sent as soon as decision is ready, if it took more time
+ACTION_MIN_DELAY = 0.5
+# server time limit for one action in seconds
+ACTION_TIME_LIMIT = 4
+
+# max time in seconds for preparing answers to other players discards after our discard.
+# Answers for not prepared tiles are calculated on the discard prompt
+PREPARE_CALLS_TIME_BUDGET = 0.1
+
+# use time till our next draw to prepare calculations for the next discard.
+# Preparation is running in the event loop, so with many sessions in one process
+# it is delaying answers of other sessions
+PREPARE_NEXT_DISCARD = False
+# max time in seconds for the preparation after one discard
+PREPARE_NEXT_DISCARD_TIME_BUDGET = 0.2
+
+# bot sessions for host.py, each session is a dictionary with settings that are different for it
+# HOST_SESSIONS = [
+#     {'USER_ID': 'IDXXXXXXXX-XXXXXXXX', 'LOBBY': '0', 'GAME_TYPE': '9', 'AI_PACKAGE': 'first_version'},
+# ]
+HOST_SESSIONS = []
+# host restarts the game of the session if there were no messages from the server for this time,
+# it should be more than the waiting game timeout
+SESSION_HANG_TIMEOUT_MINUTES = 15
+
 STAT_SERVER_URL = ''
 STAT_TOKEN = ''
 
@@ -19,6 +45,26 @@ AI_PACKAGE = 'first_version'
 # class will be loaded automatically
 AI_CLASS = None
 
+# file with precalculated suit tables for shanten calculation (first_version AI)
+# if file doesn't exist it will be generated on the start (it takes about a minute)
+# all bot processes on the host can share one file
+SUIT_TABLES_FILE = ''
+
+# max time in seconds for checking discard options two draws ahead (first_version AI).
+# Chosen discard depends on the machine load when the time is over, so it is disabled by default
+LOOKAHEAD_TIME_BUDGET = 0
+
+# Monte Carlo estimation of win chances and deal-in risk (first_version AI)
+ESTIMATOR_SAMPLES = 200
+# max time for one estimation in seconds. Estimation is running in the event loop,
+# so it should be much smaller than ACTION_MIN_DELAY
+ESTIMATOR_TIME_LIMIT = 0.1
+# fixed seed for reproducible estimations
+ESTIMATOR_SEED = None
+# count of worker processes, it will be limited by count of spare cores.
+# Workers are shared by all bot sessions of the process
+ESTIMATOR_WORKERS = 1
+
 """
   Game type decoding:
 
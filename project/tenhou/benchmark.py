@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+import math
+import os
+import re
+import time
+import tracemalloc
+
+from mahjong.meld import Meld
+
+from game.engine.local_client import play_local_game
+from game.engine.rules import GameRules
+from game.table import Table
+from tenhou.decoder import TenhouDecoder
+from tenhou.log_writer import TenhouLogWriter
+from tenhou.server import percentile
+
+
+class DecisionBenchmark(object):
+    """
+    Time AI decisions on positions from tenhou logs.
+
+    Each round of the log is replayed from the point of view of each seat, in the same way as the reproducer does it.
+    Decisions are timed where the client asks AI about them: after our draw and after enemy discards that we can call.
+    Replayed actions are taken from the log, so all AI versions are timed on the same positions.
+    Hot paths of AI (outs, hand value estimation, defence) are timed inside of these decisions as well
+    """
+    DRAW_TAGS = ('T', 'U', 'V', 'W')
+    DISCARD_TAGS = ('D', 'E', 'F', 'G')
+    GO_REGEX = re.compile(r'<GO type="(\d+)"')
+
+    DISCARD_TILE = 'discard_tile'
+    TRY_TO_CALL_MELD = 'try_to_call_meld'
+    SHOULD_CALL_KAN = 'should_call_kan'
+    SHOULD_CALL_RIICHI = 'should_call_riichi'
+    SHOULD_GO_TO_DEFENCE_MODE = 'should_go_to_defence_mode'
+    CALL_TYPES = [DISCARD_TILE, TRY_TO_CALL_MELD, SHOULD_CALL_KAN, SHOULD_CALL_RIICHI, SHOULD_GO_TO_DEFENCE_MODE]
+
+    CALCULATE_OUTS = 'calculate_outs'
+    ESTIMATE_HAND_VALUE = 'estimate_hand_value'
+    HOT_PATHS = [CALCULATE_OUTS, ESTIMATE_HAND_VALUE, SHOULD_GO_TO_DEFENCE_MODE]
+
+    ai_class = None
+    decoder = None
+    count_of_logs = 0
+    count_of_rounds = 0
+    trace_memory = False
+    # durations in seconds by call types
+    timings = None
+    # peaks of allocated memory in bytes by call types
+    memory = None
+
+    # peaks of allocated memory of not finished calls
+    _peaks = None
+
+    def __init__(self, ai_class, trace_memory=False):
+        """
+        :param trace_memory: record the peak of allocated memory for each call instead of its duration,
+        tracemalloc should be started by the caller
+        """
+        if trace_memory and not hasattr(tracemalloc, 'reset_peak'):
+            raise ValueError('Memory tracing requires Python 3.9+')
+
+        self.ai_class = ai_class
+        self.decoder = TenhouDecoder()
+        self.count_of_logs = 0
+        self.count_of_rounds = 0
+        self.trace_memory = trace_memory
+        self.timings = dict([(x, []) for x in self.call_types])
+        self.memory = dict([(x, []) for x in self.call_types])
+        self._peaks = []
+
+    @property
+    def call_types(self):
+        return DecisionBenchmark.CALL_TYPES + [x for x in DecisionBenchmark.HOT_PATHS
+                                               if x not in DecisionBenchmark.CALL_TYPES]
+
+    def add_log(self, log_content):
+        """
+        :param log_content: string with mjlog xml
+        """
+        match = DecisionBenchmark.GO_REGEX.search(log_content)
+        # tenhou default is a game with aka dora and open tanyao
+        game_type = match and int(match.group(1)) or 0
+
+        self.count_of_logs += 1
+        for round_tags in self.decoder.parse_log_rounds(log_content):
+            self.count_of_rounds += 1
+            for seat in range(0, 4):
+                self.replay_round(round_tags, seat, game_type)
+
+    def replay_round(self, round_tags, seat, game_type):
+        """
+        :param round_tags: list of round tags, from INIT to the round end
+        :param seat: absolute seat of the player, decisions are timed for him
+        :param game_type: tenhou game type
+        """
+        table = Table(self.ai_class)
+        table.has_aka_dora = not game_type & 0x2
+        table.has_open_tanyao = not game_type & 0x4
+        player = table.player
+
+        self._wrap(player.ai, DecisionBenchmark.CALCULATE_OUTS)
+        self._wrap(player.ai, DecisionBenchmark.ESTIMATE_HAND_VALUE)
+        self._wrap(getattr(player.ai, 'defence', None), DecisionBenchmark.SHOULD_GO_TO_DEFENCE_MODE)
+
+        def relative_seat(x):
+            return (x - seat) % 4
+
+        for message in round_tags:
+            tag = self.decoder.parse_tag(message)
+
+            if tag.name == 'INIT':
+                values = self.decoder.parse_initial_values(tag)
+                table.init_round(
+                    values['round_number'],
+                    values['count_of_honba_sticks'],
+                    values['count_of_riichi_sticks'],
+                    values['dora_indicator'],
+                    relative_seat(values['dealer']),
+                    [values['scores'][(x + seat) % 4] for x in range(0, 4)],
+                )
+                tiles = tag.attributes['hai{}'.format(seat)]
+                player.init_hand([int(x) for x in tiles.split(',')])
+
+            elif tag.name in DecisionBenchmark.DRAW_TAGS and tag.tile is not None:
+                if DecisionBenchmark.DRAW_TAGS.index(tag.name) == seat:
+                    self._draw_tile(player, tag.tile)
+
+            elif tag.name.upper() in DecisionBenchmark.DISCARD_TAGS and tag.tile is not None:
+                who = relative_seat(DecisionBenchmark.DISCARD_TAGS.index(tag.name.upper()))
+                is_tsumogiri = tag.name.islower()
+                if who == 0:
+                    table.add_discarded_tile(0, tag.tile, is_tsumogiri)
+                    if tag.tile in player.tiles:
+                        player.tiles.remove(tag.tile)
+                else:
+                    table.add_discarded_tile(who, tag.tile, is_tsumogiri)
+                    self._enemy_discard(player, tag.tile, who == 3)
+
+            elif tag.name == 'N' and 'who' in tag.attributes:
+                meld = self.decoder.parse_meld(tag)
+                who = relative_seat(meld.who)
+                meld.who = who
+                meld.from_who = relative_seat(meld.from_who)
+                table.add_called_meld(who, meld)
+
+                # called tile was not drawn, but it should be in our hand
+                if who == 0 and meld.type != Meld.KAN and meld.type != Meld.CHANKAN:
+                    player.tiles.append(meld.called_tile)
+
+            elif tag.name == 'REACH' and tag.attributes.get('step') == '1':
+                table.add_called_riichi(relative_seat(self.decoder.parse_who_called_riichi(tag)))
+
+            elif tag.name == 'DORA':
+                table.add_dora_indicator(self.decoder.parse_dora_indicator(tag))
+
+        player.ai.end_game()
+
+    def to_dict(self):
+        """
+        :return: latencies in milliseconds and throughput (calls per second) by call types,
+        or peaks of allocated memory in bytes if memory was traced
+        """
+        calls = {}
+        for call_type in self.call_types:
+            if self.trace_memory:
+                values = self.memory[call_type]
+                calls[call_type] = {
+                    'count': len(values),
+                    'memory': {
+                        'mean': values and sum(values) / len(values) or 0,
+                        'p95': percentile(values, 95),
+                        'max': values and max(values) or 0,
+                    },
+                }
+                continue
+
+            timings = [x * 1000 for x in self.timings[call_type]]
+            total = sum(timings)
+            calls[call_type] = {
+                'count': len(timings),
+                'mean': timings and total / len(timings) or 0,
+                'p50': percentile(timings, 50),
+                'p95': percentile(timings, 95),
+                'p99': percentile(timings, 99),
+                'max': timings and max(timings) or 0,
+                'throughput': total and len(timings) / total * 1000 or 0,
+            }
+
+        return {
+            'ai': '{}.{}'.format(self.ai_class.__module__, self.ai_class.__name__),
+            'logs': self.count_of_logs,
+            'rounds': self.count_of_rounds,
+            'calls': calls,
+        }
+
+    def format_report(self):
+        values = self.to_dict()
+        lines = ['{}: {} logs, {} rounds'.format(values['ai'], values['logs'], values['rounds'])]
+        for call_type in self.call_types:
+            call = values['calls'][call_type]
+            if self.trace_memory:
+                lines.append('  {}: {} calls, memory mean {:.1f} KiB, p95 {:.1f} KiB, max {:.1f} KiB'.format(
+                    call_type, call['count'], call['memory']['mean'] / 1024, call['memory']['p95'] / 1024,
+                    call['memory']['max'] / 1024))
+                continue
+
+            lines.append('  {}: {} calls, p50 {:.3f} ms, p95 {:.3f} ms, p99 {:.3f} ms, {:.0f} calls/s'.format(
+                call_type, call['count'], call['p50'], call['p95'], call['p99'], call['throughput']))
+        return '\n'.join(lines)
+
+    def _draw_tile(self, player, tile):
+        # AI is not asked about discards after riichi
+        if player.in_riichi:
+            player.last_draw = tile
+            player.tiles.append(tile)
+            return
+
+        player.draw_tile(tile)
+
+        self._measure(DecisionBenchmark.SHOULD_CALL_KAN, player.should_call_kan, tile, False)
+        discarded_tile = self._measure(DecisionBenchmark.DISCARD_TILE, player.ai.discard_tile, None)
+        if player.formal_riichi_conditions():
+            # client asks about riichi after the discard,
+            # the log discard can be different, so the hand is restored after the check
+            player.tiles.remove(discarded_tile)
+            self._measure(DecisionBenchmark.SHOULD_CALL_RIICHI, player.ai.should_call_riichi)
+            player.hand.add_tile(discarded_tile)
+
+    def _enemy_discard(self, player, tile, is_kamicha_discard):
+        if player.in_riichi:
+            return
+
+        # it is timed by the wrapper
+        defence = getattr(player.ai, 'defence', None)
+        if defence:
+            defence.should_go_to_defence_mode()
+
+        # the same conditions as tenhou uses for call suggestions
+        closed_hand_34 = player.closed_hand_34
+        tile_34 = tile // 4
+        if closed_hand_34[tile_34] == 3:
+            self._measure(DecisionBenchmark.SHOULD_CALL_KAN, player.should_call_kan, tile, True)
+
+        if closed_hand_34[tile_34] >= 2 or (is_kamicha_discard and self._can_call_chi(closed_hand_34, tile_34)):
+            self._measure(DecisionBenchmark.TRY_TO_CALL_MELD, player.try_to_call_meld, tile, is_kamicha_discard)
+
+    def _can_call_chi(self, closed_hand_34, tile_34):
+        # honors
+        if tile_34 >= 27:
+            return False
+
+        position = tile_34 % 9
+        for first, second in [(-2, -1), (-1, 1), (1, 2)]:
+            if position + first < 0 or position + second > 8:
+                continue
+            if closed_hand_34[tile_34 + first] and closed_hand_34[tile_34 + second]:
+                return True
+        return False
+
+    def _wrap(self, instance, call_type):
+        """
+        Replace the method of the instance with the measured one, so its calls from other methods are measured too
+        """
+        method = getattr(instance, call_type, None)
+        if not method:
+            return
+
+        def wrapper(*args, **kwargs):
+            return self._measure(call_type, method, *args, **kwargs)
+
+        setattr(instance, call_type, wrapper)
+
+    def _measure(self, call_type, method, *args, **kwargs):
+        if self.trace_memory:
+            return self._measure_memory(call_type, method, *args, **kwargs)
+
+        start_time = time.perf_counter()
+        result = method(*args, **kwargs)
+        self.timings[call_type].append(time.perf_counter() - start_time)
+        return result
+
+    def _measure_memory(self, call_type, method, *args, **kwargs):
+        # calls are nested (discard -> defence -> hand value),
+        # so the peak of the outer call is saved before the peak reset
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+        start_memory = tracemalloc.get_traced_memory()[0]
+        self._peaks.append(start_memory)
+        result = method(*args, **kwargs)
+        peak = max(tracemalloc.get_traced_memory()[1], self._peaks.pop())
+
+        self.memory[call_type].append(peak - start_memory)
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        return result
+
+
+def load_corpus(directory):
+    """
+    :param directory: directory with mjlog files
+    :return: list of (file name, log content) sorted by file names
+    """
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+
+        with open(path, 'r') as f:
+            content = f.read()
+        if '<mjloggm' in content:
+            corpus.append((name, content))
+    return corpus
+
+
+def generate_corpus(ai_class, count_of_games, directory, seed=0, rules=None):
+    """
+    Play self-play games and save them as tenhou logs
+    :param ai_class: AI class for all seats
+    :param rules: GameRules, by default east only games with aka dora and open tanyao
+    :return: list of log paths
+    """
+    rules = rules or GameRules()
+    # the same flags that the local server reads from the game type
+    game_type = 0x1
+    if rules.is_hanchan:
+        game_type |= 0x8
+    if not rules.has_aka_dora:
+        game_type |= 0x2
+    if not rules.has_open_tanyao:
+        game_type |= 0x4
+
+    paths = []
+    for game_index in range(0, count_of_games):
+        log_id = 'benchmark-{}-{:04d}'.format(seed, game_index)
+        names = ['bot{}'.format(x) for x in range(0, 4)]
+        log_writer = TenhouLogWriter(log_id, game_type, 0, names, directory)
+        play_local_game([ai_class] * 4, rules, '{}-{}'.format(seed, game_index), [log_writer])
+        paths.append(log_writer.log_path)
+    return paths
+
+
+def run_alternately(baseline, candidate, repeats):
+    """
+    Benchmarks of two sides are run one after another in ABBA order,
+    so a slow drift of the machine speed (CPU frequency, other processes) affects both sides in the same way
+    :param baseline: function that runs the baseline benchmark, it takes the index of the repetition
+    :param candidate: function that runs the candidate benchmark, it takes the index of the repetition
+    :param repeats: count of runs for each side
+    :return: lists of baseline and candidate results, by repetitions
+    """
+    baseline_runs = []
+    candidate_runs = []
+    for repetition in range(0, repeats):
+        if repetition % 2 == 0:
+            baseline_runs.append(baseline(repetition))
+            candidate_runs.append(candidate(repetition))
+        else:
+            candidate_runs.append(candidate(repetition))
+            baseline_runs.append(baseline(repetition))
+    return baseline_runs, candidate_runs
+
+
+def compare_benchmarks(baseline_runs, candidate_runs, call_types, threshold, significance=0.05):
+    """
+    Compare results of benchmarks on the same corpus, that were run alternately.
+    Values of calls in one run are not independent (they share the machine state), so runs are compared:
+    the ratio is the median of ratios of run pairs and it is confirmed by the sign test of these pairs.
+    It is done for p50 latencies and for mean memory peaks if they were measured in all runs
+    :param baseline_runs: list of DecisionBenchmark.to_dict results
+    :param candidate_runs: list of DecisionBenchmark.to_dict results, paired with baseline runs
+    :param call_types: list of compared call types
+    :param threshold: allowed slowdown or memory growth, 0.1 is 10%
+    :param significance: regression should be confirmed by the sign test with this p value,
+    see min_repeats for the required count of run pairs
+    :return: list of dictionaries with compared values, regressions have is_regression flag.
+    Baseline value is the median of baseline runs and candidate value is the baseline value multiplied by the ratio
+    """
+    results = []
+    for call_type in call_types:
+        pairs = []
+        for baseline, candidate in zip(baseline_runs, candidate_runs):
+            baseline_call = baseline['calls'].get(call_type)
+            candidate_call = candidate['calls'].get(call_type)
+            if baseline_call and candidate_call and baseline_call['count'] and candidate_call['count']:
+                pairs.append((baseline_call, candidate_call))
+
+        if not pairs:
+            continue
+
+        results.append(_compare_pairs(call_type, 'p50', [(x[0]['p50'], x[1]['p50']) for x in pairs],
+                                      threshold, significance))
+
+        if all(['memory' in x[0] and 'memory' in x[1] for x in pairs]):
+            memory_pairs = [(x[0]['memory']['mean'], x[1]['memory']['mean']) for x in pairs]
+            results.append(_compare_pairs(call_type, 'memory', memory_pairs, threshold, significance))
+    return results
+
+
+def min_repeats(significance):
+    """
+    :param significance: p value of the sign test
+    :return: min count of run pairs, that can confirm a regression with this p value
+    """
+    count = 1
+    while sign_test_p_value(count, count) >= significance:
+        count += 1
+    return count
+
+
+def _compare_pairs(call_type, metric, pairs, threshold, significance):
+    ratios = [x[0] and x[1] / x[0] or 1 for x in pairs]
+    ratio = median(ratios)
+    p_value = sign_test_p_value(len([x for x in ratios if x > 1]), len([x for x in ratios if x != 1]))
+    baseline = median([x[0] for x in pairs])
+    return {
+        'call_type': call_type,
+        'metric': metric,
+        'baseline': baseline,
+        'candidate': baseline * ratio,
+        'ratio': ratio,
+        'p_value': p_value,
+        'is_regression': ratio > 1 + threshold and p_value < significance,
+    }
+
+
+def sign_test_p_value(greater, count):
+    """
+    One-sided exact sign test
+    :param greater: count of pairs where candidate value is greater
+    :param count: count of pairs without ties
+    :return: p value of the hypothesis that candidate values are not greater than baseline values
+    """
+    if not count:
+        return 1
+
+    combinations = [math.factorial(count) // math.factorial(x) // math.factorial(count - x)
+                    for x in range(greater, count + 1)]
+    return sum(combinations) / 2 ** count
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
@@ -1,9 +1,7 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import datetime
-import logging
-import socket
-from threading import Thread
-from time import sleep
+import time
 from urllib.parse import quote
 
 from mahjong.constants import DISPLAY_WINDS
@@ -12,56 +10,93 @@ from mahjong.tile import TilesConverter
 
 from game.client import Client
 from tenhou.decoder import TenhouDecoder
+from tenhou.pacing import ActionPacer
+from tenhou.reader import MessageReader
 
+from utils.logger import get_session_logger
 from utils.settings_handler import settings
 from utils.statistics import Statistics
 
-logger = logging.getLogger('tenhou')
-
 
 class TenhouClient(Client):
     SLEEP_BETWEEN_ACTIONS = 1
+    KEEP_ALIVE_INTERVAL = 15
+    # max time to wait for the server answer during authentication
+    READ_TIMEOUT = 10
 
     statistics = None
-    socket = None
+    reader = None
+    writer = None
+    message_reader = None
     game_is_continue = True
     looking_for_game = True
-    keep_alive_thread = None
+    keep_alive_timer = None
+    preparation_task = None
     reconnected_messages = None
+    sleep_between_actions = SLEEP_BETWEEN_ACTIONS
+    pacer = None
+    # settings of the bot session
+    settings = None
+    logger = None
+    # time of the last read from the server, supervisor use it to find hung sessions
+    last_activity_time = 0
 
     decoder = TenhouDecoder()
 
+    # tag name -> list of handlers
+    handlers = None
+    # handler name -> [count of calls, total time]
+    handlers_timings = None
+
     _count_of_empty_messages = 0
+    _paused_time = 0
+    _last_send_time = 0
+    _meld_tile = None
+    _tile_to_discard = None
     _rating_string = None
     _socket_mock = None
 
-    def __init__(self, socket_mock=None):
-        super().__init__()
-        self.statistics = Statistics()
+    def __init__(self, socket_mock=None, session_settings=None):
+        """
+        :param socket_mock: object with stream methods, used by reproducer and tests
+        :param session_settings: settings of the bot session, by default global settings are used
+        """
+        self.settings = session_settings or settings
+        self.logger = get_session_logger(self.settings.USER_ID)
+        super().__init__(self.settings.AI_CLASS)
+        self.statistics = Statistics(self.settings)
+        self.last_activity_time = time.monotonic()
         self._socket_mock = socket_mock
+        self.pacer = ActionPacer(self.settings.ACTION_MIN_DELAY, self.settings.ACTION_TIME_LIMIT)
+
+        self.handlers = {}
+        self.handlers_timings = {}
+        self._register_game_handlers()
 
-    def connect(self):
+    async def connect(self):
         # for reproducer
         if self._socket_mock:
-            self.socket = self._socket_mock
-            TenhouClient.SLEEP_BETWEEN_ACTIONS = 0
+            self.reader = self.writer = self._socket_mock
+            self.sleep_between_actions = 0
+            self.pacer.min_delay = 0
         else:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.reader, self.writer = await asyncio.open_connection(self.settings.TENHOU_HOST,
+                                                                     self.settings.TENHOU_PORT)
 
-        self.socket.connect((settings.TENHOU_HOST, settings.TENHOU_PORT))
+        self.message_reader = MessageReader(self.reader)
 
-    def authenticate(self):
-        self._send_message('<HELO name="{}" tid="f0" sx="M" />'.format(quote(settings.USER_ID)))
-        messages = self._get_multiple_messages()
-        auth_message = messages[0]
+    async def authenticate(self):
+        self._send_message('<HELO name="{}" tid="f0" sx="M" />'.format(quote(self.settings.USER_ID)))
+        messages = await self._get_multiple_messages(TenhouClient.READ_TIMEOUT)
+        auth_message = messages and messages[0] or ''
 
         if not auth_message:
-            logger.info("Auth message wasn't received")
+            self.logger.info("Auth message wasn't received")
             return False
 
         # we reconnected to the game
-        if '<GO' in auth_message:
-            logger.info('Successfully reconnected')
+        if self.decoder.parse_tag(auth_message).name == 'GO':
+            self.logger.info('Successfully reconnected')
             self.reconnected_messages = messages
 
             selected_game_type = self.decoder.parse_go_tag(auth_message)
@@ -75,11 +110,11 @@ class TenhouClient(Client):
         auth_string, rating_string, new_rank_message = self.decoder.parse_hello_string(auth_message)
         self._rating_string = rating_string
         if not auth_string:
-            logger.info("We didn't obtain auth string")
+            self.logger.info("We didn't obtain auth string")
             return False
 
         if new_rank_message:
-            logger.info('Achieved a new rank! \n {}'.format(new_rank_message))
+            self.logger.info('Achieved a new rank! \n {}'.format(new_rank_message))
 
         auth_token = self.decoder.generate_auth_token(auth_string)
 
@@ -94,9 +129,9 @@ class TenhouClient(Client):
         counter = 0
         authenticated = False
         while continue_reading:
-            messages = self._get_multiple_messages()
+            messages = await self._get_multiple_messages(TenhouClient.READ_TIMEOUT)
             for message in messages:
-                if '<LN' in message:
+                if self.decoder.parse_tag(message).name == 'LN':
                     authenticated = True
                     continue_reading = False
 
@@ -106,109 +141,107 @@ class TenhouClient(Client):
                 continue_reading = False
 
         if authenticated:
-            self._send_keep_alive_ping()
-            logger.info('Successfully authenticated')
+            self._schedule_keep_alive_ping()
+            self.logger.info('Successfully authenticated')
             return True
         else:
-            logger.info('Failed to authenticate')
+            self.logger.info('Failed to authenticate')
             return False
 
-    def start_game(self):
+    async def start_game(self):
         log_link = ''
 
         # play in private or tournament lobby
-        if settings.LOBBY != '0':
-            if settings.IS_TOURNAMENT:
-                logger.info('Go to the tournament lobby: {}'.format(settings.LOBBY))
-                self._send_message('<CS lobby="{}" />'.format(settings.LOBBY))
-                sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS * 2)
+        if self.settings.LOBBY != '0':
+            if self.settings.IS_TOURNAMENT:
+                self.logger.info('Go to the tournament lobby: {}'.format(self.settings.LOBBY))
+                self._send_message('<CS lobby="{}" />'.format(self.settings.LOBBY))
+                await self._pause(self.sleep_between_actions * 2)
                 self._send_message('<DATE />')
             else:
-                logger.info('Go to the lobby: {}'.format(settings.LOBBY))
-                self._send_message('<CHAT text="{}" />'.format(quote('/lobby {}'.format(settings.LOBBY))))
-                sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS * 2)
+                self.logger.info('Go to the lobby: {}'.format(self.settings.LOBBY))
+                self._send_message('<CHAT text="{}" />'.format(quote('/lobby {}'.format(self.settings.LOBBY))))
+                await self._pause(self.sleep_between_actions * 2)
 
         if self.reconnected_messages:
             # we already in the game
             self.looking_for_game = False
             self._send_message('<GOK />')
-            sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS)
+            await self._pause(self.sleep_between_actions)
         else:
             selected_game_type = self._build_game_type()
-            game_type = '{},{}'.format(settings.LOBBY, selected_game_type)
+            game_type = '{},{}'.format(self.settings.LOBBY, selected_game_type)
 
-            if not settings.IS_TOURNAMENT:
+            if not self.settings.IS_TOURNAMENT:
                 self._send_message('<JOIN t="{}" />'.format(game_type))
-                logger.info('Looking for the game...')
+                self.logger.info('Looking for the game...')
 
             start_time = datetime.datetime.now()
 
+            waiting_timeout = 60 * self.settings.WAITING_GAME_TIMEOUT_MINUTES
             while self.looking_for_game:
-                sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS)
-
-                messages = self._get_multiple_messages()
+                # we are waiting for server messages without polling,
+                # but we need to stop waiting after the timeout
+                time_difference = datetime.datetime.now() - start_time
+                messages = await self._get_multiple_messages(max(waiting_timeout - time_difference.seconds, 1))
 
                 for message in messages:
-                    if '<REJOIN' in message:
+                    tag = self.decoder.parse_tag(message)
+
+                    if tag.name == 'REJOIN':
                         # game wasn't found, continue to wait
                         self._send_message('<JOIN t="{},r" />'.format(game_type))
 
-                    if '<GO' in message:
+                    if tag.name == 'GO':
                         self._send_message('<GOK />')
                         self._send_message('<NEXTREADY />')
 
                         # we had to have it there
                         # because for tournaments we don't know
                         # what exactly game type was set
-                        selected_game_type = self.decoder.parse_go_tag(message)
+                        selected_game_type = self.decoder.parse_go_tag(tag)
                         process_rules = self._set_game_rules(selected_game_type)
                         if not process_rules:
-                            logger.error('Hirosima (3 man) is not supported at the moment')
+                            self.logger.error('Hirosima (3 man) is not supported at the moment')
                             self.end_game(success=False)
                             return
 
-                    if '<TAIKYOKU' in message:
+                    if tag.name == 'TAIKYOKU':
                         self.looking_for_game = False
-                        game_id, seat = self.decoder.parse_log_link(message)
+                        game_id, seat = self.decoder.parse_log_link(tag)
                         log_link = 'http://tenhou.net/0/?log={}&tw={}'.format(game_id, seat)
 
                         self.statistics.game_id = game_id
 
-                    if '<UN' in message:
-                        values = self.decoder.parse_names_and_ranks(message)
+                    if tag.name == 'UN':
+                        values = self.decoder.parse_names_and_ranks(tag)
                         self.table.set_players_names_and_ranks(values)
 
                         self.statistics.username = values[0]['name']
 
-                    if '<LN' in message:
+                    if tag.name == 'LN':
                         self._send_message(self._pxr_tag())
 
                 current_time = datetime.datetime.now()
                 time_difference = current_time - start_time
 
-                if time_difference.seconds > 60 * settings.WAITING_GAME_TIMEOUT_MINUTES:
+                if time_difference.seconds > 60 * self.settings.WAITING_GAME_TIMEOUT_MINUTES:
                     break
 
         # we wasn't able to find the game in specified time range
         # sometimes it happens and we need to end process
         # and try again later
         if self.looking_for_game:
-            logger.error('Game is not started. Can\'t find the game')
+            self.logger.error('Game is not started. Can\'t find the game')
             self.end_game()
             return
 
-        logger.info('Game started')
-        logger.info('Log: {}'.format(log_link))
-        logger.info('Players: {}'.format(self.table.players))
-
-        main_player = self.table.player
-
-        meld_tile = None
-        tile_to_discard = None
+        self.logger.info('Game started')
+        self.logger.info('Log: {}'.format(log_link))
+        self.logger.info('Players: {}'.format(self.table.players))
 
         while self.game_is_continue:
-            sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS)
-            messages = self._get_multiple_messages()
+            messages = await self._get_multiple_messages()
 
             if self.reconnected_messages:
                 messages = self.reconnected_messages + messages
@@ -220,219 +253,21 @@ class TenhouClient(Client):
                 # we had set to zero counter
                 self._count_of_empty_messages = 0
 
+            # answer delay is counted from the time when the server message was read from the socket,
+            # not from the time when we started to process it
+            if messages:
+                self.pacer.prompt_received(self.message_reader.received_time)
             for message in messages:
-                if '<INIT' in message or '<REINIT' in message:
-                    values = self.decoder.parse_initial_values(message)
-                    self.table.init_round(
-                        values['round_number'],
-                        values['count_of_honba_sticks'],
-                        values['count_of_riichi_sticks'],
-                        values['dora_indicator'],
-                        values['dealer'],
-                        values['scores'],
-                    )
-
-                    tiles = self.decoder.parse_initial_hand(message)
-                    self.table.player.init_hand(tiles)
-
-                    logger.info(self.table.__str__())
-                    logger.info('Players: {}'.format(self.table.get_players_sorted_by_scores()))
-                    logger.info('Dealer: {}'.format(self.table.get_player(values['dealer'])))
-                    logger.info('Round  wind: {}'.format(DISPLAY_WINDS[self.table.round_wind]))
-                    logger.info('Player wind: {}'.format(DISPLAY_WINDS[main_player.player_wind]))
-
-                if '<REINIT' in message:
-                    players = self.decoder.parse_table_state_after_reconnection(message)
-                    for x in range(0, 4):
-                        player = players[x]
-                        for item in player['discards']:
-                            self.table.add_discarded_tile(x, item, False)
-
-                        for item in player['melds']:
-                            if x == 0:
-                                tiles = item.tiles
-                                main_player.tiles.extend(tiles)
-                            self.table.add_called_meld(x, item)
-
-                # draw and discard
-                if '<T' in message:
-                    win_suggestions = ['t="16"', 't="48"']
-                    # we won by self draw (tsumo)
-                    if any(i in message for i in win_suggestions):
-                        self._send_message('<N type="7" />')
-                        continue
-
-                    # Kyuushuu kyuuhai 「九種九牌」
-                    # (9 kinds of honor or terminal tiles)
-                    if 't="64"' in message:
-                        # TODO aim for kokushi
-                        self._send_message('<N type="9" />')
-                        continue
-
-                    drawn_tile = self.decoder.parse_tile(message)
-
-                    if not main_player.in_riichi:
-                        logger.info('Hand: {}'.format(main_player.format_hand_for_print(drawn_tile)))
-
-                        self.player.draw_tile(drawn_tile)
-                        sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS)
-
-                        kan_type = self.player.should_call_kan(drawn_tile, False)
-                        if kan_type and self.table.count_of_remaining_tiles > 1:
-                            if kan_type == Meld.CHANKAN:
-                                meld_type = 5
-                            else:
-                                meld_type = 4
-                            self._send_message('<N type="{}" hai="{}" />'.format(meld_type, drawn_tile))
-                            logger.info('We called a closed kan\chankan set!')
-                            continue
-
-                        discarded_tile = self.player.discard_tile()
-                        logger.info('Discard: {}'.format(TilesConverter.to_one_line_string([discarded_tile])))
-
-                        can_call_riichi = main_player.can_call_riichi()
-
-                        # let's call riichi
-                        if can_call_riichi:
-                            self._send_message('<REACH hai="{}" />'.format(discarded_tile))
-                            sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS)
-                            main_player.in_riichi = True
-                    else:
-                        # we had to add it to discards, to calculate remaining tiles correctly
-                        discarded_tile = drawn_tile
-                        self.table.add_discarded_tile(0, discarded_tile, True)
-
-                    # tenhou format: <D p="133" />
-                    self._send_message('<D p="{}"/>'.format(discarded_tile))
-
-                    logger.info('Remaining tiles: {}'.format(self.table.count_of_remaining_tiles))
-
-                # new dora indicator after kan
-                if '<DORA' in message:
-                    tile = self.decoder.parse_dora_indicator(message)
-                    self.table.add_dora_indicator(tile)
-                    logger.info('New dora indicator: {}'.format(TilesConverter.to_one_line_string([tile])))
-
-                if '<REACH' in message and 'step="1"' in message:
-                    who_called_riichi = self.decoder.parse_who_called_riichi(message)
-                    self.table.add_called_riichi(who_called_riichi)
-                    logger.info('Riichi called by {} player'.format(who_called_riichi))
-
-                # the end of round
-                if '<AGARI' in message or '<RYUUKYOKU' in message:
-                    sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS * 7)
-                    self._send_message('<NEXTREADY />')
-
-                # set was called
-                if '<N who=' in message:
-                    player_formatted_hand = ''
-                    if meld_tile:
-                        player_formatted_hand = main_player.format_hand_for_print(meld_tile)
-
-                    meld = self.decoder.parse_meld(message)
-                    self.table.add_called_meld(meld.who, meld)
-                    logger.info('Meld: {} by {}'.format(meld, meld.who))
-
-                    # tenhou confirmed that we called a meld
-                    # we had to do discard after this
-                    if meld.who == 0:
-                        if meld.type != Meld.KAN and meld.type != Meld.CHANKAN:
-                            discarded_tile = self.player.discard_tile(tile_to_discard)
-
-                            logger.info('With hand: {}'.format(player_formatted_hand))
-                            logger.info('Discard tile after called meld: {}'.format(
-                                TilesConverter.to_one_line_string([discarded_tile]))
-                            )
-
-                            self.player.tiles.append(meld_tile)
-                            self._send_message('<D p="{}"/>'.format(discarded_tile))
-
-                win_suggestions = [
-                    't="8"', 't="9"', 't="10"', 't="11"', 't="12"', 't="13"', 't="15"'
-                ]
-                # we win by other player's discard
-                if any(i in message for i in win_suggestions):
-                    tile = self.decoder.parse_tile(message)
-                    enemy_seat = self.decoder.get_enemy_seat(message)
-                    sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS)
-
-                    if main_player.should_call_win(tile, enemy_seat):
-                        self._send_message('<N type="6" />')
-                    else:
-                        self._send_message('<N />')
-
-                if self.decoder.is_discarded_tile_message(message):
-                    tile = self.decoder.parse_tile(message)
-
-                    # <e21/> - is tsumogiri
-                    # <E21/> - discard from the hand
-                    if_tsumogiri = message[1].islower()
-                    player_seat = self.decoder.get_enemy_seat(message)
-
-                    self.table.add_discarded_tile(player_seat, tile, if_tsumogiri)
-
-                    # open hand suggestions
-                    if 't=' in message:
-                        # Possible t="" suggestions
-                        # 1 pon
-                        # 2 kan (it is a closed kan and can be send only to the self draw)
-                        # 3 pon + kan
-                        # 4 chi
-                        # 5 pon + chi
-                        # 7 pon + kan + chi
-
-                        # should we call a kan?
-                        if 't="3"' in message or 't="7"' in message:
-                            if self.player.should_call_kan(tile, True):
-                                # 2 is open kan
-                                self._send_message('<N type="2" />')
-                                logger.info('We called an open kan set!')
-                                continue
-
-                        # player with "g" discard is always our kamicha
-                        is_kamicha_discard = False
-                        if message[1].lower() == 'g':
-                            is_kamicha_discard = True
-
-                        meld, tile_to_discard = self.player.try_to_call_meld(tile, is_kamicha_discard)
-                        if meld:
-                            meld_tile = tile
-
-                            # 1 is pon
-                            meld_type = '1'
-                            if meld.type == Meld.CHI:
-                                # yeah it is 3, not 4
-                                # because of tenhou protocol
-                                meld_type = '3'
-
-                            tiles = meld.tiles
-                            tiles.remove(meld_tile)
-
-                            # try to call a meld
-                            self._send_message('<N type="{}" hai0="{}" hai1="{}" />'.format(
-                                meld_type,
-                                tiles[0],
-                                tiles[1]
-                            ))
-                        # this meld will not improve our hand
-                        else:
-                            sleep(TenhouClient.SLEEP_BETWEEN_ACTIONS)
-                            self._send_message('<N />')
-
-                if 'owari' in message:
-                    values = self.decoder.parse_final_scores_and_uma(message)
-                    self.table.set_players_scores(values['scores'], values['uma'])
-
-                if '<PROF' in message:
-                    self.game_is_continue = False
+                await self._dispatch(self.decoder.parse_tag(message))
 
             # socket was closed by tenhou
             if self._count_of_empty_messages >= 5:
-                logger.error('We are getting empty messages from socket. Probably socket connection was closed')
+                self.logger.error('We are getting empty messages from socket. Probably socket connection was closed')
                 self.end_game(False)
                 return
 
-        logger.info('Final results: {}'.format(self.table.get_players_sorted_by_scores()))
+        self.logger.info('Final results: {}'.format(self.table.get_players_sorted_by_scores()))
+        self.logger.info('Handlers: {}'.format(self._format_handlers_timings()))
 
         # we need to finish the game, and only after this try to send statistics
         # if order will be different, tenhou will return 404 on log download endpoint
@@ -440,95 +275,425 @@ class TenhouClient(Client):
 
         # sometimes log is not available just after the game
         # let's wait one minute before the statistics update
-        if settings.STAT_SERVER_URL:
-            sleep(60)
-            result = self.statistics.send_statistics()
-            logger.info('Statistics sent: {}'.format(result))
+        if self.settings.STAT_SERVER_URL:
+            await asyncio.sleep(60)
+            # requests are blocking, so other sessions shouldn't wait for them
+            loop = asyncio.get_event_loop()
+            result = await loop.run_in_executor(None, self.statistics.send_statistics)
+            self.logger.info('Statistics sent: {}'.format(result))
+
+    def register_handler(self, tag_name, handler):
+        """
+        Handlers are called one by one for each received tag with the same name
+        :param tag_name: name of the tag, like T or AGARI
+        :param handler: coroutine function that takes parsed Tag
+        """
+        self.handlers.setdefault(tag_name, []).append(handler)
+
+    def _register_game_handlers(self):
+        self.register_handler('INIT', self._handle_init)
+        self.register_handler('REINIT', self._handle_init)
+        self.register_handler('REINIT', self._handle_reinit)
+        self.register_handler('T', self._handle_draw)
+        self.register_handler('DORA', self._handle_dora)
+        self.register_handler('REACH', self._handle_reach)
+        self.register_handler('N', self._handle_meld)
+        self.register_handler('PROF', self._handle_prof)
+
+        for tag_name in ['AGARI', 'RYUUKYOKU']:
+            self.register_handler(tag_name, self._handle_round_end)
+            self.register_handler(tag_name, self._handle_final_scores)
+
+        for tag_name in TenhouDecoder.DISCARD_TAGS:
+            self.register_handler(tag_name, self._handle_win_suggestion)
+            self.register_handler(tag_name, self._handle_discard)
+
+    async def _dispatch(self, tag):
+        for handler in self.handlers.get(tag.name, []):
+            paused_time = self._paused_time
+            start_time = time.perf_counter()
+
+            await handler(tag)
+
+            # pauses between actions are not a part of the handler time
+            elapsed_time = time.perf_counter() - start_time - (self._paused_time - paused_time)
+            timing = self.handlers_timings.setdefault(handler.__name__, [0, 0])
+            timing[0] += 1
+            timing[1] += elapsed_time
+
+    async def _pause(self, seconds):
+        start_time = time.perf_counter()
+        await asyncio.sleep(seconds)
+        self._paused_time += time.perf_counter() - start_time
+
+    async def _answer(self, message):
+        """
+        Send the answer to the last server prompt
+        """
+        await self._pause(self.pacer.delay())
+        self._send_message(message)
+
+    def _start_preparation(self):
+        """
+        After our discard we have time till other players discards and our next draw
+        """
+        self._stop_preparation()
+        self.preparation_task = asyncio.ensure_future(self._prepare_after_discard())
+
+    def _stop_preparation(self):
+        if self.preparation_task:
+            self.preparation_task.cancel()
+            self.preparation_task = None
+
+    async def _prepare_after_discard(self):
+        await self._prepare_calls()
+        if self.settings.PREPARE_NEXT_DISCARD:
+            await self._prepare_next_discard()
+
+    async def _prepare_calls(self):
+        await self._run_preparation(self.player.prepare_calls(), self.settings.PREPARE_CALLS_TIME_BUDGET)
+
+    async def _prepare_next_discard(self):
+        await self._run_preparation(self.player.prepare_discards(), self.settings.PREPARE_NEXT_DISCARD_TIME_BUDGET)
+
+    async def _run_preparation(self, steps, time_budget):
+        """
+        Preparation is stopped after the time budget, it is checked between steps
+        """
+        deadline = time.monotonic() + time_budget
+        for _ in steps:
+            if time.monotonic() >= deadline:
+                break
+
+            # received messages have priority
+            await asyncio.sleep(0)
+
+    def _format_handlers_timings(self):
+        results = []
+        for name, (calls, total_time) in sorted(self.handlers_timings.items()):
+            results.append('{}: {} calls, {:.2f} ms avg'.format(name, calls, total_time / calls * 1000))
+        return ', '.join(results)
+
+    async def _handle_init(self, tag):
+        self._stop_preparation()
+        main_player = self.table.player
+
+        values = self.decoder.parse_initial_values(tag)
+        self.table.init_round(
+            values['round_number'],
+            values['count_of_honba_sticks'],
+            values['count_of_riichi_sticks'],
+            values['dora_indicator'],
+            values['dealer'],
+            values['scores'],
+        )
+
+        tiles = self.decoder.parse_initial_hand(tag)
+        main_player.init_hand(tiles)
+
+        self.logger.info(self.table.__str__())
+        self.logger.info('Players: {}'.format(self.table.get_players_sorted_by_scores()))
+        self.logger.info('Dealer: {}'.format(self.table.get_player(values['dealer'])))
+        self.logger.info('Round  wind: {}'.format(DISPLAY_WINDS[self.table.round_wind]))
+        self.logger.info('Player wind: {}'.format(DISPLAY_WINDS[main_player.player_wind]))
+
+    async def _handle_reinit(self, tag):
+        main_player = self.table.player
+
+        players = self.decoder.parse_table_state_after_reconnection(tag)
+        for x in range(0, 4):
+            player = players[x]
+            for item in player['discards']:
+                self.table.add_discarded_tile(x, item, False)
+
+            for item in player['melds']:
+                if x == 0:
+                    tiles = item.tiles
+                    main_player.tiles.extend(tiles)
+                self.table.add_called_meld(x, item)
+
+    async def _handle_draw(self, tag):
+        self._stop_preparation()
+        main_player = self.table.player
+
+        win_suggestions = ['16', '48']
+        # we won by self draw (tsumo)
+        if tag.attributes.get('t') in win_suggestions:
+            await self._answer('<N type="7" />')
+            return
+
+        # Kyuushuu kyuuhai 「九種九牌」
+        # (9 kinds of honor or terminal tiles)
+        if tag.attributes.get('t') == '64':
+            # TODO aim for kokushi
+            await self._answer('<N type="9" />')
+            return
+
+        drawn_tile = tag.tile
+
+        if not main_player.in_riichi:
+            self.logger.info('Hand: {}'.format(main_player.format_hand_for_print(drawn_tile)))
+
+            self.player.draw_tile(drawn_tile)
+
+            kan_type = self.player.should_call_kan(drawn_tile, False)
+            if kan_type and self.table.count_of_remaining_tiles > 1:
+                if kan_type == Meld.CHANKAN:
+                    meld_type = 5
+                else:
+                    meld_type = 4
+                await self._answer('<N type="{}" hai="{}" />'.format(meld_type, drawn_tile))
+                self.logger.info('We called a closed kan\\chankan set!')
+                return
+
+            discarded_tile = self.player.discard_tile()
+            self.logger.info('Discard: {}'.format(TilesConverter.to_one_line_string([discarded_tile])))
+
+            can_call_riichi = main_player.can_call_riichi()
+
+            # let's call riichi
+            if can_call_riichi:
+                await self._answer('<REACH hai="{}" />'.format(discarded_tile))
+                main_player.in_riichi = True
+        else:
+            # we had to add it to discards, to calculate remaining tiles correctly
+            discarded_tile = drawn_tile
+            self.table.add_discarded_tile(0, discarded_tile, True)
+
+        # tenhou format: <D p="133" />
+        await self._answer('<D p="{}"/>'.format(discarded_tile))
+        self._start_preparation()
+
+        self.logger.info('Remaining tiles: {}'.format(self.table.count_of_remaining_tiles))
+
+    async def _handle_dora(self, tag):
+        # new dora indicator after kan
+        tile = self.decoder.parse_dora_indicator(tag)
+        self.table.add_dora_indicator(tile)
+        self.logger.info('New dora indicator: {}'.format(TilesConverter.to_one_line_string([tile])))
+
+    async def _handle_reach(self, tag):
+        if tag.attributes.get('step') != '1':
+            return
+
+        who_called_riichi = self.decoder.parse_who_called_riichi(tag)
+        self.table.add_called_riichi(who_called_riichi)
+        self.logger.info('Riichi called by {} player'.format(who_called_riichi))
+
+    async def _handle_round_end(self, tag):
+        await self._answer('<NEXTREADY />')
+
+    async def _handle_final_scores(self, tag):
+        if 'owari' not in tag.attributes:
+            return
+
+        values = self.decoder.parse_final_scores_and_uma(tag)
+        self.table.set_players_scores(values['scores'], values['uma'])
+
+    async def _handle_prof(self, tag):
+        self.game_is_continue = False
+
+    async def _handle_meld(self, tag):
+        # set was called
+        if 'who' not in tag.attributes:
+            return
+
+        main_player = self.table.player
+
+        player_formatted_hand = ''
+        if self._meld_tile:
+            player_formatted_hand = main_player.format_hand_for_print(self._meld_tile)
+
+        meld = self.decoder.parse_meld(tag)
+        self.table.add_called_meld(meld.who, meld)
+        self.logger.info('Meld: {} by {}'.format(meld, meld.who))
+
+        # tenhou confirmed that we called a meld
+        # we had to do discard after this
+        if meld.who == 0:
+            if meld.type != Meld.KAN and meld.type != Meld.CHANKAN:
+                discarded_tile = self.player.discard_tile(self._tile_to_discard)
+
+                self.logger.info('With hand: {}'.format(player_formatted_hand))
+                self.logger.info('Discard tile after called meld: {}'.format(
+                    TilesConverter.to_one_line_string([discarded_tile]))
+                )
+
+                self.player.tiles.append(self._meld_tile)
+                await self._answer('<D p="{}"/>'.format(discarded_tile))
+                self._start_preparation()
+
+    async def _handle_win_suggestion(self, tag):
+        win_suggestions = ['8', '9', '10', '11', '12', '13', '15']
+        # we win by other player's discard
+        if tag.attributes.get('t') not in win_suggestions:
+            return
+
+        tile = tag.tile
+        enemy_seat = self.decoder.get_enemy_seat(tag)
+
+        if self.table.player.should_call_win(tile, enemy_seat):
+            await self._answer('<N type="6" />')
+        else:
+            await self._answer('<N />')
+
+    async def _handle_discard(self, tag):
+        tile = tag.tile
+
+        # <e21/> - is tsumogiri
+        # <E21/> - discard from the hand
+        if_tsumogiri = tag.name.islower()
+        player_seat = self.decoder.get_enemy_seat(tag)
+
+        self.table.add_discarded_tile(player_seat, tile, if_tsumogiri)
+
+        # open hand suggestions
+        if 't' not in tag.attributes:
+            return
+
+        # Possible t="" suggestions
+        # 1 pon
+        # 2 kan (it is a closed kan and can be send only to the self draw)
+        # 3 pon + kan
+        # 4 chi
+        # 5 pon + chi
+        # 7 pon + kan + chi
+
+        # should we call a kan?
+        if tag.attributes['t'] == '3' or tag.attributes['t'] == '7':
+            if self.player.should_call_kan(tile, True):
+                # 2 is open kan
+                await self._answer('<N type="2" />')
+                self.logger.info('We called an open kan set!')
+                return
+
+        # player with "g" discard is always our kamicha
+        is_kamicha_discard = False
+        if tag.name.lower() == 'g':
+            is_kamicha_discard = True
+
+        meld, self._tile_to_discard = self.player.try_to_call_meld(tile, is_kamicha_discard)
+        if meld:
+            self._meld_tile = tile
+
+            # 1 is pon
+            meld_type = '1'
+            if meld.type == Meld.CHI:
+                # yeah it is 3, not 4
+                # because of tenhou protocol
+                meld_type = '3'
+
+            tiles = meld.tiles
+            tiles.remove(self._meld_tile)
+
+            # try to call a meld
+            await self._answer('<N type="{}" hai0="{}" hai1="{}" />'.format(
+                meld_type,
+                tiles[0],
+                tiles[1]
+            ))
+        # this meld will not improve our hand
+        else:
+            await self._answer('<N />')
 
     def end_game(self, success=True):
         self.game_is_continue = False
         if success:
             self._send_message('<BYE />')
 
-        if self.keep_alive_thread:
-            self.keep_alive_thread.join()
+        if self.keep_alive_timer:
+            self.keep_alive_timer.cancel()
+            self.keep_alive_timer = None
+
+        self._stop_preparation()
+        self.player.ai.end_game()
 
         try:
-            self.socket.shutdown(socket.SHUT_RDWR)
-            self.socket.close()
+            if self.writer:
+                self.writer.close()
         except OSError:
             pass
 
         if success:
-            logger.info('End of the game')
+            self.logger.info('End of the game')
         else:
-            logger.error('Game was ended without success')
+            self.logger.error('Game was ended without success')
 
     def _send_message(self, message):
+        # all messages are sent from the event loop through this method,
+        # so they can't be mixed
         # tenhou requires an empty byte in the end of each sending message
-        logger.debug('Send: {}'.format(message))
+        self.logger.debug('Send: {}'.format(message))
         message += '\0'
-        self.socket.sendall(message.encode())
+        self.writer.write(message.encode())
+        self._last_send_time = time.monotonic()
+
+    async def _get_multiple_messages(self, timeout=None):
+        """
+        Wait for the next server messages
+        :param timeout: in seconds, empty list will be returned after it
+        :return: list of messages
+        """
+        try:
+            # tenhou can send multiple messages in one request
+            messages = await asyncio.wait_for(self.message_reader.read_messages(), timeout)
+        except asyncio.TimeoutError:
+            messages = []
 
-    def _read_message(self):
-        message = self.socket.recv(2048)
-        logger.debug('Get: {}'.format(message.decode('utf-8').replace('\x00', ' ')))
-        return message.decode('utf-8')
+        if not messages:
+            return []
 
-    def _get_multiple_messages(self):
-        # tenhou can send multiple messages in one request
-        messages = self._read_message()
-        messages = messages.split('\x00')
-        # last message always is empty after split, so let's exclude it
-        messages = messages[0:-1]
+        # timeouts and closed connection are not an activity of the server
+        self.last_activity_time = time.monotonic()
 
+        self.logger.debug('Get: {}'.format(' '.join(messages)))
         return messages
 
+    def _schedule_keep_alive_ping(self):
+        # timer will be cancelled in the end of the game
+        delay = self._last_send_time + TenhouClient.KEEP_ALIVE_INTERVAL - time.monotonic()
+        self.keep_alive_timer = asyncio.get_event_loop().call_later(max(delay, 0), self._send_keep_alive_ping)
+
     def _send_keep_alive_ping(self):
-        def send_request():
-            while self.game_is_continue:
-                self._send_message('<Z />')
+        if not self.game_is_continue:
+            return
 
-                # we can't use sleep(15), because we want to be able
-                # end thread in the middle of running
-                seconds_to_sleep = 15
-                for x in range(0, seconds_to_sleep * 2):
-                    if self.game_is_continue:
-                        sleep(0.5)
+        # there is no need in ping if we sent something recently
+        if time.monotonic() - self._last_send_time >= TenhouClient.KEEP_ALIVE_INTERVAL:
+            self._send_message('<Z />')
 
-        self.keep_alive_thread = Thread(target=send_request)
-        self.keep_alive_thread.start()
+        self._schedule_keep_alive_ping()
 
     def _pxr_tag(self):
         # I have no idea why we need to send it, but better to do it
-        if settings.IS_TOURNAMENT:
+        if self.settings.IS_TOURNAMENT:
             return '<PXR V="-1" />'
 
-        if settings.USER_ID == 'NoName':
+        if self.settings.USER_ID == 'NoName':
             return '<PXR V="1" />'
         else:
             return '<PXR V="9" />'
 
     def _build_game_type(self):
         # usual case, we specified game type to play
-        if settings.GAME_TYPE is not None:
-            return settings.GAME_TYPE
+        if self.settings.GAME_TYPE is not None:
+            return self.settings.GAME_TYPE
 
         # kyu lobby, hanchan ari-ari
         default_game_type = '9'
 
-        if settings.LOBBY != '0':
-            logger.error("We can't use dynamic game type and custom lobby. Default game type was set")
+        if self.settings.LOBBY != '0':
+            self.logger.error("We can't use dynamic game type and custom lobby. Default game type was set")
             return default_game_type
 
         if not self._rating_string:
-            logger.error("For NoName dynamic game type is not available. Default game type was set")
+            self.logger.error("For NoName dynamic game type is not available. Default game type was set")
             return default_game_type
 
         temp = self._rating_string.split(',')
         dan = int(temp[0])
         rate = float(temp[2])
-        logger.info('Player has {} rank and {} rate'.format(TenhouDecoder.RANKS[dan], rate))
+        self.logger.info('Player has {} rank and {} rate'.format(TenhouDecoder.RANKS[dan], rate))
 
         game_type = default_game_type
         # dan lobby, we can play here from 1 kyu
@@ -566,9 +731,9 @@ class TenhouClient(Client):
         self.table.has_aka_dora = is_aka
         self.table.has_open_tanyao = is_open_tanyao
 
-        logger.info('Game settings:')
-        logger.info('Aka dora: {}'.format(self.table.has_aka_dora))
-        logger.info('Open tanyao: {}'.format(self.table.has_open_tanyao))
-        logger.info('Game type: {}'.format(is_hanchan and 'hanchan' or 'tonpusen'))
+        self.logger.info('Game settings:')
+        self.logger.info('Aka dora: {}'.format(self.table.has_aka_dora))
+        self.logger.info('Open tanyao: {}'.format(self.table.has_open_tanyao))
+        self.logger.info('Game type: {}'.format(is_hanchan and 'hanchan' or 'tonpusen'))
 
         return True
@@ -6,7 +6,36 @@ import re
 from mahjong.meld import Meld
 
 
+class Tag(object):
+    """
+    Parsed tenhou message.
+    <E21/> is a tag with E name and 21 tile, <N who="1" m="34314" /> is a tag with N name and two attributes
+    """
+    name = None
+    tile = None
+    attributes = None
+    message = None
+
+    def __init__(self, name, tile, attributes, message):
+        self.name = name
+        self.tile = tile
+        self.attributes = attributes
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
 class TenhouDecoder(object):
+    TAG_REGEX = re.compile(r'<([A-Za-z]+)(\d*)')
+    ATTRIBUTE_REGEX = re.compile(r'(\w+)="([^"]*)"')
+
+    # D is our discard, other players discards can be called
+    DISCARD_TAGS = ('e', 'f', 'g', 'E', 'F', 'G')
+
+    # the last parsed tag, usually a message is parsed a few times in a row
+    _last_tag = None
+
     RANKS = [
         u'新人',
         u'9級',
@@ -31,18 +60,45 @@ class TenhouDecoder(object):
         u'天鳳位'
     ]
 
+    def parse_tag(self, message):
+        """
+        Parse the tag name and all attributes in one pass
+        :param message: string with one tenhou tag or already parsed Tag
+        :return: Tag
+        """
+        if isinstance(message, Tag):
+            return message
+
+        last_tag = self._last_tag
+        if last_tag and last_tag.message == message:
+            return last_tag
+
+        match = TenhouDecoder.TAG_REGEX.match(message)
+        if match:
+            name, tile = match.group(1), match.group(2)
+            tile = int(tile) if tile else None
+            attributes = dict(TenhouDecoder.ATTRIBUTE_REGEX.findall(message, match.end()))
+        else:
+            name, tile = '', None
+            attributes = dict(TenhouDecoder.ATTRIBUTE_REGEX.findall(message))
+
+        tag = Tag(name, tile, attributes, message)
+        self._last_tag = tag
+        return tag
+
     def parse_hello_string(self, message):
         rating_string = ''
         auth_message = ''
         new_rank_message = ''
 
-        if 'auth=' in message:
+        attributes = self.parse_tag(message).attributes
+        if 'auth' in attributes:
             auth_message = self.get_attribute_content(message, 'auth')
             # for NoName we don't have rating attribute
-            if 'PF4=' in message:
+            if 'PF4' in attributes:
                 rating_string = self.get_attribute_content(message, 'PF4')
 
-        if 'nintei' in message:
+        if 'nintei' in attributes:
             new_rank_message = unquote(self.get_attribute_content(message, 'nintei'))
 
         return auth_message, rating_string, new_rank_message
@@ -114,8 +170,7 @@ class TenhouDecoder(object):
 
     def parse_tile(self, message):
         # tenhou format: <t23/>, <e23/>, <f23 t="4"/>, <f23/>, <g23/>
-        result = re.match(r'^<[tefgEFGTUVWD]+\d*', message).group()
-        return int(result[2:])
+        return self.parse_tag(message).tile
 
     def parse_table_state_after_reconnection(self, message):
         players = []
@@ -126,7 +181,7 @@ class TenhouDecoder(object):
             }
 
             discard_attr = 'kawa{}'.format(x)
-            if discard_attr in message:
+            if self.get_attribute_content(message, discard_attr):
                 discards = self.get_attribute_content(message, discard_attr)
                 discards = [int(x) for x in discards.split(',')]
 
@@ -137,7 +192,7 @@ class TenhouDecoder(object):
                 player['discards'] = discards
 
             melds_attr = 'm{}'.format(x)
-            if melds_attr in message:
+            if self.get_attribute_content(message, melds_attr):
                 melds = self.get_attribute_content(message, melds_attr)
                 melds = [int(x) for x in melds.split(',')]
                 for item in melds:
@@ -243,25 +298,56 @@ class TenhouDecoder(object):
 
         return result
 
+    def parse_log_rounds(self, log_content):
+        """
+        Split mjlog content to rounds
+        :param log_content: string with mjlog xml
+        :return: list of rounds, each round is a list of tags starting from INIT tag
+        """
+        rounds = []
+
+        game_round = []
+        tag_start = 0
+        tag = None
+        for x in range(0, len(log_content)):
+            if log_content[x] == '>':
+                tag = log_content[tag_start:x + 1]
+                tag_start = x + 1
+
+            # not useful tags
+            if tag and ('mjloggm' in tag or 'TAIKYOKU' in tag):
+                tag = None
+
+            # new round was started
+            if tag and 'INIT' in tag:
+                rounds.append(game_round)
+                game_round = []
+
+            # the end of the game
+            if tag and 'owari' in tag:
+                rounds.append(game_round)
+
+            if tag:
+                # to save some memory we can remove not needed information from logs
+                if 'INIT' in tag:
+                    # we dont need seed information
+                    find = re.compile(r'shuffle="[^"]*"')
+                    tag = find.sub('', tag)
+
+                # add processed tag to the round
+                game_round.append(tag)
+                tag = None
+
+        return rounds[1:]
+
     def get_attribute_content(self, message, attribute_name):
-        result = re.findall(r'{}="([^"]*)"'.format(attribute_name), message)
-        return result and result[0] or None
+        return self.parse_tag(message).attributes.get(attribute_name) or None
 
     def is_discarded_tile_message(self, message):
-        if '<GO' in message:
-            return False
-
-        if '<FURITEN' in message:
-            return False
-
-        match_discard = re.match(r"^<[efgEFG]+\d*", message)
-        if match_discard:
-            return True
-
-        return False
+        return self.parse_tag(message).name in TenhouDecoder.DISCARD_TAGS
 
     def get_enemy_seat(self, message):
-        player_sign = message.lower()[1]
+        player_sign = self.parse_tag(message).name.lower()
         if player_sign == 'e':
             player_seat = 1
         elif player_sign == 'f':
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+from urllib.parse import quote
+
+from mahjong.constants import EAST
+from mahjong.meld import Meld
+
+
+class TenhouEncoder(object):
+    """
+    Build tenhou messages from the engine events, it is the reverse of TenhouDecoder.
+    Engine seats are absolute, messages are built from the point of view of the seat:
+    it is always 0 in own messages, 1 is shimocha, 2 is toimen and 3 is kamicha
+    """
+    DRAW_TAGS = ('T', 'U', 'V', 'W')
+    DISCARD_TAGS = ('D', 'E', 'F', 'G')
+
+    # t="" flags of draw and discard messages
+    DRAW_TSUMO = 16
+    DISCARD_PON = 1
+    DISCARD_KAN = 2
+    DISCARD_CHI = 4
+    DISCARD_RON = 8
+
+    DORA_YAKU_ID = 52
+    URA_DORA_YAKU_ID = 53
+    AKA_DORA_YAKU_ID = 54
+    # mahjong library has the same ids for all winds
+    PLAYER_WIND_YAKU_ID = 10
+    ROUND_WIND_YAKU_ID = 14
+
+    seat = 0
+
+    def __init__(self, seat=0):
+        """
+        :param seat: absolute seat of the player who will receive messages, 0 for logs
+        """
+        self.seat = seat
+
+    def relative_seat(self, seat):
+        return (seat - self.seat) % 4
+
+    def rotate(self, values):
+        """
+        :param values: four values by absolute seats
+        :return: the same values by relative seats
+        """
+        return [values[(x + self.seat) % 4] for x in range(0, 4)]
+
+    def hello_tag(self, name, auth):
+        return '<HELO uname="{}" auth="{}" PF4="0,0,1500.00,0" />'.format(quote(name), auth)
+
+    def go_tag(self, game_type, lobby):
+        return '<GO type="{}" lobby="{}" />'.format(game_type, lobby)
+
+    def names_tag(self, names):
+        names = self.rotate(names)
+        return '<UN n0="{}" n1="{}" n2="{}" n3="{}" dan="0,0,0,0" rate="1500.00,1500.00,1500.00,1500.00" ' \
+               'sx="M,M,M,M" />'.format(*[quote(x) for x in names])
+
+    def taikyoku_tag(self, log_id):
+        return '<TAIKYOKU oya="{}" log="{}" />'.format(self.relative_seat(0), log_id)
+
+    def init_tag(self, round_info, hand=None):
+        """
+        :param round_info: RoundInfo
+        :param hand: tiles of the player, without it tiles of all players are added (for logs)
+        """
+        seed = [
+            round_info.round_number,
+            round_info.count_of_honba_sticks,
+            round_info.count_of_riichi_sticks,
+            round_info.dice[0],
+            round_info.dice[1],
+            round_info.dora_indicator,
+        ]
+        attributes = [
+            ('seed', self._join(seed)),
+            ('ten', self._format_scores(round_info.scores)),
+            ('oya', self.relative_seat(round_info.dealer)),
+        ]
+        if hand is not None:
+            attributes.append(('hai', self._join(hand)))
+        else:
+            for seat, tiles in enumerate(self.rotate(round_info.hands)):
+                attributes.append(('hai{}'.format(seat), self._join(tiles)))
+        return self._build_tag('INIT', attributes)
+
+    def draw_tag(self, seat, tile=None, flags=0):
+        """
+        :param tile: it is hidden for other players
+        """
+        name = TenhouEncoder.DRAW_TAGS[self.relative_seat(seat)]
+        if tile is not None:
+            name += str(tile)
+        return self._build_tag(name, flags and [('t', flags)] or [])
+
+    def discard_tag(self, seat, tile, is_tsumogiri, flags=0):
+        name = TenhouEncoder.DISCARD_TAGS[self.relative_seat(seat)]
+        if is_tsumogiri:
+            name = name.lower()
+        return self._build_tag(name + str(tile), flags and [('t', flags)] or [])
+
+    def meld_tag(self, meld):
+        return self._build_tag('N', [('who', self.relative_seat(meld.who)), ('m', self.encode_meld(meld))])
+
+    def riichi_tag(self, seat, step, scores=None):
+        attributes = [('who', self.relative_seat(seat))]
+        if scores:
+            attributes.append(('ten', self._format_scores(scores)))
+        attributes.append(('step', step))
+        return self._build_tag('REACH', attributes)
+
+    def dora_tag(self, tile):
+        return self._build_tag('DORA', [('hai', tile)])
+
+    def agari_tag(self, win, result):
+        """
+        :param win: WinResult
+        :param result: RoundResult
+        """
+        estimation = win.estimation
+        is_open_hand = any([x.opened for x in win.melds])
+
+        cost = estimation.cost['main']
+        if win.is_tsumo:
+            if win.player_wind == EAST:
+                cost = estimation.cost['main'] * 3
+            else:
+                cost = estimation.cost['main'] + estimation.cost['additional'] * 2
+
+        attributes = [
+            ('ba', self._join([result.count_of_honba_sticks, result.count_of_riichi_sticks])),
+            ('hai', self._join(sorted(win.tiles))),
+        ]
+        if win.melds:
+            attributes.append(('m', self._join([self.encode_meld(x) for x in win.melds])))
+        attributes += [
+            ('machi', win.win_tile),
+            ('ten', self._join([estimation.fu, cost, estimation.limit])),
+        ]
+
+        yakuman = [x for x in estimation.yaku if x.is_yakuman]
+        if yakuman:
+            attributes.append(('yakuman', self._join([self._yaku_id(x, win) for x in yakuman])))
+        else:
+            yaku = []
+            for item in estimation.yaku:
+                yaku += [self._yaku_id(item, win), is_open_hand and item.han_open or item.han_closed]
+
+            for yaku_id, han in ((TenhouEncoder.DORA_YAKU_ID, estimation.dora),
+                                 (TenhouEncoder.AKA_DORA_YAKU_ID, estimation.aka_dora),
+                                 (TenhouEncoder.URA_DORA_YAKU_ID, estimation.ura_dora)):
+                if han:
+                    yaku += [yaku_id, han]
+            attributes.append(('yaku', self._join(yaku)))
+
+        attributes.append(('doraHai', self._join(win.dora_indicators)))
+        if win.ura_dora_indicators:
+            attributes.append(('doraHaiUra', self._join(win.ura_dora_indicators)))
+
+        attributes += [
+            ('who', self.relative_seat(win.who)),
+            ('fromWho', self.relative_seat(win.from_who)),
+            ('sc', self._format_score_changes(result)),
+        ]
+        if result.game_result:
+            attributes.append(('owari', self._format_final_scores(result.game_result)))
+        return self._build_tag('AGARI', attributes)
+
+    def ryuukyoku_tag(self, result):
+        """
+        :param result: RoundResult of exhaustive draw
+        """
+        attributes = [
+            ('ba', self._join([result.count_of_honba_sticks, result.count_of_riichi_sticks])),
+            ('sc', self._format_score_changes(result)),
+        ]
+        for seat in range(0, 4):
+            absolute_seat = (seat + self.seat) % 4
+            if absolute_seat in result.tempai:
+                attributes.append(('hai{}'.format(seat), self._join(sorted(result.hands[absolute_seat]))))
+
+        if result.game_result:
+            attributes.append(('owari', self._format_final_scores(result.game_result)))
+        return self._build_tag('RYUUKYOKU', attributes)
+
+    def encode_meld(self, meld):
+        """
+        :param meld: Meld, who and from_who can be absolute or relative
+        :return: tenhou m="" value
+        """
+        from_who = (meld.from_who - meld.who) % 4
+        tiles = sorted(meld.tiles)
+        base = tiles[0] // 4
+
+        if meld.type == Meld.CHI:
+            called = tiles.index(meld.called_tile)
+            base_and_called = ((base // 9) * 7 + base % 9) * 3 + called
+            data = (base_and_called << 10) | 0x4
+            for i, tile in enumerate(tiles):
+                data |= (tile % 4) << (3 + i * 2)
+            return data | from_who
+
+        if meld.type == Meld.PON:
+            t4 = [x for x in range(0, 4) if x not in [y % 4 for y in tiles]][0]
+            called = tiles.index(meld.called_tile)
+            return ((base * 3 + called) << 9) | 0x8 | (t4 << 5) | from_who
+
+        if meld.type == Meld.CHANKAN:
+            t4 = meld.called_tile % 4
+            # called tile of the original pon is not known, the first one is used
+            return ((base * 3) << 9) | 0x10 | (t4 << 5) | from_who
+
+        # for closed kan from_who is 0
+        return ((base * 4 + meld.called_tile % 4) << 8) | from_who
+
+    def _yaku_id(self, yaku, win):
+        name = type(yaku).__name__
+        if name == 'YakuhaiOfPlace':
+            return TenhouEncoder.PLAYER_WIND_YAKU_ID + win.player_wind - EAST
+        if name == 'YakuhaiOfRound':
+            return TenhouEncoder.ROUND_WIND_YAKU_ID + win.round_wind - EAST
+        return yaku.yaku_id
+
+    def _format_scores(self, scores):
+        return self._join([x // 100 for x in self.rotate(scores)])
+
+    def _format_score_changes(self, result):
+        before = [x - y for x, y in zip(result.scores, result.score_changes)]
+        values = []
+        for scores, change in zip(self.rotate(before), self.rotate(result.score_changes)):
+            values += [scores // 100, change // 100]
+        return self._join(values)
+
+    def _format_final_scores(self, game_result):
+        values = []
+        for scores, uma in zip(self.rotate(game_result.scores), self.rotate(game_result.uma)):
+            values += [scores // 100, '{:.1f}'.format(uma)]
+        return self._join(values)
+
+    def _join(self, values):
+        return ','.join([str(x) for x in values])
+
+    def _build_tag(self, name, attributes):
+        attributes = ''.join([' {}="{}"'.format(x, y) for x, y in attributes])
+        return '<{}{} />'.format(name, attributes)
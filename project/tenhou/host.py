@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+from tenhou.client import TenhouClient
+from tenhou.main import play_game
+from utils.logger import get_session_logger
+
+
+class BotSession(object):
+    """
+    One bot of the host. It plays games one by one, each game with a new client
+    """
+    name = None
+    settings = None
+    logger = None
+    client = None
+    # task of the current game
+    game_task = None
+
+    count_of_games = 0
+    count_of_restarts = 0
+
+    def __init__(self, name, session_settings):
+        self.name = name
+        self.settings = session_settings
+        self.logger = get_session_logger(session_settings.USER_ID, name)
+        self.count_of_games = 0
+        self.count_of_restarts = 0
+
+    def is_hung(self, timeout):
+        """
+        Game is not ended, but client didn't read anything from the server for a long time
+        :param timeout: in seconds
+        :return: boolean
+        """
+        if not self.game_task or self.game_task.done() or not self.client.game_is_continue:
+            return False
+
+        return time.monotonic() - self.client.last_activity_time > timeout
+
+
+class BotHost(object):
+    """
+    Many bot sessions in one event loop.
+
+    Sessions have own settings (user id, lobby, game type, AI package),
+    but they are sharing imported modules and AI caches, so one process is enough for all bots of the box.
+    Supervisor restarts the game of the session, if the server stopped to answer
+    """
+    CHECK_INTERVAL = 10
+    # pause before the next game of the session, so errors will not flood the server
+    RESTART_DELAY = 5
+
+    sessions = None
+    hang_timeout = None
+    check_interval = CHECK_INTERVAL
+    restart_delay = RESTART_DELAY
+    is_running = False
+
+    def __init__(self, sessions_settings, hang_timeout):
+        """
+        :param sessions_settings: list of Settings, one for each session
+        :param hang_timeout: in seconds, session without server messages for this time will be restarted
+        """
+        # tenhou doesn't allow two connections with the same user id
+        user_ids = [x.USER_ID for x in sessions_settings]
+        if len(set(user_ids)) != len(user_ids):
+            raise ValueError('Each session requires own USER_ID')
+
+        self.sessions = []
+        for i, session_settings in enumerate(sessions_settings):
+            self.sessions.append(BotSession('session {}'.format(i + 1), session_settings))
+        self.hang_timeout = hang_timeout
+
+    async def run(self):
+        """
+        Play games in all sessions till the host will be stopped
+        """
+        self.is_running = True
+        supervisor = asyncio.ensure_future(self._supervise())
+        try:
+            await asyncio.gather(*[self._run_session(x) for x in self.sessions])
+        finally:
+            supervisor.cancel()
+
+    def stop(self):
+        self.is_running = False
+        for session in self.sessions:
+            if session.game_task and not session.game_task.done():
+                session.client.end_game(False)
+                session.game_task.cancel()
+
+    def create_client(self, session):
+        client = TenhouClient(session_settings=session.settings)
+        client.logger = session.logger
+        return client
+
+    def restart_session(self, session):
+        """
+        Stop the current game of the session, the next game will be started after it
+        """
+        session.logger.warning('No messages from the server for {} seconds, restarting the game'.format(
+            self.hang_timeout))
+        session.count_of_restarts += 1
+        session.client.end_game(False)
+        session.game_task.cancel()
+
+    async def _run_session(self, session):
+        while self.is_running:
+            session.logger.info('Start the game, AI: {}, {}'.format(session.settings.AI_CLASS.version,
+                                                                    session.settings.AI_PACKAGE))
+            session.client = self.create_client(session)
+            session.game_task = asyncio.ensure_future(play_game(session.client))
+
+            # game task can be cancelled by supervisor, so we are not awaiting it directly
+            await asyncio.wait([session.game_task])
+            session.count_of_games += 1
+
+            if not session.game_task.cancelled() and session.game_task.exception():
+                session.logger.error('Game failed: {}'.format(session.game_task.exception()))
+
+            if self.is_running:
+                await asyncio.sleep(self.restart_delay)
+
+    async def _supervise(self):
+        while self.is_running:
+            await asyncio.sleep(self.check_interval)
+
+            for session in self.sessions:
+                if session.is_hung(self.hang_timeout):
+                    self.restart_session(session)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import os
+
+from game.engine.agent import GameObserver
+from tenhou.encoder import TenhouEncoder
+
+
+class TenhouLogWriter(GameObserver):
+    """
+    Write the engine game in tenhou mjlog format.
+    Logs are saved to the logs directory with the log id as a name, so reproducer can load them
+    """
+    log_id = None
+    game_type = None
+    lobby = None
+    names = None
+    logs_directory = None
+
+    game = None
+    tags = None
+
+    def __init__(self, log_id, game_type, lobby, names, logs_directory=None):
+        """
+        :param names: names of players by absolute seats
+        :param logs_directory: by default it is the project logs directory
+        """
+        self.log_id = log_id
+        self.game_type = game_type
+        self.lobby = lobby
+        self.names = names
+        self.logs_directory = logs_directory or os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'logs')
+        self.encoder = TenhouEncoder(0)
+        self.tags = []
+
+    @property
+    def log_path(self):
+        return os.path.join(self.logs_directory, self.log_id)
+
+    def game_started(self, game):
+        self.game = game
+        self.tags = [
+            '<mjloggm ver="2.3">',
+            '<SHUFFLE seed="{}" ref="" />'.format(game.seed is not None and str(game.seed) or ''),
+            self.encoder.go_tag(self.game_type, self.lobby),
+            self.encoder.names_tag(self.names),
+            self.encoder.taikyoku_tag(self.log_id),
+        ]
+
+    def round_started(self, round_info):
+        self.tags.append(self.encoder.init_tag(round_info))
+
+    def tile_drawn(self, seat, tile):
+        self.tags.append(self.encoder.draw_tag(seat, tile))
+
+    def tile_discarded(self, seat, tile, is_tsumogiri):
+        self.tags.append(self.encoder.discard_tag(seat, tile, is_tsumogiri))
+
+    def meld_called(self, seat, meld):
+        self.tags.append(self.encoder.meld_tag(meld))
+
+    def riichi_called(self, seat, step):
+        scores = step == 2 and [x.scores for x in self.game.seats] or None
+        self.tags.append(self.encoder.riichi_tag(seat, step, scores))
+
+    def dora_revealed(self, tile):
+        self.tags.append(self.encoder.dora_tag(tile))
+
+    def round_ended(self, result):
+        if result.is_draw:
+            self.tags.append(self.encoder.ryuukyoku_tag(result))
+        else:
+            for win in result.wins:
+                self.tags.append(self.encoder.agari_tag(win, result))
+
+    def game_ended(self, result):
+        self.tags.append('</mjloggm>')
+
+        if not os.path.exists(self.logs_directory):
+            os.mkdir(self.logs_directory)
+
+        with open(self.log_path, 'w') as f:
+            f.write(''.join(self.tags))
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import logging
 
 from tenhou.client import TenhouClient
@@ -8,23 +9,43 @@ from utils.settings_handler import settings
 logger = logging.getLogger('tenhou')
 
 
-def connect_and_play():
+def connect_and_play(user_ids=None):
+    """
+    Play games in one event loop
+    :param user_ids: different user ids of bots that will play at the same time, by default USER_ID setting is used
+    """
     logger.info('AI: {}, {}'.format(settings.AI_CLASS.version, settings.AI_PACKAGE))
 
-    client = TenhouClient()
-    client.connect()
+    if user_ids and len(user_ids) > 1:
+        clients = [TenhouClient(session_settings=settings.copy(USER_ID=x)) for x in user_ids]
+    else:
+        clients = [TenhouClient()]
 
+    loop = asyncio.get_event_loop()
     try:
-        was_auth = client.authenticate()
+        loop.run_until_complete(asyncio.gather(*[play_game(x) for x in clients]))
+    except KeyboardInterrupt:
+        logger.info('Ending the game...')
+        for client in clients:
+            client.end_game()
+    finally:
+        settings.AI_CLASS.release_resources()
+
+
+async def play_game(client):
+    await client.connect()
+
+    try:
+        was_auth = await client.authenticate()
 
         if was_auth:
-            client.start_game()
+            await client.start_game()
         else:
             client.end_game()
-    except KeyboardInterrupt:
-        logger.info('Ending the game...')
-        client.end_game()
+    # before Python 3.8 it is an Exception, cancelled game should be stopped by the caller
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
-        logger.exception('Unexpected exception', exc_info=e)
-        logger.info('Ending the game...')
+        client.logger.exception('Unexpected exception', exc_info=e)
+        client.logger.info('Ending the game...')
         client.end_game(False)
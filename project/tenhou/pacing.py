@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+logger = logging.getLogger('tenhou')
+
+
+class ActionPacer(object):
+    """
+    Answers are sent as soon as decision is ready, but not earlier than min delay after the prompt
+    (to play like a human) and min delay can't move the answer close to the server time limit
+    """
+    # we need some time to deliver the answer to the server
+    TIME_LIMIT_MARGIN = 0.5
+
+    min_delay = None
+    time_limit = None
+    prompt_time = None
+
+    def __init__(self, min_delay, time_limit):
+        """
+        :param min_delay: min time in seconds between the prompt and the answer
+        :param time_limit: server time limit for one action in seconds
+        """
+        self.min_delay = min_delay
+        self.time_limit = time_limit
+        self.prompt_time = time.perf_counter()
+
+    def prompt_received(self, prompt_time=None):
+        """
+        :param prompt_time: perf_counter time when the prompt was received, by default it is the current time
+        """
+        self.prompt_time = prompt_time or time.perf_counter()
+
+    def delay(self):
+        """
+        :return: time in seconds to wait before the answer to the last prompt
+        """
+        elapsed_time = time.perf_counter() - self.prompt_time
+        if elapsed_time > self.time_limit:
+            logger.warning('Answer took {:.2f} seconds, it is more than time limit'.format(elapsed_time))
+
+        max_delay = max(self.time_limit - ActionPacer.TIME_LIMIT_MARGIN, 0)
+        return max(min(self.min_delay, max_delay) - elapsed_time, 0)
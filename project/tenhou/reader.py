@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+logger = logging.getLogger('tenhou')
+
+
+class MessageReader(object):
+    """
+    Each tenhou message ends with NUL byte. One socket read can contain several messages
+    or only a part of the message, so received bytes are kept in the buffer
+    and only complete messages are decoded
+    """
+    SEPARATOR = 0
+    READ_SIZE = 4096
+
+    stream = None
+    buffer = None
+    # perf_counter time when the last returned messages were received
+    received_time = None
+
+    def __init__(self, stream):
+        """
+        :param stream: object with read(n) coroutine, like asyncio.StreamReader or SocketMock
+        """
+        self.stream = stream
+        self.buffer = bytearray()
+
+    async def read_messages(self):
+        """
+        Wait for the next complete messages
+        :return: list of messages, empty list if stream was closed
+        """
+        while True:
+            data = await self.stream.read(MessageReader.READ_SIZE)
+            if not data:
+                if self.buffer:
+                    logger.warning('Stream was closed in the middle of the message: {}'.format(self.buffer))
+                    self.buffer.clear()
+                return []
+
+            messages = self.feed(data)
+            if messages:
+                self.received_time = time.perf_counter()
+                return messages
+
+    def feed(self, data):
+        """
+        Add received bytes to the buffer
+        :param data: bytes
+        :return: list of messages that were completed by these bytes
+        """
+        buffer = self.buffer
+        # previous part of the buffer doesn't have separators
+        position = len(buffer)
+        buffer.extend(data)
+
+        messages = []
+        end = buffer.find(MessageReader.SEPARATOR, position)
+        if end == -1:
+            return messages
+
+        start = 0
+        with memoryview(buffer) as view:
+            while end != -1:
+                messages.append(str(view[start:end], 'utf-8'))
+                start = end + 1
+                end = buffer.find(MessageReader.SEPARATOR, start)
+
+        del buffer[:start]
+        return messages
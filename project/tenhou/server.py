@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import datetime
+import logging
+import random
+import time
+from urllib.parse import unquote
+
+from game.engine.agent import Action, GameAgent
+from game.engine.game import MahjongGame
+from game.engine.rules import GameRules
+from tenhou.decoder import TenhouDecoder
+from tenhou.encoder import TenhouEncoder
+from tenhou.log_writer import TenhouLogWriter
+from tenhou.reader import MessageReader
+
+logger = logging.getLogger('tenhou')
+
+
+def percentile(values, percent):
+    """
+    :param values: list of numbers
+    :param percent: 0 - 100
+    :return: nearest rank percentile or 0 for empty list
+    """
+    if not values:
+        return 0
+
+    values = sorted(values)
+    index = int(round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+class ClientConnection(object):
+    """
+    Connection of one tenhou client. Messages are read by a separate task,
+    so the game can wait for answers with a timeout
+    """
+    # these messages are not answers to the server prompts
+    IGNORED_TAGS = ('Z', 'PXR')
+
+    name = None
+    is_closed = False
+
+    def __init__(self, reader, writer):
+        self.writer = writer
+        self.decoder = TenhouDecoder()
+        self.messages = asyncio.Queue()
+        self.message_reader = MessageReader(reader)
+        self.reader_task = asyncio.ensure_future(self._read())
+
+    async def get_tag(self, timeout=None):
+        """
+        :param timeout: in seconds
+        :return: Tag or None after timeout or when connection was closed
+        """
+        if self.is_closed and self.messages.empty():
+            return None
+
+        try:
+            message = await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        return message and self.decoder.parse_tag(message) or None
+
+    def flush(self):
+        """
+        Remove answers that came after the prompt was resolved,
+        for example client can send both ron and pon answers to one discard
+        """
+        while not self.messages.empty():
+            message = self.messages.get_nowait()
+            if message:
+                logger.debug('{}: skip stale answer {}'.format(self.name, message))
+
+    def send(self, message):
+        if self.is_closed:
+            return
+
+        logger.debug('{}: send {}'.format(self.name, message))
+        self.writer.write((message + '\0').encode())
+
+    def close(self):
+        self.is_closed = True
+        self.reader_task.cancel()
+        self.writer.close()
+
+    async def _read(self):
+        while True:
+            try:
+                messages = await self.message_reader.read_messages()
+            except (ConnectionError, OSError):
+                messages = []
+
+            if not messages:
+                self.is_closed = True
+                # wake up the waiting game
+                self.messages.put_nowait(None)
+                return
+
+            for message in messages:
+                if self.decoder.parse_tag(message).name not in ClientConnection.IGNORED_TAGS:
+                    self.messages.put_nowait(message)
+
+
+class RemoteSeat(GameAgent):
+    """
+    Engine player that is controlled by the tenhou client.
+    Events are sent with seats relative to the client, answers are translated to engine actions.
+    Client that didn't answer in time gets the default action: tsumogiri or pass
+    """
+    connection = None
+    action_timeout = None
+    encoder = None
+    game = None
+    game_type = None
+    lobby = None
+
+    # seconds between the prompt and the answer
+    latencies = None
+    count_of_timeouts = 0
+
+    _prompt_time = None
+
+    def __init__(self, connection, action_timeout):
+        self.connection = connection
+        self.action_timeout = action_timeout
+        self.latencies = []
+        self.count_of_timeouts = 0
+
+    def send_game_start(self, game_type, lobby, names, log_id):
+        self.encoder = TenhouEncoder(self.seat)
+        self.game_type = game_type
+        self.lobby = lobby
+        self.connection.send(self.encoder.go_tag(game_type, lobby))
+        self.connection.send(self.encoder.names_tag(names))
+        self.connection.send(self.encoder.taikyoku_tag(log_id))
+
+    async def ready(self):
+        # ready message is sent by client after the round end or the game start
+        start_time = time.monotonic()
+        while True:
+            timeout = self.action_timeout * 3 - (time.monotonic() - start_time)
+            tag = await self.connection.get_tag(max(timeout, 0))
+            if not tag or tag.name == 'NEXTREADY':
+                return
+
+    async def choose_draw_action(self, tile, options):
+        flags = options.can_tsumo and TenhouEncoder.DRAW_TSUMO or 0
+        self._prompt(self.encoder.draw_tag(self.seat, tile, flags))
+
+        riichi_tile = None
+        while True:
+            tag = await self._wait_answer()
+            if not tag:
+                return Action(Action.DISCARD, tile)
+
+            if tag.name == 'REACH':
+                # discard message will be the next one
+                riichi_tile = int(tag.attributes['hai'])
+            elif tag.name == 'D':
+                discarded_tile = int(tag.attributes['p'])
+                if riichi_tile is not None:
+                    return self._answered(Action(Action.RIICHI, discarded_tile))
+                return self._answered(Action(Action.DISCARD, discarded_tile))
+            elif tag.name == 'N':
+                meld_type = tag.attributes.get('type')
+                if meld_type == '7':
+                    return self._answered(Action(Action.TSUMO, tile))
+                if meld_type == '4':
+                    return self._answered(Action(Action.CLOSED_KAN, int(tag.attributes['hai'])))
+                if meld_type == '5':
+                    return self._answered(Action(Action.ADDED_KAN, int(tag.attributes['hai'])))
+
+    async def choose_call(self, seat, tile, is_tsumogiri, options):
+        flags = 0
+        flags |= options.can_pon and TenhouEncoder.DISCARD_PON or 0
+        flags |= options.can_open_kan and TenhouEncoder.DISCARD_KAN or 0
+        flags |= options.can_chi and TenhouEncoder.DISCARD_CHI or 0
+        flags |= options.can_ron and TenhouEncoder.DISCARD_RON or 0
+        self._prompt(self.encoder.discard_tag(seat, tile, is_tsumogiri, flags))
+
+        while True:
+            tag = await self._wait_answer()
+            if not tag:
+                return Action(Action.PASS)
+
+            if tag.name != 'N':
+                continue
+
+            meld_type = tag.attributes.get('type')
+            tiles = 'hai0' in tag.attributes and [int(tag.attributes['hai0']), int(tag.attributes['hai1'])] or None
+            action_type = {
+                '6': Action.RON,
+                '1': Action.PON,
+                '3': Action.CHI,
+                '2': Action.OPEN_KAN,
+            }.get(meld_type, Action.PASS)
+            return self._answered(Action(action_type, tile, tiles))
+
+    async def choose_discard_after_call(self):
+        # client discards a tile after the server confirmed its meld
+        while True:
+            tag = await self._wait_answer()
+            if not tag:
+                return None
+
+            if tag.name == 'D':
+                return self._answered(int(tag.attributes['p']))
+
+    def game_started(self, game):
+        self.game = game
+
+    def round_started(self, round_info):
+        self.connection.send(self.encoder.init_tag(round_info, round_info.hands[self.seat]))
+
+    def tile_drawn(self, seat, tile):
+        self.connection.send(self.encoder.draw_tag(seat))
+
+    def tile_discarded(self, seat, tile, is_tsumogiri):
+        self.connection.send(self.encoder.discard_tag(seat, tile, is_tsumogiri))
+
+    def meld_called(self, seat, meld):
+        if seat == self.seat:
+            # the next answer is the discard after the call
+            self._prompt(self.encoder.meld_tag(meld))
+        else:
+            self.connection.send(self.encoder.meld_tag(meld))
+
+    def riichi_called(self, seat, step):
+        scores = step == 2 and [x.scores for x in self.game.seats] or None
+        self.connection.send(self.encoder.riichi_tag(seat, step, scores))
+
+    def dora_revealed(self, tile):
+        self.connection.send(self.encoder.dora_tag(tile))
+
+    def round_ended(self, result):
+        if result.is_draw:
+            self.connection.send(self.encoder.ryuukyoku_tag(result))
+        else:
+            for win in result.wins:
+                self.connection.send(self.encoder.agari_tag(win, result))
+
+    def game_ended(self, result):
+        self.connection.send('<PROF lobby="{}" type="{}" add="" />'.format(self.lobby, self.game_type))
+
+    def _prompt(self, message):
+        self.connection.flush()
+        self.connection.send(message)
+        self._prompt_time = time.monotonic()
+
+    async def _wait_answer(self):
+        timeout = self.action_timeout - (time.monotonic() - self._prompt_time)
+        tag = await self.connection.get_tag(max(timeout, 0))
+        if not tag and not self.connection.is_closed:
+            self.count_of_timeouts += 1
+            logger.warning('{}: answer timeout'.format(self.connection.name))
+        return tag
+
+    def _answered(self, answer):
+        self.latencies.append(time.monotonic() - self._prompt_time)
+        return answer
+
+
+class TenhouServer(object):
+    """
+    Local stand-in for tenhou.net.
+    It speaks enough of the protocol to play games between TenhouClient instances:
+    authentication, lobby join, game messages and final results.
+    Games are written to tenhou logs, action latencies and throughput are logged after each game
+    """
+    ACTION_TIMEOUT = 10
+    AUTH_TIMEOUT = 10
+
+    host = None
+    port = None
+    action_timeout = ACTION_TIMEOUT
+    logs_directory = None
+    server = None
+
+    # clients waiting for the game, by (lobby, game type)
+    waiting_clients = None
+    games = None
+
+    count_of_games = 0
+    count_of_actions = 0
+    latencies = None
+    start_time = None
+
+    def __init__(self, host, port, action_timeout=ACTION_TIMEOUT, logs_directory=None):
+        """
+        :param port: 0 for any free port
+        :param action_timeout: in seconds, after it the default action is used
+        :param logs_directory: directory for game logs, by default it is the project logs directory
+        """
+        self.host = host
+        self.port = port
+        self.action_timeout = action_timeout
+        self.logs_directory = logs_directory
+        self.waiting_clients = {}
+        self.games = []
+        self.count_of_games = 0
+        self.count_of_actions = 0
+        self.latencies = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.start_time = time.monotonic()
+        logger.info('Server is listening on {}:{}'.format(self.host, self.port))
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+        for game in self.games:
+            game.cancel()
+
+        for clients in self.waiting_clients.values():
+            for connection in clients:
+                connection.close()
+
+        logger.info(self.format_summary())
+
+    def format_summary(self):
+        elapsed_time = time.monotonic() - (self.start_time or time.monotonic())
+        return 'Server: {} games, {} actions, {:.1f} actions/s, latency p50 {:.1f} ms, p95 {:.1f} ms, ' \
+               'p99 {:.1f} ms'.format(
+                   self.count_of_games,
+                   self.count_of_actions,
+                   elapsed_time and self.count_of_actions / elapsed_time or 0,
+                   percentile(self.latencies, 50) * 1000,
+                   percentile(self.latencies, 95) * 1000,
+                   percentile(self.latencies, 99) * 1000,
+               )
+
+    def build_rules(self, game_type):
+        """
+        :param game_type: tenhou game type
+        :return: GameRules
+        """
+        return GameRules(
+            is_hanchan=bool(game_type & 0x8),
+            has_aka_dora=not game_type & 0x2,
+            has_open_tanyao=not game_type & 0x4,
+        )
+
+    async def _handle_connection(self, reader, writer):
+        connection = ClientConnection(reader, writer)
+
+        tag = await connection.get_tag(TenhouServer.AUTH_TIMEOUT)
+        if not tag or tag.name != 'HELO':
+            connection.close()
+            return
+
+        connection.name = unquote(tag.attributes.get('name', 'NoName'))
+        auth = '{:%Y%m%d}-{:08x}'.format(datetime.datetime.now(), random.getrandbits(32))
+        connection.send(TenhouEncoder().hello_tag(connection.name, auth))
+
+        tag = await connection.get_tag(TenhouServer.AUTH_TIMEOUT)
+        if not tag or tag.name != 'AUTH' or tag.attributes.get('val') != connection.decoder.generate_auth_token(auth):
+            logger.warning('{}: authentication failed'.format(connection.name))
+            connection.close()
+            return
+
+        connection.send('<LN />')
+
+        # chat and lobby messages are ignored, only default lobby is supported
+        while True:
+            tag = await connection.get_tag()
+            if not tag:
+                connection.close()
+                return
+
+            if tag.name == 'JOIN':
+                lobby, game_type = tag.attributes['t'].split(',')[:2]
+                self._join(connection, int(lobby), int(game_type))
+                return
+
+    def _join(self, connection, lobby, game_type):
+        key = (lobby, game_type)
+        clients = self.waiting_clients.setdefault(key, [])
+        clients.append(connection)
+        logger.info('{}: joined to {} lobby, game type {}'.format(connection.name, lobby, game_type))
+
+        if len(clients) == 4:
+            del self.waiting_clients[key]
+            random.shuffle(clients)
+            task = asyncio.ensure_future(self._play_game(clients, lobby, game_type))
+            self.games.append(task)
+            task.add_done_callback(self.games.remove)
+
+    async def _play_game(self, connections, lobby, game_type):
+        log_id = '{:%Y%m%d%H}gm-{:04x}-{:04d}-{:08x}'.format(
+            datetime.datetime.now(), game_type, lobby, random.getrandbits(32))
+        names = [x.name for x in connections]
+
+        seats = [RemoteSeat(x, self.action_timeout) for x in connections]
+        log_writer = TenhouLogWriter(log_id, game_type, lobby, names, self.logs_directory)
+        game = MahjongGame(seats, self.build_rules(game_type), observers=[log_writer])
+
+        for seat in seats:
+            seat.send_game_start(game_type, lobby, names, log_id)
+
+        start_time = time.monotonic()
+        try:
+            result = await game.play()
+        except Exception as e:
+            logger.exception('Game {} failed'.format(log_id), exc_info=e)
+            return
+        finally:
+            # clients are closing connections after the final results
+            await asyncio.wait([x.reader_task for x in connections], timeout=self.action_timeout)
+            for connection in connections:
+                connection.close()
+
+        latencies = sum([x.latencies for x in seats], [])
+        self.count_of_games += 1
+        self.count_of_actions += len(latencies)
+        self.latencies += latencies
+
+        logger.info('Game {}: {} rounds in {:.1f} s, {} actions, {} timeouts, latency p50 {:.1f} ms, '
+                    'p95 {:.1f} ms, max {:.1f} ms, scores {}'.format(
+                        log_id,
+                        result.count_of_rounds,
+                        time.monotonic() - start_time,
+                        len(latencies),
+                        sum([x.count_of_timeouts for x in seats]),
+                        percentile(latencies, 50) * 1000,
+                        percentile(latencies, 95) * 1000,
+                        max(latencies or [0]) * 1000,
+                        ', '.join(['{}: {}'.format(x, y) for x, y in zip(names, result.scores)]),
+                    ))
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+from game.engine.rules import GameRules
+from tenhou.benchmark import (DecisionBenchmark, compare_benchmarks, generate_corpus, load_corpus, min_repeats,
+                              run_alternately, sign_test_p_value)
+from utils.settings_handler import settings
+
+
+class DecisionBenchmarkTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_benchmark_on_self_play_logs(self):
+        ai_class = settings.copy(LOOKAHEAD_TIME_BUDGET=0, ESTIMATOR_WORKERS=1).AI_CLASS
+        generate_corpus(ai_class, 1, self.directory, rules=GameRules(is_hanchan=False))
+
+        corpus = load_corpus(self.directory)
+        self.assertEqual(len(corpus), 1)
+
+        benchmark = DecisionBenchmark(ai_class)
+        benchmark.add_log(corpus[0][1])
+        values = benchmark.to_dict()
+
+        self.assertEqual(values['logs'], 1)
+        self.assertTrue(values['rounds'] >= 4)
+        self.assertEqual(sorted(values['calls'].keys()), sorted(benchmark.call_types))
+
+        discards = values['calls'][DecisionBenchmark.DISCARD_TILE]
+        # each player discards at least a few tiles in each round
+        self.assertTrue(discards['count'] > values['rounds'] * 4)
+        self.assertTrue(discards['p50'] <= discards['p95'] <= discards['p99'] <= discards['max'])
+        self.assertTrue(discards['throughput'] > 0)
+        self.assertTrue(values['calls'][DecisionBenchmark.SHOULD_GO_TO_DEFENCE_MODE]['count'] > 0)
+        # outs are calculated for each discard
+        self.assertTrue(values['calls'][DecisionBenchmark.CALCULATE_OUTS]['count'] >= discards['count'])
+
+    @unittest.skipIf(not hasattr(tracemalloc, 'reset_peak'), 'Memory tracing requires Python 3.9+')
+    def test_memory_tracing(self):
+        ai_class = settings.copy(LOOKAHEAD_TIME_BUDGET=0, ESTIMATOR_WORKERS=1).AI_CLASS
+        generate_corpus(ai_class, 1, self.directory, rules=GameRules(is_hanchan=False))
+
+        benchmark = DecisionBenchmark(ai_class, trace_memory=True)
+        tracemalloc.start()
+        try:
+            benchmark.add_log(load_corpus(self.directory)[0][1])
+        finally:
+            tracemalloc.stop()
+        values = benchmark.to_dict()
+
+        discards = values['calls'][DecisionBenchmark.DISCARD_TILE]
+        outs = values['calls'][DecisionBenchmark.CALCULATE_OUTS]
+        self.assertTrue(discards['count'] > 0)
+        self.assertTrue(discards['memory']['mean'] > 0)
+        # discard includes calculation of outs
+        self.assertTrue(discards['memory']['max'] >= outs['memory']['max'])
+
+    def test_identical_benchmarks_are_not_regressions(self):
+        ai_class = settings.copy(LOOKAHEAD_TIME_BUDGET=0, ESTIMATOR_WORKERS=1).AI_CLASS
+        generate_corpus(ai_class, 1, self.directory, rules=GameRules(is_hanchan=False))
+        content = load_corpus(self.directory)[0][1]
+
+        def run(repetition):
+            benchmark = DecisionBenchmark(ai_class)
+            benchmark.add_log(content)
+            return benchmark.to_dict()
+
+        # shared AI caches are filled like with --warm_up option
+        run(None)
+        baseline_runs, candidate_runs = run_alternately(run, run, 7)
+        self.assertEqual(len(baseline_runs), 7)
+        self.assertEqual(len(candidate_runs), 7)
+
+        results = compare_benchmarks(baseline_runs, candidate_runs, DecisionBenchmark.HOT_PATHS, 0.1)
+        self.assertEqual(len(results), len(DecisionBenchmark.HOT_PATHS))
+        self.assertFalse([x for x in results if x['is_regression']])
+
+    def test_runs_are_alternated(self):
+        order = []
+        run_alternately(lambda x: order.append(('baseline', x)), lambda x: order.append(('candidate', x)), 3)
+        self.assertEqual(order, [('baseline', 0), ('candidate', 0), ('candidate', 1), ('baseline', 1),
+                                 ('baseline', 2), ('candidate', 2)])
+
+    def test_compare_benchmarks(self):
+        baseline = [self._results(x, 1000) for x in [1.0, 1.2, 0.9, 1.1, 1.0]]
+        faster = [self._results(x, 1000) for x in [0.9, 1.1, 0.8, 1.0, 0.9]]
+        slower = [self._results(x, 1500) for x in [1.3, 1.5, 1.2, 1.4, 1.3]]
+
+        results = compare_benchmarks(baseline, faster, [DecisionBenchmark.CALCULATE_OUTS], 0.1)
+        self.assertEqual([x['metric'] for x in results], ['p50', 'memory'])
+        self.assertFalse([x for x in results if x['is_regression']])
+
+        results = compare_benchmarks(baseline, slower, [DecisionBenchmark.CALCULATE_OUTS], 0.1)
+        self.assertEqual([x['metric'] for x in results if x['is_regression']], ['p50', 'memory'])
+        self.assertAlmostEqual(results[0]['ratio'], 1.3)
+        self.assertEqual(results[1]['candidate'], 1500)
+
+        # slowdown below the threshold is allowed
+        results = compare_benchmarks(baseline, slower, [DecisionBenchmark.CALCULATE_OUTS], 0.6)
+        self.assertFalse([x for x in results if x['is_regression']])
+
+        # one faster run of five is enough to doubt the slowdown
+        noisy = [self._results(x, None) for x in [1.3, 1.5, 0.8, 1.4, 1.3]]
+        results = compare_benchmarks(baseline, noisy, [DecisionBenchmark.CALCULATE_OUTS], 0.1)
+        self.assertTrue(results[0]['ratio'] > 1.1)
+        self.assertFalse(results[0]['is_regression'])
+
+    def test_compared_values_match_the_ratio(self):
+        baseline = [self._results(x, 1000) for x in [1.0, 2.0, 1.0, 2.0, 1.0]]
+        candidate = [self._results(x, 1000) for x in [1.5, 2.0, 1.0, 3.0, 1.5]]
+
+        result = compare_benchmarks(baseline, candidate, [DecisionBenchmark.CALCULATE_OUTS], 0.1)[0]
+        self.assertEqual(result['baseline'], 1.0)
+        self.assertEqual(result['ratio'], 1.5)
+        self.assertEqual(result['candidate'], 1.5)
+
+    def test_memory_growth_should_be_confirmed_by_all_runs(self):
+        baseline = [self._results(1.0, x) for x in [1000, 1000, 1000, 1000, 1000]]
+        candidate = [self._results(1.0, x) for x in [1500, 1500, 900, 1500, 1500]]
+
+        results = compare_benchmarks(baseline, candidate, [DecisionBenchmark.CALCULATE_OUTS], 0.1)
+        self.assertEqual(results[1]['ratio'], 1.5)
+        self.assertFalse(results[1]['is_regression'])
+
+        # memory is compared only when it was measured in all runs
+        candidate[2] = self._results(1.0, None)
+        results = compare_benchmarks(baseline, candidate, [DecisionBenchmark.CALCULATE_OUTS], 0.1)
+        self.assertEqual([x['metric'] for x in results], ['p50'])
+
+    def test_min_repeats(self):
+        self.assertEqual(min_repeats(0.05), 5)
+        self.assertEqual(min_repeats(0.01), 7)
+        self.assertEqual(min_repeats(0.5), 2)
+
+    def test_sign_test_p_value(self):
+        self.assertEqual(sign_test_p_value(5, 5), 1 / 32)
+        self.assertEqual(sign_test_p_value(4, 5), 6 / 32)
+        self.assertEqual(sign_test_p_value(0, 5), 1)
+        self.assertEqual(sign_test_p_value(0, 0), 1)
+
+    def _results(self, p50, memory):
+        call = {
+            'count': 100,
+            'p50': p50,
+        }
+        if memory is not None:
+            call['memory'] = {'mean': memory}
+        return {
+            'calls': {
+                DecisionBenchmark.CALCULATE_OUTS: call,
+            },
+        }
@@ -1,9 +1,23 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import time
 import unittest
 
 from reproducer import TenhouLogReproducer, SocketMock
 from tenhou.client import TenhouClient
 from tenhou.decoder import TenhouDecoder, Meld
+from utils.settings_handler import settings
+
+# authentication, game start and the first round start with our hand, every command is a separate read
+GAME_START_LOG = """
+Get: <HELO uname="Name" auth="20170415-1111111" />
+Get: <LN/>
+Get: <GO type="137" lobby="0" gpid=""/>
+Get: <UN n0="1" n1="2" n2="3" n3="4" dan="11,12,13,11" rate="1500,1500,1500,1500" sx="M,M,M,M"/>
+Get: <TAIKYOKU oya="3" log="123"/>
+Get: <INIT seed="6,2,2,5,0,37" ten="203,96,474,207" oya="1" hai="90,83,14,33,132,119,129,117,26,52,121,134,29"/>
+Get: <U/>
+"""
 
 
 class TenhouClientTestCase(unittest.TestCase):
@@ -15,11 +29,7 @@ class TenhouClientTestCase(unittest.TestCase):
         self.client.end_game(False)
 
     def test_fixed_crash_after_called_kan(self):
-        log = """
-        Get: <HELO uname="Name" auth="20170415-1111111" />
-        Get: <LN/>
-        Get: <GO type="137" lobby="0" gpid=""/> <UN n0="1" n1="2" n2="3" n3="4" dan="11,12,13,11" rate="1500,1500,1500,1500" sx="M,M,M,M"/> <TAIKYOKU oya="3" log="123"/>
-        Get: <INIT seed="6,2,2,5,0,37" ten="203,96,474,207" oya="1" hai="90,83,14,33,132,119,129,117,26,52,121,134,29"/> <U/>
+        log = GAME_START_LOG + """
         Get: <E32/> <V/>
         Get: <F108/> <W/>
         Get: <G55/> <T89/>
@@ -70,13 +80,105 @@ class TenhouClientTestCase(unittest.TestCase):
         """
 
         self.client = TenhouClient(SocketMock(None, log))
+        loop = asyncio.new_event_loop()
         with self.assertRaises(KeyboardInterrupt) as context:
-            self.client.connect()
-            self.client.authenticate()
-            self.client.start_game()
+            loop.run_until_complete(self.client.connect())
+            loop.run_until_complete(self.client.authenticate())
+            loop.run_until_complete(self.client.start_game())
 
-        # close all threads
+        # cancel keep alive timer and background tasks
         self.client.end_game()
+        loop.run_until_complete(asyncio.sleep(0))
+        loop.close()
 
         # end of commands is correct way to end log reproducing
         self.assertTrue('End of commands' in str(context.exception))
+
+    def test_registered_handlers_and_timings(self):
+        log = GAME_START_LOG + """
+        Get: <E32/> <V/>
+        Get: <F108/> <W/>
+        """
+
+        discards = []
+
+        async def save_discard(tag):
+            discards.append(tag.tile)
+
+        self.client = TenhouClient(SocketMock(None, log))
+        self.client.register_handler('E', save_discard)
+        self.client.register_handler('F', save_discard)
+
+        loop = asyncio.new_event_loop()
+        with self.assertRaises(KeyboardInterrupt):
+            loop.run_until_complete(self.client.connect())
+            loop.run_until_complete(self.client.authenticate())
+            loop.run_until_complete(self.client.start_game())
+
+        self.client.end_game()
+        loop.run_until_complete(asyncio.sleep(0))
+        loop.close()
+
+        self.assertEqual(discards, [32, 108])
+        self.assertEqual(self.client.table.players[1].discards[0].value, 32)
+        self.assertEqual(self.client.handlers_timings['_handle_init'][0], 1)
+        self.assertEqual(self.client.handlers_timings['_handle_discard'][0], 2)
+
+    def test_keep_alive_ping_only_after_idle_time(self):
+        self.client = TenhouClient(SocketMock(None, 'Get: <LN/>'))
+        sent_messages = []
+        self.client._send_message = lambda x: sent_messages.append(x)
+
+        async def check_ping():
+            self.client._last_send_time = time.monotonic()
+            self.client._send_keep_alive_ping()
+            # we sent something recently
+            self.assertEqual(sent_messages, [])
+            self.assertTrue(self.client.keep_alive_timer)
+
+            self.client._last_send_time -= TenhouClient.KEEP_ALIVE_INTERVAL
+            self.client._send_keep_alive_ping()
+            self.assertEqual(sent_messages, ['<Z />'])
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(check_ping())
+        self.client.end_game(False)
+        loop.close()
+
+        self.assertEqual(self.client.keep_alive_timer, None)
+
+    def test_discard_preparation_is_limited_by_time_budget(self):
+        session_settings = settings.copy(PREPARE_NEXT_DISCARD=True, PREPARE_NEXT_DISCARD_TIME_BUDGET=0)
+        self.client = TenhouClient(SocketMock(None, 'Get: <LN/>'), session_settings)
+        steps = []
+
+        def prepare_discards():
+            for step in range(0, 10):
+                steps.append(step)
+                yield
+
+        self.client.player.prepare_discards = prepare_discards
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(self.client._prepare_next_discard())
+        loop.close()
+
+        self.assertEqual(steps, [0])
+
+    def test_calls_preparation_is_limited_by_time_budget(self):
+        session_settings = settings.copy(PREPARE_CALLS_TIME_BUDGET=0)
+        self.client = TenhouClient(SocketMock(None, 'Get: <LN/>'), session_settings)
+        steps = []
+
+        def prepare_calls():
+            for step in range(0, 10):
+                steps.append(step)
+                yield
+
+        self.client.player.prepare_calls = prepare_calls
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(self.client._prepare_after_discard())
+        loop.close()
+
+        self.assertEqual(steps, [0])
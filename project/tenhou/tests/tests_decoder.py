@@ -200,3 +200,24 @@ class TenhouDecoderTestCase(unittest.TestCase):
 
         self.assertFalse(decoder.is_discarded_tile_message('<GO type="9" lobby="0" gpid=""/>'))
         self.assertFalse(decoder.is_discarded_tile_message('<FURITEN show="1" />'))
+
+    def test_parse_tag(self):
+        decoder = TenhouDecoder()
+
+        tag = decoder.parse_tag('<f23 t="4"/>')
+        self.assertEqual(tag.name, 'f')
+        self.assertEqual(tag.tile, 23)
+        self.assertEqual(tag.attributes, {'t': '4'})
+
+        tag = decoder.parse_tag('<T0/>')
+        self.assertEqual(tag.name, 'T')
+        self.assertEqual(tag.tile, 0)
+
+        tag = decoder.parse_tag('<N who="3" m="34314" />')
+        self.assertEqual(tag.name, 'N')
+        self.assertEqual(tag.tile, None)
+        self.assertEqual(tag.attributes, {'who': '3', 'm': '34314'})
+
+        # parsed tag can be used instead of the message
+        self.assertEqual(decoder.parse_who_called_riichi(tag), 3)
+        self.assertEqual(decoder.parse_tag(tag), tag)
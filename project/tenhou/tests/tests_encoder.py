@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mahjong.meld import Meld
+from mahjong.tests_mixin import TestMixin
+
+from game.engine.game import RoundInfo
+from tenhou.decoder import TenhouDecoder
+from tenhou.encoder import TenhouEncoder
+
+
+class TenhouEncoderTestCase(unittest.TestCase, TestMixin):
+
+    def test_encode_meld(self):
+        encoder = TenhouEncoder()
+        decoder = TenhouDecoder()
+
+        melds = [
+            Meld(Meld.CHI, [42, 44, 51], True, 44, 2, 1),
+            Meld(Meld.PON, [116, 117, 119], True, 119, 0, 2),
+            Meld(Meld.KAN, [40, 41, 42, 43], True, 42, 3, 1),
+            Meld(Meld.KAN, [40, 41, 42, 43], False, 40, 1, 1),
+            Meld(Meld.CHANKAN, [116, 117, 118, 119], True, 118, 0, 2),
+        ]
+        for meld in melds:
+            message = '<N who="{}" m="{}" />'.format(meld.who, encoder.encode_meld(meld))
+            result = decoder.parse_meld(message)
+
+            self.assertEqual(result.type, meld.type)
+            self.assertEqual(sorted(result.tiles), meld.tiles)
+            self.assertEqual(result.called_tile, meld.called_tile)
+            # tenhou keeps the offset of the player who discarded the tile
+            self.assertEqual(result.from_who, (meld.from_who - meld.who) % 4)
+
+    def test_seats_are_relative(self):
+        encoder = TenhouEncoder(seat=2)
+
+        self.assertEqual(encoder.discard_tag(2, 10, False), '<D10 />')
+        self.assertEqual(encoder.discard_tag(1, 10, True, TenhouEncoder.DISCARD_PON), '<g10 t="1" />')
+        self.assertEqual(encoder.draw_tag(3), '<U />')
+
+        round_info = RoundInfo(1, 0, 0, 1, [20000, 30000, 24000, 26000], 12, None, [2, 3])
+        message = encoder.init_tag(round_info, self._string_to_136_array(man='123456789', pin='1234'))
+        values = TenhouDecoder().parse_initial_values(message)
+
+        self.assertEqual(values['dealer'], 3)
+        self.assertEqual(values['scores'], [240, 260, 200, 300])
+        self.assertEqual(values['dora_indicator'], 12)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+
+from tenhou.client import TenhouClient
+from tenhou.host import BotHost
+from tenhou.main import play_game
+from tenhou.reader import MessageReader
+from utils.logger import get_session_logger_name
+from utils.settings_handler import settings
+
+
+class SilentServerMock(object):
+    """
+    Server that accepts messages and never answers
+    """
+
+    def close(self):
+        pass
+
+    def write(self, message):
+        pass
+
+    async def read(self, _):
+        await asyncio.sleep(3600)
+
+
+class BotHostMock(BotHost):
+
+    def create_client(self, session):
+        client = TenhouClient(SilentServerMock(), session.settings)
+        client.logger = session.logger
+        return client
+
+
+class BotHostTestCase(unittest.TestCase):
+
+    def test_session_settings(self):
+        session_settings = settings.copy(USER_ID='ID1', LOBBY='1111')
+        client = TenhouClient(session_settings=session_settings)
+
+        self.assertEqual(client.settings.USER_ID, 'ID1')
+        self.assertEqual(client.settings.LOBBY, '1111')
+        self.assertNotEqual(settings.USER_ID, 'ID1')
+        self.assertEqual(client.player.ai.__class__, settings.AI_CLASS)
+
+    def test_sessions_require_different_user_ids(self):
+        with self.assertRaises(ValueError):
+            BotHost([settings.copy(USER_ID='ID1'), settings.copy(USER_ID='ID1')], hang_timeout=60)
+
+    def test_session_messages_are_logged_with_session_name(self):
+        host = BotHostMock([settings.copy(USER_ID='ID1'), settings.copy(USER_ID='ID2')], hang_timeout=60)
+        session = host.sessions[1]
+        session.client = host.create_client(session)
+
+        with self.assertLogs(get_session_logger_name('ID2'), level='INFO') as context:
+            session.client.end_game(False)
+
+        self.assertEqual(context.output, ['ERROR:{}:session 2: Game was ended without success'.format(
+            get_session_logger_name('ID2'))])
+
+    def test_read_timeout_is_not_an_activity(self):
+        client = TenhouClient(SilentServerMock())
+        client.message_reader = MessageReader(client._socket_mock)
+        client.last_activity_time = 0
+
+        loop = asyncio.new_event_loop()
+        self.assertEqual(loop.run_until_complete(client._get_multiple_messages(0.01)), [])
+        loop.close()
+
+        self.assertEqual(client.last_activity_time, 0)
+
+    def test_cancelled_game_is_not_swallowed(self):
+        client = TenhouClient(SilentServerMock())
+
+        async def cancel_game():
+            task = asyncio.ensure_future(play_game(client))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.wait([task])
+            return task
+
+        loop = asyncio.new_event_loop()
+        task = loop.run_until_complete(cancel_game())
+        loop.close()
+
+        self.assertTrue(task.cancelled())
+
+    def test_supervisor_restarts_hung_sessions(self):
+        host = BotHostMock([settings.copy(USER_ID='ID1'), settings.copy(USER_ID='ID2')], hang_timeout=0.05)
+        host.check_interval = 0.01
+        host.restart_delay = 0
+
+        async def stop_after_restarts():
+            while any([x.count_of_restarts < 2 for x in host.sessions]):
+                await asyncio.sleep(0.01)
+            host.stop()
+
+        async def run_host():
+            await asyncio.wait_for(asyncio.gather(host.run(), stop_after_restarts()), 5)
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(run_host())
+        loop.run_until_complete(asyncio.sleep(0))
+        loop.close()
+
+        for session in host.sessions:
+            self.assertTrue(session.count_of_restarts >= 2)
+            self.assertTrue(session.count_of_games >= session.count_of_restarts)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+
+from tenhou.pacing import ActionPacer
+
+
+class ActionPacerTestCase(unittest.TestCase):
+
+    def test_delay_after_the_prompt(self):
+        pacer = ActionPacer(1, 4)
+        pacer.prompt_received()
+        self.assertTrue(0.9 < pacer.delay() <= 1)
+
+        # decision took more time than min delay
+        pacer.prompt_time -= 2
+        self.assertEqual(pacer.delay(), 0)
+
+    def test_delay_is_limited_by_time_limit(self):
+        pacer = ActionPacer(10, 4)
+        pacer.prompt_received()
+        self.assertTrue(3 < pacer.delay() <= 4 - ActionPacer.TIME_LIMIT_MARGIN)
+
+        pacer = ActionPacer(0, 4)
+        pacer.prompt_received()
+        self.assertEqual(pacer.delay(), 0)
+
+    def test_delay_is_counted_from_the_receipt_of_the_prompt(self):
+        pacer = ActionPacer(1, 4)
+        # prompt was processed later than it was received
+        pacer.prompt_received(time.perf_counter() - 0.5)
+        self.assertTrue(0.4 < pacer.delay() <= 0.5)
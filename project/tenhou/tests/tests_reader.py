@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+
+from tenhou.reader import MessageReader
+
+
+class StreamMock(object):
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def read(self, _):
+        if not self.chunks:
+            return b''
+        return self.chunks.pop(0)
+
+
+class MessageReaderTestCase(unittest.TestCase):
+
+    def test_feed_several_messages(self):
+        reader = MessageReader(None)
+
+        self.assertEqual(reader.feed(b'<T12/>\x00<U/>\x00<E'), ['<T12/>', '<U/>'])
+        self.assertEqual(reader.feed(b'32/>'), [])
+        self.assertEqual(reader.feed(b'\x00'), ['<E32/>'])
+        self.assertEqual(len(reader.buffer), 0)
+
+    def test_feed_message_split_in_the_middle_of_character(self):
+        reader = MessageReader(None)
+        data = '<CHAT text="こんにちは" />\x00'.encode('utf-8')
+
+        self.assertEqual(reader.feed(data[:14]), [])
+        self.assertEqual(reader.feed(data[14:]), ['<CHAT text="こんにちは" />'])
+
+    def test_read_long_message(self):
+        message = '<REINIT kawa0="{}" />'.format(','.join(['10'] * 2000))
+        data = (message + '\x00<N />\x00').encode('utf-8')
+        chunks = [data[x:x + 1000] for x in range(0, len(data), 1000)]
+        reader = MessageReader(StreamMock(chunks))
+
+        loop = asyncio.new_event_loop()
+        try:
+            start_time = time.perf_counter()
+            self.assertEqual(loop.run_until_complete(reader.read_messages()), [message, '<N />'])
+            self.assertTrue(start_time <= reader.received_time <= time.perf_counter())
+            # stream was closed
+            self.assertEqual(loop.run_until_complete(reader.read_messages()), [])
+        finally:
+            loop.close()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import unittest
+
+from tenhou.client import TenhouClient
+from tenhou.decoder import TenhouDecoder
+from tenhou.main import play_game
+from tenhou.server import TenhouServer
+from utils.settings_handler import settings
+
+
+class TenhouServerTestCase(unittest.TestCase):
+
+    def test_game_between_clients(self):
+        with tempfile.TemporaryDirectory() as logs_directory:
+            server = TenhouServer('127.0.0.1', 0, 5, logs_directory)
+
+            async def play():
+                await server.start()
+                clients = []
+                for x in range(0, 4):
+                    session_settings = settings.copy(
+                        TENHOU_HOST='127.0.0.1',
+                        TENHOU_PORT=server.port,
+                        USER_ID='bot{}'.format(x),
+                        # tonpusen without red fives
+                        GAME_TYPE='3',
+                        AI_PACKAGE='random',
+                        ACTION_MIN_DELAY=0,
+                        STAT_SERVER_URL='',
+                    )
+                    clients.append(TenhouClient(session_settings=session_settings))
+
+                await asyncio.wait_for(asyncio.gather(*[play_game(x) for x in clients]), 30)
+                # the server is waiting for connections to be closed
+                while server.games:
+                    await asyncio.sleep(0.01)
+                await server.stop()
+                return clients
+
+            loop = asyncio.new_event_loop()
+            clients = loop.run_until_complete(play())
+            loop.close()
+
+            self.assertEqual(server.count_of_games, 1)
+            self.assertTrue(server.count_of_actions > 0)
+            for client in clients:
+                self.assertFalse(client.table.has_aka_dora)
+                self.assertEqual(sum([x.scores for x in client.table.players]), 100000)
+
+            log_files = os.listdir(logs_directory)
+            self.assertEqual(len(log_files), 1)
+            with open(os.path.join(logs_directory, log_files[0])) as f:
+                log_content = f.read()
+
+            self.assertIn('<INIT', log_content)
+            message = log_content[log_content.rfind('<', 0, log_content.find('owari')):]
+            values = TenhouDecoder().parse_final_scores_and_uma(message[:message.find('>') + 1])
+            self.assertEqual(sum(values['scores']), 1000)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Self-play tournament between AI packages. Games are played without tenhou.net in worker processes
+"""
+import json
+import logging
+import os
+import time
+from optparse import OptionParser
+
+from game.engine.rules import GameRules
+from game.engine.tournament import DuplicateStatistics, DuplicateTournament, Tournament, TournamentStatistics
+
+logger = logging.getLogger('tenhou')
+
+
+def parse_args():
+    parser = OptionParser()
+
+    parser.add_option('-a', '--ai',
+                      type='string',
+                      default='first_version,first_version,first_version,first_version',
+                      help='Four AI packages separated by comma, seats are rotated between games. '
+                           'For duplicate games candidate and opponent packages. '
+                           'Default is first_version for all seats')
+
+    parser.add_option('-g', '--games',
+                      type='int',
+                      default=100,
+                      help='Count of games, or count of walls for duplicate games. Default is 100')
+
+    parser.add_option('-d', '--duplicate',
+                      action='store_true',
+                      default=False,
+                      help='Play each wall by opponents and then with the candidate in each seat, '
+                           'results of the candidate are compared with the opponent on the same walls')
+
+    parser.add_option('-w', '--workers',
+                      type='int',
+                      default=os.cpu_count() or 1,
+                      help='Count of worker processes. Default is count of cores')
+
+    parser.add_option('-s', '--seed',
+                      type='string',
+                      default='0',
+                      help='Seed of walls, the same seed gives the same walls. Default is 0')
+
+    parser.add_option('-t', '--tonpusen',
+                      action='store_true',
+                      default=False,
+                      help='Play east only games instead of hanchans')
+
+    parser.add_option('-l', '--lookahead',
+                      type='float',
+                      default=0,
+                      help='Time budget for the lookahead of first_version AI. '
+                           'Default is 0, games are reproducible without time budgets')
+
+    parser.add_option('-o', '--output',
+                      type='string',
+                      default=None,
+                      help='File for results of each game, one JSON object per line')
+
+    opts, _ = parser.parse_args()
+    return opts
+
+
+def main():
+    opts = parse_args()
+    # debug messages of AI would slow down games
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+
+    packages = opts.ai.split(',')
+    kwargs = {
+        'seed': opts.seed,
+        'workers': opts.workers,
+        'rules': GameRules(is_hanchan=not opts.tonpusen),
+        'settings_overrides': {'LOOKAHEAD_TIME_BUDGET': opts.lookahead},
+    }
+
+    duplicate_statistics = None
+    if opts.duplicate:
+        if len(packages) != 2 or packages[0] == packages[1]:
+            logger.error('Two different AI packages are required for duplicate games')
+            return
+
+        tournament = DuplicateTournament(packages[0], packages[1], opts.games, **kwargs)
+        duplicate_statistics = DuplicateStatistics(packages[0], packages[1])
+    else:
+        if len(packages) != 4:
+            logger.error('Four AI packages are required')
+            return
+
+        tournament = Tournament(packages, opts.games, **kwargs)
+    statistics = TournamentStatistics()
+
+    output = opts.output and open(opts.output, 'w') or None
+    start_time = time.monotonic()
+    try:
+        for i, record in enumerate(tournament.play()):
+            statistics.add_game(record)
+            if duplicate_statistics:
+                duplicate_statistics.add_game(record)
+            if output:
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+
+            if (i + 1) % 10 == 0:
+                logger.info('{} games, {:.1f} games/minute'.format(
+                    i + 1, (i + 1) / (time.monotonic() - start_time) * 60))
+    except KeyboardInterrupt:
+        logger.info('Tournament was stopped')
+    finally:
+        if output:
+            output.close()
+
+    print(statistics.format_report())
+    if duplicate_statistics:
+        print(duplicate_statistics.format_report())
+
+
+if __name__ == '__main__':
+    main()
@@ -8,31 +8,42 @@ import hashlib
 from utils.settings_handler import settings
 
 
-def set_up_logging():
+class SessionLoggerAdapter(logging.LoggerAdapter):
+    """
+    Messages of the bot session are prefixed with the session name,
+    so sessions of one process can be distinguished in the common output
+    """
+
+    def process(self, msg, kwargs):
+        return '{}: {}'.format(self.extra['name'], msg), kwargs
+
+
+def set_up_logging(user_ids=None):
     """
     Logger for tenhou communication and AI output
+    :param user_ids: user ids of bot sessions, when many bots are playing in one process.
+    Each session will have own log file and the common log file will have messages of all sessions
     """
     logs_directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'logs')
     if not os.path.exists(logs_directory):
         os.mkdir(logs_directory)
 
-    # we shouldn't be afraid about collision
-    # also, we need it to distinguish different bots logs (if they were run in the same time)
-    name_hash = hashlib.sha1(settings.USER_ID.encode('utf-8')).hexdigest()[:5]
-
     logger = logging.getLogger('tenhou')
     logger.setLevel(logging.DEBUG)
 
+    formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
     ch = logging.StreamHandler()
     ch.setLevel(logging.DEBUG)
-
-    file_name = '{}_{}.log'.format(name_hash, datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S'))
-    fh = logging.FileHandler(os.path.join(logs_directory, file_name))
-    fh.setLevel(logging.DEBUG)
-
-    formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
     ch.setFormatter(formatter)
-    fh.setFormatter(formatter)
+
+    if user_ids:
+        fh = _create_file_handler(logs_directory, 'host', formatter)
+        for user_id in user_ids:
+            session_logger = logging.getLogger(get_session_logger_name(user_id))
+            session_logger.addHandler(_create_file_handler(logs_directory, get_name_hash(user_id), formatter))
+    else:
+        fh = _create_file_handler(logs_directory, get_name_hash(settings.USER_ID), formatter)
 
     logger.addHandler(ch)
     logger.addHandler(fh)
@@ -41,3 +52,31 @@ def set_up_logging():
     logger.setLevel(logging.DEBUG)
     logger.addHandler(ch)
     logger.addHandler(fh)
+
+
+def get_session_logger(user_id, name=None):
+    """
+    :param user_id: tenhou user id of the session
+    :param name: session name for messages, by default hash of the user id is used
+    :return: logger of the bot session, it is a child of tenhou logger
+    """
+    logger = logging.getLogger(get_session_logger_name(user_id))
+    return SessionLoggerAdapter(logger, {'name': name or get_name_hash(user_id)})
+
+
+def get_session_logger_name(user_id):
+    return 'tenhou.{}'.format(get_name_hash(user_id))
+
+
+def get_name_hash(user_id):
+    # we shouldn't be afraid about collision
+    # also, we need it to distinguish different bots logs (if they were run in the same time)
+    return hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:5]
+
+
+def _create_file_handler(logs_directory, name, formatter):
+    file_name = '{}_{}.log'.format(name, datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S'))
+    fh = logging.FileHandler(os.path.join(logs_directory, file_name))
+    fh.setLevel(logging.DEBUG)
+    fh.setFormatter(formatter)
+    return fh
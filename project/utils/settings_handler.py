@@ -22,8 +22,10 @@ class SettingsSingleton(object):
         return setattr(self.instance, key, value)
 
     def load_ai_class(self):
-        module = importlib.import_module('game.ai.{}.main'.format(self.AI_PACKAGE))
-        self.AI_CLASS = getattr(module, 'ImplementationAI')
+        self.instance.load_ai_class()
+
+    def copy(self, **overrides):
+        return self.instance.copy(**overrides)
 
 
 class Settings(object):
@@ -35,5 +37,22 @@ class Settings(object):
             setting_value = getattr(mod, setting)
             setattr(self, setting, setting_value)
 
+    def load_ai_class(self):
+        module = importlib.import_module('game.ai.{}.main'.format(self.AI_PACKAGE))
+        self.AI_CLASS = getattr(module, 'ImplementationAI')
+        self.AI_CLASS.load_resources(self)
+
+    def copy(self, **overrides):
+        """
+        Settings for one bot session, global settings will not be changed
+        :param overrides: settings that are different for the session, like USER_ID or AI_PACKAGE
+        :return: Settings
+        """
+        session_settings = Settings.__new__(Settings)
+        session_settings.__dict__.update(self.__dict__)
+        session_settings.__dict__.update(overrides)
+        session_settings.load_ai_class()
+        return session_settings
+
 
 settings = SettingsSingleton()
@@ -10,9 +10,13 @@ class Statistics(object):
     """
     game_id = ''
     username = ''
+    settings = None
+
+    def __init__(self, session_settings=None):
+        self.settings = session_settings or settings
 
     def send_statistics(self):
-        url = settings.STAT_SERVER_URL
+        url = self.settings.STAT_SERVER_URL
         if not url or not self.game_id:
             return False
 
@@ -22,6 +26,6 @@ class Statistics(object):
             'username': self.username
         }
 
-        result = requests.post(url, data, headers={'Token': settings.STAT_TOKEN})
+        result = requests.post(url, data, headers={'Token': self.settings.STAT_TOKEN})
 
         return result.status_code == 200 and result.json()['success']